@@ -2,14 +2,25 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Type, TypeVar
+from typing import Any, Dict, List, Literal, Optional, Tuple, Type, TypeVar
 
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic_settings import BaseSettings
 
 
-class WeightConfig(BaseModel):
+class ConfigSection(BaseModel):
+    """Base of the weight-file sections; frozen so a snapshot cannot change under a running case."""
+
+    model_config = ConfigDict(frozen=True)
+
+
+class WeightConfig(ConfigSection):
     """Weights applied to each layer for final risk aggregation."""
 
     image_quality_weight: float = Field(0.15, ge=0.0)
@@ -22,14 +33,14 @@ class WeightConfig(BaseModel):
         return sum(self.model_dump().values()) or 1.0
 
 
-class ThresholdConfig(BaseModel):
+class ThresholdConfig(ConfigSection):
     """Routing thresholds for risk tiers."""
 
     auto_approve_threshold: int = Field(65, ge=0, le=100)
     officer_review_threshold: int = Field(85, ge=0, le=100)
 
 
-class QualityConfig(BaseModel):
+class QualityConfig(ConfigSection):
     blur_variance_threshold: float = 100.0
     brightness_dark_threshold: float = 60.0
     brightness_bright_threshold: float = 220.0
@@ -37,15 +48,31 @@ class QualityConfig(BaseModel):
     min_width: int = 600
     min_height: int = 400
     officer_review_quality_threshold: float = Field(0.8, ge=0.0, le=1.0)
+    decode_mode: Literal["color", "gray"] = Field(
+        "color",
+        description="color converts the shared colour frame; gray decodes the payload again, straight to grayscale",
+    )
+    decode_scale: Literal[1, 2] = Field(1, description="Grayscale decode downscale factor")
+    blur_scale_max_ratio: float = Field(
+        12.0, ge=1.0, description="Largest half-scale to full-resolution Laplacian variance ratio seen in calibration"
+    )
 
 
-class DetectionConfig(BaseModel):
+class DetectionConfig(ConfigSection):
     confidence_threshold: float = Field(0.45, ge=0.0, le=1.0)
     iou_threshold: float = Field(0.4, ge=0.0, le=1.0)
     asset_synonyms: Dict[str, List[str]] = Field(default_factory=dict)
+    batch_max_size: int = Field(8, ge=1, description="Frames per batched predict call (1 disables batching)")
+    batch_max_wait_ms: float = Field(10.0, ge=0.0, description="Longest a frame waits for its batch to fill")
+    backend: Literal["auto", "ultralytics", "onnx"] = Field(
+        "auto", description="auto picks onnx for .onnx model files, ultralytics otherwise"
+    )
+    input_size: int = Field(640, ge=32, description="Letterbox size when the model does not fix it")
+    onnx_providers: List[str] = Field(default_factory=lambda: ["CPUExecutionProvider"])
+    onnx_threads: int = Field(0, ge=0, description="Intra-op threads for ONNX Runtime (0 = runtime default)")
 
 
-class OCRConfig(BaseModel):
+class OCRConfig(ConfigSection):
     provider_confidence_threshold: float = Field(0.7, ge=0.0, le=1.0)
     amount_tolerance_pct: float = Field(0.25, ge=0.0, le=1.0)
     date_tolerance_days: int = 30
@@ -53,14 +80,34 @@ class OCRConfig(BaseModel):
     amount_penalty: float = 15.0
     date_penalty: float = 10.0
     low_confidence_penalty: float = 5.0
-
-
-class DuplicateConfig(BaseModel):
+    provider: Literal["auto", "google-vision", "tesseract", "none"] = Field(
+        "auto", description="auto prefers Google Vision, then local Tesseract, then regex-only parsing"
+    )
+    vision_endpoint: str = Field(
+        "https://vision.googleapis.com/v1/images:annotate", description="REST endpoint used with GOOGLE_API_KEY"
+    )
+    vision_batch_size: int = Field(16, ge=1, le=16, description="Images per images:annotate call (API limit 16)")
+    vision_batch_max_bytes: int = Field(
+        8 * 1024 * 1024, ge=1, description="Base64 image bytes per images:annotate call (API request limit 10 MB)"
+    )
+    vision_batch_wait_ms: float = Field(25.0, ge=0.0, description="How long a document waits for batch-mates")
+    vision_images_per_minute: float = Field(1800.0, gt=0.0, description="Vision quota; calls are paced to it")
+    vision_timeout_seconds: float = Field(30.0, gt=0.0)
+    tesseract_cmd: str = Field("tesseract", description="Tesseract binary name or path")
+    tesseract_lang: str = Field("eng", description="Tesseract language packs, e.g. eng+hin")
+    tesseract_psm: int = Field(4, ge=0, le=13, description="Page segmentation mode (4: single column of text)")
+    local_ocr_workers: int = Field(2, ge=1, description="Processes running local OCR")
+    local_ocr_timeout_seconds: float = Field(60.0, gt=0.0)
+    local_ocr_preprocess: bool = Field(True, description="Deskew and binarise pages before local OCR")
+
+
+class DuplicateConfig(ConfigSection):
     hash_distance_threshold: int = 5
     duplicate_penalty_points: float = 15.0
+    scope: Literal["applicant", "org", "scheme", "global"] = "global"
 
 
-class FraudRuleConfig(BaseModel):
+class FraudRuleConfig(ConfigSection):
     gps_threshold_km: float = 25.0
     gps_penalty: float = 15.0
     off_hours_start: int = 7
@@ -71,6 +118,20 @@ class FraudRuleConfig(BaseModel):
     history_penalty: float = 10.0
 
 
+class ExecutionConfig(ConfigSection):
+    """Worker limits for concurrent pipeline stages (0 runs a stage inline)."""
+
+    default_stage_workers: int = Field(2, ge=0)
+    stage_workers: Dict[str, int] = Field(default_factory=dict)
+    batch_max_in_flight: int = Field(16, ge=1, description="Cases scored concurrently by score_batch")
+    fraud_batch_max_size: int = Field(64, ge=1, description="Feature vectors per batched fraud model call")
+    fraud_batch_max_wait_ms: float = Field(5.0, ge=0.0)
+    explain_stage_timings: bool = Field(False, description="Attach per-case stage timings to full_explanation")
+
+    def workers_for(self, stage: str) -> int:
+        return max(0, self.stage_workers.get(stage, self.default_stage_workers))
+
+
 class Settings(BaseSettings):
     """Application settings loaded from env or defaults."""
     
@@ -86,6 +147,14 @@ class Settings(BaseSettings):
         default=Path(__file__).resolve().parents[1] / "data" / "duplicates_state.json",
         description="Path for persisting perceptual hash comparisons.",
     )
+    state_backend: Literal["json", "sqlite"] = Field(
+        "json",
+        description="Backend for duplicate/device state; sqlite migrates the JSON file on first start.",
+    )
+    state_db_path: Path = Field(
+        default=Path(__file__).resolve().parents[1] / "data" / "vidya_state.db",
+        description="SQLite database used when state_backend is 'sqlite'.",
+    )
     device_state_path: Path = Field(
         default=Path(__file__).resolve().parents[1] / "data" / "device_state.json",
         description="Path for persisting device usage counters.",
@@ -94,10 +163,50 @@ class Settings(BaseSettings):
     google_api_key: Optional[str] = Field(default=None, description="Direct API key for Google Vision REST usage")
     google_project_id: Optional[str] = Field(default=None)
     yolo_model_path: Optional[Path] = Field(default=None)
+    media_timeout_seconds: int = Field(10, ge=1, description="Per-request timeout for evidence downloads")
+    media_max_bytes: int = Field(25 * 1024 * 1024, ge=1, description="Maximum size of a downloaded evidence file")
+    media_pool_per_host: int = Field(8, ge=1, description="Keep-alive connections allowed per evidence host")
+    media_fetch_retries: int = Field(3, ge=0, description="Retries for transient download failures")
+    media_retry_backoff: float = Field(0.3, ge=0.0, description="Exponential backoff factor between retries")
+    media_cache_dir: Optional[Path] = Field(default=None, description="Enables the on-disk media cache when set")
+    media_cache_max_bytes: int = Field(2 * 1024 * 1024 * 1024, ge=0, description="Size bound for the media cache")
+    media_cache_revalidate: bool = Field(False, description="Revalidate cached URLs with If-None-Match")
+    ocr_cache_path: Optional[Path] = Field(default=None, description="SQLite file that enables the OCR result cache")
+    ocr_cache_ttl_seconds: int = Field(30 * 24 * 3600, ge=0, description="How long cached OCR output stays valid")
+    ocr_cache_max_bytes: int = Field(256 * 1024 * 1024, ge=0, description="Size bound for the OCR cache")
+    layer_store_dir: Optional[Path] = Field(
+        default=None, description="Folder that enables recording per-case layer outputs for weight simulation"
+    )
+    layer_store_flush_rows: int = Field(256, ge=1, description="Recorded cases buffered before a segment is written")
+    job_store: Literal["memory", "sqlite"] = Field("memory", description="Backend for async scoring jobs")
+    job_db_path: Path = Field(
+        default=Path(__file__).resolve().parents[1] / "data" / "vidya_jobs.db",
+        description="SQLite database used when job_store is 'sqlite'.",
+    )
+    job_workers: int = Field(4, ge=1, description="Worker threads running async scoring jobs")
+    job_lease_seconds: float = Field(
+        60.0, gt=0.0, description="How long a claimed SQLite job stays with a worker that stops renewing it"
+    )
+    job_queue_max_depth: int = Field(1000, ge=1, description="Queued plus running jobs before 429s")
+    job_webhook_timeout_seconds: float = Field(5.0, gt=0.0, description="Timeout for job callback POSTs")
+    job_retention_seconds: int = Field(3600, ge=0, description="How long finished jobs stay pollable")
+    job_callback_allowed_hosts: List[str] = Field(
+        default_factory=list,
+        description="Hosts job callbacks may target; empty allows any host resolving to public addresses only",
+    )
     model_registry_path: Path = Field(
         default=Path(__file__).resolve().parents[1] / "models",
         description="Folder containing serialized ML models.",
     )
+    model_registry_poll_seconds: float = Field(
+        30.0, ge=0.0, description="How often to look for new fraud model versions (0 disables the watcher)"
+    )
+    config_reload_poll_seconds: float = Field(
+        5.0, ge=0.0, description="How often to check the weight file for changes (0 disables hot reload)"
+    )
+    warmup_on_startup: bool = Field(
+        False, description="Load detection, OCR and other heavy backends in the background at startup"
+    )
     enable_mlflow_logging: bool = Field(False, description="Toggle MLflow logging for experiments")
 
     def load_runtime_config(self) -> Dict[str, Any]:
@@ -114,25 +223,110 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-_raw_config = settings.load_runtime_config()
 
 ConfigType = TypeVar("ConfigType", bound=BaseModel)
 
 
+@lru_cache(maxsize=1)
+def _raw_config() -> Dict[str, Any]:
+    return settings.load_runtime_config()
+
+
 def _build_config(model: Type[ConfigType], key: str) -> ConfigType:
-    return model(**_raw_config.get(key, {}))
+    return model(**_raw_config().get(key, {}))
+
+
+# Sections are parsed from the weight file on first access, not at import time
+_SECTIONS: Dict[str, Tuple[Type[BaseModel], str]] = {
+    "weight_config": (WeightConfig, "weights"),
+    "threshold_config": (ThresholdConfig, "thresholds"),
+    "quality_config": (QualityConfig, "quality"),
+    "detection_config": (DetectionConfig, "detection"),
+    "ocr_config": (OCRConfig, "ocr"),
+    "duplicate_config": (DuplicateConfig, "duplicates"),
+    "fraud_rule_config": (FraudRuleConfig, "fraud_rules"),
+    "execution_config": (ExecutionConfig, "execution"),
+}
+
+weight_config: WeightConfig
+threshold_config: ThresholdConfig
+quality_config: QualityConfig
+detection_config: DetectionConfig
+ocr_config: OCRConfig
+duplicate_config: DuplicateConfig
+fraud_rule_config: FraudRuleConfig
+execution_config: ExecutionConfig
+
+
+def __getattr__(name: str) -> Any:
+    section = _SECTIONS.get(name)
+    if section is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return globals().setdefault(name, _build_config(*section))
+
+
+# Snapshot field name (the weight-file key) -> section model
+SNAPSHOT_SECTIONS: Dict[str, Type[ConfigSection]] = {key: model for model, key in _SECTIONS.values()}
+
+
+def _digest(sections: Dict[str, ConfigSection]) -> str:
+    canonical = json.dumps({key: section.model_dump(mode="json") for key, section in sections.items()}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Every weight-file section as one immutable, versioned value.
+
+    A case reads the current snapshot once and scores against it, so a
+    reload never mixes old and new sections within a case. ``version``
+    counts accepted changes since startup; ``digest`` hashes the section
+    contents, so two snapshots with the same digest score identically.
+    """
+
+    weights: WeightConfig
+    thresholds: ThresholdConfig
+    quality: QualityConfig
+    detection: DetectionConfig
+    ocr: OCRConfig
+    duplicates: DuplicateConfig
+    fraud_rules: FraudRuleConfig
+    execution: ExecutionConfig
+    version: int = 1
+    source: str = "startup"
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    digest: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "digest", _digest(self.sections()))
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any], version: int = 1, source: str = "file") -> "ConfigSnapshot":
+        """Parse every section of a weight-file mapping; raises if any section is invalid."""
+
+        if not isinstance(raw, dict):
+            raise ValueError("the weight file must hold a JSON object")
+        sections = {key: model(**raw.get(key, {})) for key, model in SNAPSHOT_SECTIONS.items()}
+        return cls(**sections, version=version, source=source)
+
+    @property
+    def label(self) -> str:
+        return f"{self.version}-{self.digest}"
+
+    def sections(self) -> Dict[str, ConfigSection]:
+        return {key: getattr(self, key) for key in SNAPSHOT_SECTIONS}
+
+    def evolve(self, source: str, **sections: ConfigSection) -> "ConfigSnapshot":
+        """The next version, with ``sections`` replaced and the rest carried over."""
 
+        return ConfigSnapshot(**{**self.sections(), **sections}, version=self.version + 1, source=source)
 
-weight_config: WeightConfig = _build_config(WeightConfig, "weights")
-threshold_config: ThresholdConfig = _build_config(ThresholdConfig, "thresholds")
-quality_config: QualityConfig = _build_config(QualityConfig, "quality")
-detection_config: DetectionConfig = _build_config(DetectionConfig, "detection")
-ocr_config: OCRConfig = _build_config(OCRConfig, "ocr")
-duplicate_config: DuplicateConfig = _build_config(DuplicateConfig, "duplicates")
-fraud_rule_config: FraudRuleConfig = _build_config(FraudRuleConfig, "fraud_rules")
 
 __all__ = [
     "settings",
+    "ConfigSection",
+    "ConfigSnapshot",
+    "SNAPSHOT_SECTIONS",
     "weight_config",
     "threshold_config",
     "quality_config",
@@ -140,6 +334,7 @@ __all__ = [
     "ocr_config",
     "duplicate_config",
     "fraud_rule_config",
+    "execution_config",
     "WeightConfig",
     "ThresholdConfig",
     "QualityConfig",
@@ -147,4 +342,5 @@ __all__ = [
     "OCRConfig",
     "DuplicateConfig",
     "FraudRuleConfig",
+    "ExecutionConfig",
 ]
\ No newline at end of file
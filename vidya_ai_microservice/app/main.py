@@ -3,31 +3,51 @@
 from __future__ import annotations
 
 import asyncio
+import shutil
+import threading
+import time
 from functools import lru_cache
-from typing import Dict
+from typing import Any, Dict, Iterator, List, Optional
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Body, Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import HttpUrl, ValidationError
 
-from . import get_version
-from .config import (
-    WeightConfig,
-    detection_config,
-    duplicate_config,
-    fraud_rule_config,
-    ocr_config,
-    quality_config,
-    threshold_config,
-    weight_config,
+from . import config, get_version
+from .config import ThresholdConfig, WeightConfig, settings
+from .schemas import (
+    BatchScoreItem,
+    EvidencePackage,
+    HealthResponse,
+    ModelPinRequest,
+    ScoreJob,
+    ScoreResponse,
+    ScoreSummary,
+    ScoreView,
+    WeightSimulationRequest,
+    WeightSimulationResponse,
+    WeightUpdateRequest,
 )
-from .schemas import EvidencePackage, HealthResponse, ScoreResponse, WeightUpdateRequest
-from .services import VidyaAIPipeline
+from .services import CallbackRejectedError, JobQueue, ModelRegistryError, QueueFullError, VidyaAIPipeline
+from .utils.compression import json_response
+from .utils.job_store import open_job_store
+from .utils.lazy import import_report, optional_module
+
+# Reported by /health; only checked for presence, never imported there
+_HEALTH_DEPENDENCIES = {
+    "opencv": "cv2",
+    "ultralytics": "ultralytics",
+    "google_cloud_vision": "google.cloud.vision",
+    "xgboost": "xgboost",
+}
 
 
 def create_app() -> FastAPI:
+    version = get_version()
     app = FastAPI(
         title="VIDYA AI Risk Scoring Service",
-        version=get_version(),
+        version=version,
         description="Microservice for loan evidence verification, fraud detection, and routing.",
     )
 
@@ -39,15 +59,59 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    started = time.perf_counter()
+    execution_config = config.execution_config  # first section access parses the weight file
+    config_loaded = time.perf_counter()
     pipeline = VidyaAIPipeline(
-        weights=weight_config,
-        thresholds=threshold_config,
-        quality_cfg=quality_config,
-        detection_cfg=detection_config,
-        ocr_cfg=ocr_config,
-        duplicate_cfg=duplicate_config,
-        fraud_rules=fraud_rule_config,
+        weights=config.weight_config,
+        thresholds=config.threshold_config,
+        quality_cfg=config.quality_config,
+        detection_cfg=config.detection_config,
+        ocr_cfg=config.ocr_config,
+        duplicate_cfg=config.duplicate_config,
+        fraud_rules=config.fraud_rule_config,
+        execution_cfg=execution_config,
+    )
+    app.state.pipeline = pipeline
+    startup: Dict[str, Any] = {
+        "config_seconds": round(config_loaded - started, 4),
+        "pipeline_seconds": round(time.perf_counter() - config_loaded, 4),
+        "warm_up": "pending" if settings.warmup_on_startup else "disabled",
+        "warm_up_seconds": None,
+    }
+    app.state.startup = startup
+    dependencies = {
+        label: optional_module(module).available() for label, module in _HEALTH_DEPENDENCIES.items()
+    }
+    dependencies["tesseract"] = shutil.which(config.ocr_config.tesseract_cmd) is not None
+
+    def warm_up() -> None:
+        warm_started = time.perf_counter()
+        try:
+            pipeline.warm_up()
+            startup["warm_up"] = "done"
+        except Exception as exc:  # pragma: no cover - runtime safeguard
+            startup["warm_up"] = f"failed: {exc}"
+        startup["warm_up_seconds"] = round(time.perf_counter() - warm_started, 4)
+
+    if settings.warmup_on_startup:
+        threading.Thread(target=warm_up, name="vidya-warm-up", daemon=True).start()
+    jobs = JobQueue(
+        pipeline.score_case,
+        open_job_store(settings.job_store, settings.job_db_path, settings.job_lease_seconds),
+        workers=settings.job_workers,
+        max_depth=settings.job_queue_max_depth,
+        webhook_timeout_seconds=settings.job_webhook_timeout_seconds,
+        retention_seconds=settings.job_retention_seconds,
+        callback_allowed_hosts=settings.job_callback_allowed_hosts,
     )
+    jobs.start()
+    app.state.jobs = jobs
+    app.router.add_event_handler("shutdown", jobs.shutdown)
+    pipeline.model_registry.start()
+    app.router.add_event_handler("shutdown", pipeline.model_registry.stop)
+    pipeline.configs.start()
+    app.router.add_event_handler("shutdown", pipeline.close)
 
     @lru_cache
     def get_pipeline() -> VidyaAIPipeline:
@@ -55,21 +119,101 @@ def create_app() -> FastAPI:
 
     @app.get("/health", response_model=HealthResponse)
     async def health() -> HealthResponse:
-        dependencies = {
-            "opencv": _is_module_available("cv2"),
-            "ultralytics": _is_module_available("ultralytics"),
-            "google_cloud_vision": _is_module_available("google.cloud.vision"),
-            "xgboost": _is_module_available("xgboost"),
-        }
-        return HealthResponse(status="ok", version=get_version(), dependencies=dependencies)
+        return HealthResponse(status="ok", version=version, dependencies=dependencies)
+
+    @app.post("/cases/score", response_model=ScoreResponse | ScoreSummary)
+    async def score_case(
+        payload: EvidencePackage,
+        request: Request,
+        view: ScoreView = "audit",
+        service: VidyaAIPipeline = Depends(get_pipeline),
+    ) -> Response:
+        """Score one case; ``view=summary`` returns only the decision, ``full`` drops the audit copies."""
 
-    @app.post("/cases/score", response_model=ScoreResponse)
-    async def score_case(payload: EvidencePackage, service: VidyaAIPipeline = Depends(get_pipeline)) -> ScoreResponse:
         loop = asyncio.get_running_loop()
         try:
-            return await loop.run_in_executor(None, service.score_case, payload)
+            prefetched = await service.loader.prefetch_package_async(payload)
+            result = await loop.run_in_executor(None, service.score_case, payload, prefetched, view)
         except Exception as exc:  # pragma: no cover - runtime safeguard
             raise HTTPException(status_code=500, detail=str(exc)) from exc
+        # Serialised once by pydantic-core, skipping FastAPI's re-validation and jsonable_encoder pass
+        return json_response(result.model_dump_json(), request.headers.get("accept-encoding", ""))
+
+    @app.post("/cases/score/jobs", response_model=ScoreJob, status_code=202)
+    async def submit_score_job(
+        payload: EvidencePackage,
+        response: Response,
+        callback_url: Optional[HttpUrl] = None,
+    ) -> ScoreJob:
+        """Queue a case for scoring; poll the returned job or wait for the callback."""
+
+        loop = asyncio.get_running_loop()
+        try:
+            # Off the event loop: checking the callback URL resolves its host
+            job = await loop.run_in_executor(None, jobs.submit, payload, str(callback_url) if callback_url else None)
+        except CallbackRejectedError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+        except QueueFullError as exc:
+            raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "1"}) from exc
+        response.headers["Location"] = f"/cases/score/jobs/{job.job_id}"
+        return job
+
+    @app.get("/cases/score/jobs/{job_id}", response_model=ScoreJob)
+    async def get_score_job(job_id: str) -> ScoreJob:
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+        return job
+
+    @app.post("/cases/score:batch")
+    async def score_batch(
+        payload: List[Dict[str, Any]] = Body(...),
+        view: ScoreView = "audit",
+        service: VidyaAIPipeline = Depends(get_pipeline),
+    ) -> StreamingResponse:
+        """Score many cases, streaming one ``BatchScoreItem`` per line as each finishes."""
+
+        packages: List[EvidencePackage] = []
+        positions: List[int] = []
+        rejected: List[BatchScoreItem] = []
+        for index, raw in enumerate(payload):
+            try:
+                packages.append(EvidencePackage.model_validate(raw))
+                positions.append(index)
+            except ValidationError as exc:
+                case_id = raw.get("case_id") if isinstance(raw, dict) else None
+                rejected.append(
+                    BatchScoreItem(index=index, case_id=case_id and str(case_id), status="error", error=str(exc))
+                )
+
+        def lines() -> Iterator[str]:
+            for item in rejected:
+                yield item.model_dump_json() + "\n"
+            for item in service.score_batch(packages, view=view):
+                item.index = positions[item.index]
+                yield item.model_dump_json() + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/stats")
+    async def stats(service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        return {
+            "media_cache": service.loader.cache_stats(),
+            "ocr_cache": service.ocr.cache.stats() if service.ocr.cache else None,
+            "detection_batcher": service.detector.batch_stats(),
+            "vision_batcher": service.ocr.batch_stats(),
+            "fraud_batcher": service.fraud_batcher.stats(),
+            "jobs": jobs.stats(),
+            "layer_store": service.layer_store.stats() if service.layer_store else None,
+            "startup": {**startup, "imports": import_report()},
+        }
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics(service: VidyaAIPipeline = Depends(get_pipeline)) -> Response:
+        if not service.metrics.enabled:
+            raise HTTPException(status_code=503, detail="prometheus_client is not installed")
+        body, content_type = service.metrics.exposition()
+        return Response(content=body, media_type=content_type)
 
     @app.get("/config/weights")
     async def get_weights(service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, float]:
@@ -81,15 +225,70 @@ def create_app() -> FastAPI:
         service.update_weights(new_weights)
         return new_weights.model_dump()
 
-    return app
+    @app.post("/config/weights/simulate", response_model=WeightSimulationResponse)
+    async def simulate_weights(
+        payload: WeightSimulationRequest, service: VidyaAIPipeline = Depends(get_pipeline)
+    ) -> WeightSimulationResponse:
+        """Re-tier every recorded case under candidate weights without applying them."""
+
+        if service.layer_store is None:
+            raise HTTPException(status_code=503, detail="Case recording is disabled; set LAYER_STORE_DIR")
+        try:
+            weights = WeightConfig(**payload.weights)
+            current = service.configs.current.thresholds.model_dump()
+            thresholds = ThresholdConfig(**{**current, **(payload.thresholds or {})})
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=exc.errors()) from exc
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, service.simulate_weights, weights, thresholds, payload.sample)
+
+    @app.get("/admin/config")
+    async def config_status(service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        return service.configs.status()
 
+    @app.post("/admin/config/reload")
+    async def reload_config(service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        """Re-read the weight file now; a file that fails to parse is reported and the live config kept."""
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: service.configs.refresh(force=True))
+        status = service.configs.status()
+        if status["failed"]:
+            raise HTTPException(status_code=422, detail=status)
+        return status
+
+    @app.get("/admin/models")
+    async def list_models(service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        return service.model_registry.status()
+
+    @app.post("/admin/models/refresh")
+    async def refresh_models(service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, service.model_registry.refresh)
+        return service.model_registry.status()
 
-def _is_module_available(module_name: str) -> bool:
-    try:
-        __import__(module_name)
-        return True
-    except Exception:
-        return False
+    @app.post("/admin/models/pin")
+    async def pin_model(payload: ModelPinRequest, service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, service.model_registry.pin, payload.version)
+        except ModelRegistryError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+    @app.delete("/admin/models/pin")
+    async def unpin_model(service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, service.model_registry.unpin)
+
+    @app.post("/admin/models/rollback")
+    async def rollback_model(service: VidyaAIPipeline = Depends(get_pipeline)) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, service.model_registry.rollback)
+        except ModelRegistryError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+    return app
 
 
 app = create_app()
@@ -5,7 +5,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Dict, List, Literal, Optional
 
-from pydantic import BaseModel, Field, ConfigDict, HttpUrl
+from pydantic import BaseModel, Field, ConfigDict, HttpUrl, PrivateAttr
 
 
 class GPSCoordinate(BaseModel):
@@ -91,6 +91,33 @@ class ObjectDetectionResult(BaseModel):
     details: Dict[str, Any] = Field(default_factory=dict)
 
 
+class OCRWord(BaseModel):
+    text: str
+    confidence: float
+    bbox: List[float] = Field(default_factory=list, description="x1, y1, x2, y2 in image pixels")
+
+
+class OCRText(BaseModel):
+    """Raw output of an OCR provider, before any parsing or cross-checks."""
+
+    text: str
+    confidence: float
+    words: List[OCRWord] = Field(default_factory=list)
+    provider: str
+
+
+class FieldCandidate(BaseModel):
+    """A value found for an invoice field, with where it was found."""
+
+    field: Literal["vendor", "amount", "date"]
+    value: str | float
+    start: int = Field(..., description="Offset of the match in the OCR text")
+    end: int
+    label: Optional[str] = Field(None, description="Label the value was read against, e.g. 'grand total'")
+    bbox: List[float] = Field(default_factory=list, description="x1, y1, x2, y2 when placed by page layout")
+    selected: bool = False
+
+
 class OCRResult(BaseModel):
     doc_id: str
     raw_text: str
@@ -99,6 +126,7 @@ class OCRResult(BaseModel):
     crosscheck_results: Dict[str, Any]
     penalties: Dict[str, float] = Field(default_factory=dict)
     match_score: float = 1.0
+    field_candidates: List[FieldCandidate] = Field(default_factory=list)
 
 
 class DuplicateResult(BaseModel):
@@ -113,6 +141,8 @@ class FraudFeatureVector(BaseModel):
     case_id: str
     features: Dict[str, float]
     explanation_fields: Dict[str, Any]
+    # Float64 row in FEATURE_SCHEMA order (NaN = not computed); kept out of the JSON
+    _row: Any = PrivateAttr(default=None)
 
 
 class FraudScoreResult(BaseModel):
@@ -133,12 +163,24 @@ class ScoreBreakdown(BaseModel):
     xgboost: FraudScoreResult
 
 
-class ScoreResponse(BaseModel):
+ScoreView = Literal["summary", "full", "audit"]
+
+
+class ScoreSummary(BaseModel):
+    """The decision alone (``view=summary``), for clients that only route on the tier."""
+
     case_id: str
-    scores: ScoreBreakdown
     final_risk_score: float
     risk_tier: Literal["auto-approve", "officer-review", "video-verify"]
     routing_decision: str
+    config_version: Optional[str] = Field(None, description="Config snapshot the case was scored with")
+
+
+class ScoreResponse(ScoreSummary):
+    """``view=full`` carries each layer once in ``scores``; ``view=audit`` also
+    repeats them in ``full_explanation`` for the audit trail."""
+
+    scores: ScoreBreakdown
     full_explanation: Dict[str, Any]
 
 
@@ -146,6 +188,67 @@ class WeightUpdateRequest(BaseModel):
     weights: Dict[str, float]
 
 
+class WeightSimulationRequest(WeightUpdateRequest):
+    """Weights (and optionally thresholds) to try against the recorded cases."""
+
+    thresholds: Optional[Dict[str, int]] = None
+    sample: int = Field(20, ge=0, le=1000, description="Moved cases to list")
+
+
+class TierMove(BaseModel):
+    case_id: str
+    recorded_score: float
+    simulated_score: float
+    recorded_tier: Literal["auto-approve", "officer-review", "video-verify"]
+    simulated_tier: Literal["auto-approve", "officer-review", "video-verify"]
+
+
+class WeightSimulationResponse(BaseModel):
+    """How the recorded cases would be re-tiered; ``migration[i][j]`` counts
+    cases moving from ``tiers[i]`` to ``tiers[j]``."""
+
+    cases: int
+    changed: int
+    weights: Dict[str, float]
+    thresholds: Dict[str, int]
+    tiers: List[str]
+    migration: List[List[int]]
+    recorded_counts: Dict[str, int]
+    simulated_counts: Dict[str, int]
+    mean_score_delta: float
+    moved: List[TierMove]
+    elapsed_seconds: float
+
+
+class BatchScoreItem(BaseModel):
+    """One NDJSON line of ``/cases/score:batch``."""
+
+    index: int
+    case_id: Optional[str] = None
+    status: Literal["ok", "error"]
+    result: Optional[ScoreResponse | ScoreSummary] = None
+    error: Optional[str] = None
+
+
+class ScoreJob(BaseModel):
+    """Status of an asynchronous scoring job."""
+
+    job_id: str
+    case_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    callback_url: Optional[str] = None
+    callback_status: Optional[str] = None
+    result: Optional[ScoreResponse] = None
+    error: Optional[str] = None
+
+
+class ModelPinRequest(BaseModel):
+    version: str = Field(..., min_length=1)
+
+
 class HealthResponse(BaseModel):
     status: str
     version: str
@@ -3,19 +3,44 @@
 from .quality import ImageQualityAnalyzer
 from .object_detection import ObjectDetectionService
 from .ocr_processing import DocumentOCRService
+from .ocr_providers import (
+    GoogleVisionProvider,
+    NullOCRProvider,
+    OCRProvider,
+    OCRProviderError,
+    TesseractProvider,
+    VisionBatchClient,
+    VisionError,
+)
 from .hashing import DuplicateDetector
 from .feature_engineering import FeatureEngineer
 from .fraud_model import FraudScoringService
 from .aggregation import RiskAggregator
 from .pipeline import VidyaAIPipeline
+from .jobs import CallbackRejectedError, JobQueue, QueueFullError
+from .model_registry import ModelRegistry, ModelRegistryError
+from .config_watcher import ConfigWatcher
 
 __all__ = [
     "ImageQualityAnalyzer",
     "ObjectDetectionService",
     "DocumentOCRService",
+    "GoogleVisionProvider",
+    "NullOCRProvider",
+    "OCRProvider",
+    "OCRProviderError",
+    "TesseractProvider",
+    "VisionBatchClient",
+    "VisionError",
     "DuplicateDetector",
     "FeatureEngineer",
     "FraudScoringService",
     "RiskAggregator",
     "VidyaAIPipeline",
+    "JobQueue",
+    "QueueFullError",
+    "CallbackRejectedError",
+    "ConfigWatcher",
+    "ModelRegistry",
+    "ModelRegistryError",
 ]
@@ -3,7 +3,9 @@
 from __future__ import annotations
 
 from statistics import mean
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
 from ..config import ThresholdConfig, WeightConfig
 from ..schemas import (
@@ -14,6 +16,37 @@ from ..schemas import (
     OCRResult,
 )
 
+# Column order of component rows, paired with the weight applied to each
+COMPONENTS: Tuple[str, ...] = ("image_quality", "asset_match", "ocr", "duplicates", "fraud")
+_WEIGHT_FIELDS: Tuple[str, ...] = (
+    "image_quality_weight",
+    "asset_match_weight",
+    "ocr_match_weight",
+    "duplicate_weight",
+    "fraud_score_weight",
+)
+# Tier codes are positions in this tuple, from least to most scrutiny
+RISK_TIERS: Tuple[str, ...] = ("auto-approve", "officer-review", "video-verify")
+
+
+def tier_migration(before: np.ndarray, after: np.ndarray) -> np.ndarray:
+    """Count cases per (old tier, new tier) pair; rows are the old tier."""
+
+    tiers = len(RISK_TIERS)
+    pairs = before.astype(np.intp) * tiers + after.astype(np.intp)
+    return np.bincount(pairs, minlength=tiers * tiers).reshape(tiers, tiers)
+
+
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """``round(value, 2)`` for an array, matching Python's rounding of exact halves."""
+
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    # np.round goes through value * 100, which lands on .5 for some values Python rounds the other way
+    ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded[ties] = [round(value, 2) for value in values[ties].tolist()]
+    return rounded
+
 
 class RiskAggregator:
     """Combines layer scores into a final risk score and routing decision."""
@@ -32,18 +65,24 @@ class RiskAggregator:
         ocr_results: List[OCRResult],
         duplicates: List[DuplicateResult],
         fraud_score: FraudScoreResult,
+        weights: Optional[WeightConfig] = None,
+        thresholds: Optional[ThresholdConfig] = None,
     ) -> Dict[str, float | str]:
+        """Score one case; ``weights``/``thresholds`` (a case's config snapshot) default to the aggregator's."""
+
+        # Read once, so a concurrent update_weights cannot mix two weight vectors in one score
+        weights = weights or self.weights
         components = self._components(quality, detection, ocr_results, duplicates, fraud_score)
-        total_weight = self.weights.total()
+        total_weight = weights.total()
         weighted_sum = (
-            self.weights.image_quality_weight * components["image_quality"]
-            + self.weights.asset_match_weight * components["asset_match"]
-            + self.weights.ocr_match_weight * components["ocr"]
-            + self.weights.duplicate_weight * components["duplicates"]
-            + self.weights.fraud_score_weight * components["fraud"]
+            weights.image_quality_weight * components["image_quality"]
+            + weights.asset_match_weight * components["asset_match"]
+            + weights.ocr_match_weight * components["ocr"]
+            + weights.duplicate_weight * components["duplicates"]
+            + weights.fraud_score_weight * components["fraud"]
         )
         final_score = round(weighted_sum / total_weight, 2)
-        risk_tier = self._risk_tier(final_score)
+        risk_tier = self._risk_tier(final_score, thresholds or self.thresholds)
 
         return {
             "final_risk_score": final_score,
@@ -52,6 +91,28 @@ class RiskAggregator:
             "components": components,
         }
 
+    def score_many(self, components: np.ndarray, weights: Optional[WeightConfig] = None) -> np.ndarray:
+        """Final scores of a ``(cases, COMPONENTS)`` matrix in one vectorised pass.
+
+        The weighted sum is accumulated in the same order as ``aggregate``,
+        so the current weights reproduce the recorded scores.
+        """
+
+        weights = weights or self.weights
+        weighted = np.zeros(len(components), dtype=np.float64)
+        for column, field in enumerate(_WEIGHT_FIELDS):
+            weighted = weighted + getattr(weights, field) * components[:, column]
+        return _round_cents(weighted / weights.total())
+
+    def tier_many(self, scores: np.ndarray, thresholds: Optional[ThresholdConfig] = None) -> np.ndarray:
+        """``RISK_TIERS`` codes for an array of final scores."""
+
+        thresholds = thresholds or self.thresholds
+        tiers = np.full(len(scores), RISK_TIERS.index("video-verify"), dtype=np.int8)
+        tiers[scores <= thresholds.officer_review_threshold] = RISK_TIERS.index("officer-review")
+        tiers[scores <= thresholds.auto_approve_threshold] = RISK_TIERS.index("auto-approve")
+        return tiers
+
     def _components(
         self,
         quality: List[ImageQualityResult],
@@ -83,10 +144,11 @@ class RiskAggregator:
             "fraud": fraud_risk,
         }
 
-    def _risk_tier(self, final_score: float) -> str:
-        if final_score <= self.thresholds.auto_approve_threshold:
+    def _risk_tier(self, final_score: float, thresholds: Optional[ThresholdConfig] = None) -> str:
+        thresholds = thresholds or self.thresholds
+        if final_score <= thresholds.auto_approve_threshold:
             return "auto-approve"
-        if final_score <= self.thresholds.officer_review_threshold:
+        if final_score <= thresholds.officer_review_threshold:
             return "officer-review"
         return "video-verify"
 
@@ -99,4 +161,4 @@ class RiskAggregator:
         return mapping[risk_tier]
 
 
-__all__ = ["RiskAggregator"]
+__all__ = ["COMPONENTS", "RISK_TIERS", "RiskAggregator", "tier_migration"]
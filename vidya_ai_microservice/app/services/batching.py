@@ -0,0 +1,123 @@
+"""Micro-batching of model calls across concurrent requests."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Generic, List, Sequence, Tuple, TypeVar
+
+ItemType = TypeVar("ItemType")
+ResultType = TypeVar("ResultType")
+
+_STOP = object()
+
+
+class MicroBatcher(Generic[ItemType, ResultType]):
+    """Collects items from many threads and runs them through one batched call.
+
+    A single worker thread owns the handler. It waits for the first queued
+    item, then keeps gathering until ``max_batch_size`` items are queued or
+    ``max_wait_ms`` has passed since the first one arrived, and calls
+    ``handler`` once with the whole batch. The handler must return one
+    result per item, in order; each result is routed back to the future of
+    the caller that submitted it. A handler error fails every item of that
+    batch; a handler that returns an exception instance as an item's result
+    fails only that item.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[ItemType]], Sequence[ResultType]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        name: str = "batcher",
+    ) -> None:
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes: Counter[int] = Counter()
+        self._items = 0
+        self._max_queue_depth = 0
+        self._thread = threading.Thread(target=self._run, name=f"vidya-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: ItemType) -> "Future[ResultType]":
+        future: "Future[ResultType]" = Future()
+        self._queue.put((item, future))
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            with self._lock:
+                self._max_queue_depth = max(self._max_queue_depth, depth)
+        return future
+
+    def __call__(self, item: ItemType) -> ResultType:
+        return self.submit(item).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": batches,
+                "items": self._items,
+                "mean_batch_size": round(self._items / batches, 3) if batches else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+            }
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect(first)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _collect(self, first: Tuple[ItemType, Future]) -> Tuple[List[Tuple[ItemType, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _dispatch(self, batch: List[Tuple[ItemType, Future]]) -> None:
+        live = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+        with self._lock:
+            self._batch_sizes[len(live)] += 1
+            self._items += len(live)
+        try:
+            results = list(self.handler([item for item, _ in live]))
+            if len(results) != len(live):
+                raise RuntimeError(f"Batch handler returned {len(results)} results for {len(live)} items")
+        except BaseException as exc:
+            for _, future in live:
+                future.set_exception(exc)
+            return
+        for (_, future), result in zip(live, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+__all__ = ["MicroBatcher"]
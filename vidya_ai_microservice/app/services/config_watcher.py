@@ -0,0 +1,157 @@
+"""Background watcher that hot-reloads the weight file as versioned snapshots."""
+
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import ConfigSnapshot, WeightConfig
+
+# Fields read only while services are built (worker pools, batchers, OCR and
+# detection backends); a reload records them but they apply after a restart
+_STARTUP_ONLY: Dict[str, Tuple[str, ...]] = {
+    "execution": (
+        "default_stage_workers",
+        "stage_workers",
+        "batch_max_in_flight",
+        "fraud_batch_max_size",
+        "fraud_batch_max_wait_ms",
+    ),
+    # The backends filter boxes with the confidence/IoU thresholds they were built with
+    "detection": (
+        "confidence_threshold",
+        "iou_threshold",
+        "batch_max_size",
+        "batch_max_wait_ms",
+        "backend",
+        "input_size",
+        "onnx_providers",
+        "onnx_threads",
+    ),
+    "ocr": (
+        "provider",
+        "vision_endpoint",
+        "vision_batch_size",
+        "vision_batch_max_bytes",
+        "vision_batch_wait_ms",
+        "vision_images_per_minute",
+        "vision_timeout_seconds",
+        "tesseract_cmd",
+        "tesseract_lang",
+        "tesseract_psm",
+        "local_ocr_workers",
+        "local_ocr_timeout_seconds",
+        "local_ocr_preprocess",
+    ),
+}
+
+
+class ConfigWatcher:
+    """Holds the live ``ConfigSnapshot`` and replaces it when the weight file changes.
+
+    The file is checked every ``poll_seconds`` by modification time and
+    size. A changed file is parsed in full and every section validated
+    before anything is swapped. The new snapshot then replaces the old one
+    with a single reference assignment, so cases already running keep the
+    snapshot they started with. A file that fails to parse is recorded in
+    ``failed`` and the current snapshot stays live. ``update_weights``
+    (the ``PATCH /config/weights`` path) publishes a new version the same
+    way; the next change to the file replaces every section, weights
+    included.
+    """
+
+    def __init__(self, path: Optional[Path], initial: ConfigSnapshot, poll_seconds: float = 5.0) -> None:
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.current = initial
+        self.startup = initial
+        self.failed: Optional[str] = None
+        self.last_checked: Optional[datetime] = None
+        self._signature = self._stat()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.poll_seconds <= 0 or self.path is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch, name="vidya-config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload the file if it changed (or always, with ``force``); True if a new snapshot went live."""
+
+        with self._lock:
+            self.last_checked = datetime.utcnow()
+            signature = self._stat()
+            if signature == self._signature and not force:
+                return False
+            self._signature = signature
+            if signature is None:
+                self.failed = f"{self.path} is missing"
+                return False
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8"))  # type: ignore[union-attr]
+                candidate = ConfigSnapshot.from_raw(raw, version=self.current.version + 1, source="file")
+            except (OSError, ValueError, TypeError) as exc:
+                self.failed = str(exc)
+                return False
+            self.failed = None
+            if candidate.digest == self.current.digest:
+                return False
+            self.current = candidate
+            return True
+
+    def update_weights(self, weights: WeightConfig) -> ConfigSnapshot:
+        with self._lock:
+            self.current = self.current.evolve("api", weights=weights)
+            return self.current
+
+    def restart_required(self) -> List[str]:
+        """Sections whose startup-only fields differ from the ones the services were built with."""
+
+        current, startup = self.current, self.startup
+        return [
+            key
+            for key, fields in _STARTUP_ONLY.items()
+            if any(getattr(getattr(current, key), name) != getattr(getattr(startup, key), name) for name in fields)
+        ]
+
+    def status(self) -> Dict[str, Any]:
+        snapshot = self.current
+        return {
+            "config_version": snapshot.label,
+            "version": snapshot.version,
+            "digest": snapshot.digest,
+            "source": snapshot.source,
+            "loaded_at": snapshot.loaded_at.isoformat(),
+            "path": str(self.path) if self.path else None,
+            "failed": self.failed,
+            "last_checked": self.last_checked.isoformat() if self.last_checked else None,
+            "restart_required": self.restart_required(),
+        }
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        if self.path is None:
+            return None
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.poll_seconds):
+            self.refresh()
+
+
+__all__ = ["ConfigWatcher"]
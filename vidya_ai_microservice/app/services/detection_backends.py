@@ -0,0 +1,251 @@
+"""Interchangeable inference backends for the object detection layer.
+
+``UltralyticsBackend`` wraps the PyTorch ``YOLO`` model. ``OnnxBackend``
+runs a YOLOv8 model exported with ``yolo export format=onnx`` through ONNX
+Runtime, with its own letterbox pre-processing and NMS post-processing, so
+CPU-only nodes never import torch. Both return plain ``Detection`` records
+in original image coordinates.
+"""
+
+from __future__ import annotations
+
+import ast
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import cv2  # type: ignore
+except Exception:  # pragma: no cover - cv2 may be missing
+    cv2 = None
+
+from ..config import DetectionConfig
+from ..utils.lazy import optional_module
+
+# Imported on first model load; ultralytics pulls in torch, which is slow to import
+_ULTRALYTICS = optional_module("ultralytics")
+_ONNXRUNTIME = optional_module("onnxruntime")
+
+_LETTERBOX_FILL = 114
+
+
+@dataclass(frozen=True)
+class Detection:
+    label: str
+    confidence: float
+    bbox: Tuple[float, float, float, float]
+
+
+def letterbox(frame: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """Resize keeping aspect ratio and pad to ``size x size`` (Ultralytics' grey border).
+
+    Returns the padded frame, the scale applied, and the ``(x, y)`` padding
+    needed to map boxes back onto the original image.
+    """
+
+    height, width = frame.shape[:2]
+    scale = min(size / height, size / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    if (new_w, new_h) != (width, height):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (size - new_w) / 2, (size - new_h) / 2
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    padded = cv2.copyMakeBorder(
+        frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(_LETTERBOX_FILL,) * 3
+    )
+    return padded, scale, (float(left), float(top))
+
+
+def to_input_tensor(frames: Sequence[np.ndarray]) -> np.ndarray:
+    """Stack letterboxed BGR frames into a normalised float32 NCHW RGB tensor."""
+
+    batch = np.stack(frames)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """Greedy non-maximum suppression over ``xyxy`` boxes; returns kept indices by score."""
+
+    order = np.argsort(-scores, kind="stable")
+    areas = np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+    keep: List[int] = []
+    while order.size:
+        best = order[0]
+        keep.append(int(best))
+        rest = order[1:]
+        x1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def decode_yolov8(
+    output: np.ndarray,
+    confidence_threshold: float,
+    iou_threshold: float,
+    max_detections: int = 300,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Decode one image's raw YOLOv8 head ``(4 + classes, anchors)`` into boxes.
+
+    Returns ``(boxes_xyxy, scores, class_ids)`` in letterboxed coordinates,
+    after confidence filtering and class-aware NMS.
+    """
+
+    predictions = output.T
+    class_scores = predictions[:, 4:]
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(class_ids)), class_ids]
+    mask = scores >= confidence_threshold
+    if not mask.any():
+        empty = np.zeros((0,), dtype=np.float32)
+        return np.zeros((0, 4), dtype=np.float32), empty, empty.astype(np.int64)
+    xywh, scores, class_ids = predictions[mask, :4], scores[mask], class_ids[mask]
+    boxes = np.empty_like(xywh)
+    boxes[:, :2] = xywh[:, :2] - xywh[:, 2:] / 2
+    boxes[:, 2:] = xywh[:, :2] + xywh[:, 2:] / 2
+    # Offset boxes per class so one NMS pass never suppresses across classes
+    offsets = class_ids[:, None].astype(boxes.dtype) * 7680.0
+    keep = nms(boxes + offsets, scores, iou_threshold)[:max_detections]
+    return boxes[keep], scores[keep], class_ids[keep]
+
+
+class UltralyticsBackend:
+    """PyTorch YOLO via ``ultralytics``."""
+
+    name = "yolov8"
+
+    def __init__(self, model_path: Path, config: DetectionConfig) -> None:
+        self.config = config
+        self.model = _ULTRALYTICS.load().YOLO(str(model_path))  # type: ignore[union-attr]
+        self.names: Dict[int, str] = dict(self.model.names)
+
+    def predict(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        results = self.model.predict(
+            source=frames,
+            verbose=False,
+            conf=self.config.confidence_threshold,
+            iou=self.config.iou_threshold,
+            imgsz=self.config.input_size,
+        )
+        batch: List[List[Detection]] = []
+        for result in results:
+            detections: List[Detection] = []
+            for box in result.boxes if result.boxes is not None else []:
+                detections.append(
+                    Detection(
+                        label=self.names.get(int(box.cls[0]), "object"),
+                        confidence=float(box.conf[0]),
+                        bbox=tuple(float(value) for value in box.xyxy[0].tolist()),  # type: ignore[arg-type]
+                    )
+                )
+            batch.append(detections)
+        return batch
+
+
+class OnnxBackend:
+    """Exported YOLOv8 on ONNX Runtime (CPU by default, OpenVINO via providers)."""
+
+    name = "yolov8-onnx"
+
+    def __init__(self, model_path: Path, config: DetectionConfig) -> None:
+        self.config = config
+        ort = _ONNXRUNTIME.load()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if config.onnx_threads:
+            options.intra_op_num_threads = config.onnx_threads
+        available = set(ort.get_available_providers())
+        providers = [provider for provider in config.onnx_providers if provider in available]
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=providers or ["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch_dim, _, height, _ = model_input.shape
+        self.input_size = height if isinstance(height, int) else config.input_size
+        # Exports with a fixed batch of 1 are fed frame by frame
+        self.dynamic_batch = not isinstance(batch_dim, int)
+        self.names = self._read_names(self.session.get_modelmeta().custom_metadata_map)
+
+    @staticmethod
+    def _read_names(metadata: Dict[str, str]) -> Dict[int, str]:
+        try:
+            names = ast.literal_eval(metadata.get("names", "{}"))
+        except (ValueError, SyntaxError):
+            return {}
+        return {int(key): str(value) for key, value in names.items()} if isinstance(names, dict) else {}
+
+    def predict(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        prepared = [letterbox(frame, self.input_size) for frame in frames]
+        if self.dynamic_batch:
+            outputs = list(self.session.run(None, {self.input_name: to_input_tensor([p[0] for p in prepared])})[0])
+        else:
+            outputs = [self.session.run(None, {self.input_name: to_input_tensor([p[0]])})[0][0] for p in prepared]
+        return [
+            self._detections(output, frame.shape[:2], scale, pad)
+            for output, frame, (_, scale, pad) in zip(outputs, frames, prepared)
+        ]
+
+    def _detections(
+        self,
+        output: np.ndarray,
+        shape: Tuple[int, int],
+        scale: float,
+        pad: Tuple[float, float],
+    ) -> List[Detection]:
+        boxes, scores, class_ids = decode_yolov8(
+            output, self.config.confidence_threshold, self.config.iou_threshold
+        )
+        height, width = shape
+        boxes = (boxes - np.array([pad[0], pad[1], pad[0], pad[1]], dtype=boxes.dtype)) / scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        return [
+            Detection(
+                label=self.names.get(int(class_id), "object"),
+                confidence=float(score),
+                bbox=tuple(float(value) for value in box),  # type: ignore[arg-type]
+            )
+            for box, score, class_id in zip(boxes, scores, class_ids)
+        ]
+
+
+def load_backend(model_path: Optional[Path], config: DetectionConfig):
+    """Build the configured backend, or ``None`` when the model or runtime is unavailable.
+
+    ``backend="auto"`` picks ONNX Runtime for ``.onnx`` files and ultralytics
+    otherwise.
+    """
+
+    if not model_path or not Path(model_path).exists():
+        return None
+    backend = config.backend
+    if backend == "auto":
+        backend = "onnx" if Path(model_path).suffix.lower() == ".onnx" else "ultralytics"
+    try:
+        if backend == "onnx" and cv2 is not None and _ONNXRUNTIME.load() is not None:
+            return OnnxBackend(Path(model_path), config)
+        if backend == "ultralytics" and _ULTRALYTICS.load() is not None:
+            return UltralyticsBackend(Path(model_path), config)
+    except Exception:
+        return None
+    return None
+
+
+__all__ = [
+    "Detection",
+    "OnnxBackend",
+    "UltralyticsBackend",
+    "decode_yolov8",
+    "letterbox",
+    "load_backend",
+    "nms",
+    "to_input_tensor",
+]
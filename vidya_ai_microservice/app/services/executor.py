@@ -0,0 +1,79 @@
+"""Bounded, per-stage concurrent execution for pipeline layers."""
+
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, TypeVar
+
+from ..config import ExecutionConfig
+
+ItemType = TypeVar("ItemType")
+ResultType = TypeVar("ResultType")
+
+
+class StageExecutor:
+    """Fans pipeline work out to one bounded thread pool per stage.
+
+    The independent layers (quality, detection, OCR, duplicates) submit their
+    per-item work up front and the pipeline joins on the futures before
+    feature engineering, so case latency tracks the slowest stage rather than
+    the sum of all stages. Separate pools keep a slow stage (e.g. a
+    single-worker YOLO model) from starving the others, and a stage configured
+    with zero workers runs inline on the calling thread.
+    """
+
+    def __init__(self, config: ExecutionConfig) -> None:
+        self.config = config
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        self._lock = Lock()
+
+    def submit(self, stage: str, fn: Callable[..., ResultType], *args, **kwargs) -> Future:
+        pool = self._pool(stage)
+        if pool is None:
+            return _completed(fn, *args, **kwargs)
+        return pool.submit(fn, *args, **kwargs)
+
+    def map(
+        self,
+        stage: str,
+        fn: Callable[[ItemType], ResultType],
+        items: Iterable[ItemType],
+    ) -> List[Future]:
+        return [self.submit(stage, fn, item) for item in items]
+
+    @staticmethod
+    def gather(futures: List[Future]) -> List:
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+    def _pool(self, stage: str) -> ThreadPoolExecutor | None:
+        pool = self._pools.get(stage)
+        if pool is not None:
+            return pool
+        workers = self.config.workers_for(stage)
+        if workers == 0:
+            return None
+        with self._lock:
+            pool = self._pools.get(stage)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"vidya-{stage}")
+                self._pools[stage] = pool
+        return pool
+
+
+def _completed(fn: Callable[..., ResultType], *args, **kwargs) -> Future:
+    future: Future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except BaseException as exc:  # pragma: no cover - propagated through result()
+        future.set_exception(exc)
+    return future
+
+
+__all__ = ["StageExecutor"]
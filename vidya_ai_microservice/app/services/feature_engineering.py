@@ -2,12 +2,9 @@
 
 from __future__ import annotations
 
-from datetime import datetime
-from statistics import mean
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
-import pandas as pd
 
 from ..config import FraudRuleConfig
 from ..schemas import (
@@ -20,13 +17,84 @@ from ..schemas import (
     OCRResult,
 )
 from ..utils.geospatial import gps_deviation
-from ..utils.state import LocalStateStore
+from ..utils.state import StateStore
+
+
+# Fixed column order of every feature row; also the order for models saved without feature names
+FEATURE_SCHEMA: Tuple[str, ...] = (
+    "avg_quality_score",
+    "low_quality_ratio",
+    "asset_match_rate",
+    "asset_declared",
+    "avg_ocr_confidence",
+    "vendor_match_rate",
+    "amount_match_rate",
+    "duplicate_ratio",
+    "gps_deviation_km",
+    "gps_over_threshold",
+    "device_usage_count",
+    "submission_hour_std",
+    "off_hours_flag",
+    "submission_hour",
+    "historical_rejections",
+    "historical_flags",
+    "total_cases",
+    "rapid_submission_ratio",
+)
+FEATURE_INDEX: Dict[str, int] = {name: index for index, name in enumerate(FEATURE_SCHEMA)}
+
+_EXPLANATION_FIELDS = (
+    ("quality_summary", FEATURE_INDEX["avg_quality_score"]),
+    ("detection_match", FEATURE_INDEX["asset_match_rate"]),
+    ("vendor_match", FEATURE_INDEX["vendor_match_rate"]),
+    ("duplicate_ratio", FEATURE_INDEX["duplicate_ratio"]),
+    ("gps_deviation_km", FEATURE_INDEX["gps_deviation_km"]),
+)
+
+
+def feature_row(vector: FraudFeatureVector) -> np.ndarray:
+    """The vector's ``FEATURE_SCHEMA`` row, rebuilt from ``features`` if it was not engineered here."""
+
+    row = vector._row
+    if row is None:
+        features = vector.features
+        row = np.array([features.get(name, np.nan) for name in FEATURE_SCHEMA], dtype=np.float64)
+    return row
+
+
+def build_feature_matrix(
+    vectors: Sequence[FraudFeatureVector],
+    feature_order: Optional[Sequence[str]] = None,
+) -> np.ndarray:
+    """Stack feature rows into a float32 ``(cases, features)`` matrix for batched inference.
+
+    Rows are stacked once in ``FEATURE_SCHEMA`` order and columns are then
+    gathered in ``feature_order`` (a model's own order). Features the
+    schema does not know, and features not computed for a case, are NaN,
+    which XGBoost treats as missing.
+    """
+
+    order = tuple(feature_order or FEATURE_SCHEMA)
+    if not vectors:
+        return np.empty((0, len(order)), dtype=np.float32)
+    rows = np.stack([feature_row(vector) for vector in vectors]).astype(np.float32, copy=False)
+    if order == FEATURE_SCHEMA:
+        return rows
+    # One spare NaN column stands in for names outside the schema
+    padded = np.concatenate([rows, np.full((len(rows), 1), np.nan, dtype=np.float32)], axis=1)
+    columns = [FEATURE_INDEX.get(name, len(FEATURE_SCHEMA)) for name in order]
+    return padded[:, columns]
 
 
 class FeatureEngineer:
-    """Converts raw evidence outputs into ML-ready features."""
+    """Converts raw evidence outputs into ML-ready features.
+
+    Each layer writes its features straight into one preallocated float64
+    row in ``FEATURE_SCHEMA`` order; features a layer has nothing to say
+    about stay NaN and are left out of the ``features`` mapping.
+    """
 
-    def __init__(self, state_store: LocalStateStore, rules: FraudRuleConfig):
+    def __init__(self, state_store: StateStore, rules: FraudRuleConfig):
         self.state = state_store
         self.rules = rules
 
@@ -37,65 +105,61 @@ class FeatureEngineer:
         detection: List[ObjectDetectionResult],
         ocr_results: List[OCRResult],
         duplicates: List[DuplicateResult],
+        rules: Optional[FraudRuleConfig] = None,
     ) -> FraudFeatureVector:
         metadata = package.metadata
-        features: Dict[str, float] = {}
+        row = np.full(len(FEATURE_SCHEMA), np.nan, dtype=np.float64)
 
-        features.update(self._quality_features(quality))
-        features.update(self._detection_features(detection, metadata))
-        features.update(self._ocr_features(ocr_results))
-        features.update(self._duplicate_features(duplicates))
-        features.update(self._submission_features(package))
-        features.update(self._history_features(metadata))
+        self._quality_features(quality, row)
+        self._detection_features(detection, metadata, row)
+        self._ocr_features(ocr_results, row)
+        self._duplicate_features(duplicates, row)
+        self._submission_features(package, row, rules or self.rules)
+        self._history_features(metadata, row)
 
+        present = ~np.isnan(row)
+        features = {FEATURE_SCHEMA[index]: float(row[index]) for index in np.flatnonzero(present)}
         explanation = {
-            "quality_summary": features.get("avg_quality_score"),
-            "detection_match": features.get("asset_match_rate"),
-            "vendor_match": features.get("vendor_match_rate"),
-            "duplicate_ratio": features.get("duplicate_ratio"),
-            "gps_deviation_km": features.get("gps_deviation_km"),
+            name: float(row[index]) if present[index] else None for name, index in _EXPLANATION_FIELDS
         }
 
-        return FraudFeatureVector(case_id=package.case_id, features=features, explanation_fields=explanation)
+        vector = FraudFeatureVector(case_id=package.case_id, features=features, explanation_fields=explanation)
+        vector._row = row
+        return vector
 
-    def _quality_features(self, results: List[ImageQualityResult]) -> Dict[str, float]:
+    def _quality_features(self, results: List[ImageQualityResult], row: np.ndarray) -> None:
         if not results:
-            return {"avg_quality_score": 0.5}
-        df = pd.DataFrame([r.model_dump() for r in results])
-        return {
-            "avg_quality_score": float(df["quality_score"].mean()),
-            "low_quality_ratio": float((df["quality_score"] < 0.5).mean()),
-        }
+            row[FEATURE_INDEX["avg_quality_score"]] = 0.5
+            return
+        scores = np.fromiter((r.quality_score for r in results), dtype=np.float64, count=len(results))
+        row[FEATURE_INDEX["avg_quality_score"]] = scores.mean()
+        row[FEATURE_INDEX["low_quality_ratio"]] = (scores < 0.5).mean()
 
-    def _detection_features(self, results: List[ObjectDetectionResult], metadata: Metadata) -> Dict[str, float]:
+    def _detection_features(self, results: List[ObjectDetectionResult], metadata: Metadata, row: np.ndarray) -> None:
         if not results:
-            return {"asset_match_rate": 0.5}
-        match_scores = [r.match_score for r in results]
-        match_rate = float(np.mean(match_scores))
-        return {
-            "asset_match_rate": match_rate,
-            "asset_declared": 1.0 if metadata.declared_asset_type else 0.0,
-        }
+            row[FEATURE_INDEX["asset_match_rate"]] = 0.5
+            return
+        row[FEATURE_INDEX["asset_match_rate"]] = np.mean([r.match_score for r in results])
+        row[FEATURE_INDEX["asset_declared"]] = 1.0 if metadata.declared_asset_type else 0.0
 
-    def _ocr_features(self, results: List[OCRResult]) -> Dict[str, float]:
+    def _ocr_features(self, results: List[OCRResult], row: np.ndarray) -> None:
         if not results:
-            return {"avg_ocr_confidence": 0.0, "vendor_match_rate": 0.0, "amount_match_rate": 0.0}
-        vendor_matches = [r.crosscheck_results.get("vendor_match", False) for r in results]
-        amount_matches = [r.crosscheck_results.get("amount_match", False) for r in results]
-        confidences = [r.ocr_confidence for r in results]
-        return {
-            "avg_ocr_confidence": float(mean(confidences)),
-            "vendor_match_rate": float(np.mean(vendor_matches)),
-            "amount_match_rate": float(np.mean(amount_matches)),
-        }
+            row[FEATURE_INDEX["avg_ocr_confidence"]] = 0.0
+            row[FEATURE_INDEX["vendor_match_rate"]] = 0.0
+            row[FEATURE_INDEX["amount_match_rate"]] = 0.0
+            return
+        row[FEATURE_INDEX["avg_ocr_confidence"]] = np.mean([r.ocr_confidence for r in results])
+        row[FEATURE_INDEX["vendor_match_rate"]] = np.mean(
+            [bool(r.crosscheck_results.get("vendor_match", False)) for r in results]
+        )
+        row[FEATURE_INDEX["amount_match_rate"]] = np.mean(
+            [bool(r.crosscheck_results.get("amount_match", False)) for r in results]
+        )
 
-    def _duplicate_features(self, results: List[DuplicateResult]) -> Dict[str, float]:
-        if not results:
-            return {"duplicate_ratio": 0.0}
-        duplicates = [r.duplicate_found for r in results]
-        return {"duplicate_ratio": float(np.mean(duplicates))}
+    def _duplicate_features(self, results: List[DuplicateResult], row: np.ndarray) -> None:
+        row[FEATURE_INDEX["duplicate_ratio"]] = np.mean([r.duplicate_found for r in results]) if results else 0.0
 
-    def _submission_features(self, package: EvidencePackage) -> Dict[str, float]:
+    def _submission_features(self, package: EvidencePackage, row: np.ndarray, rules: FraudRuleConfig) -> None:
         metadata = package.metadata
         gps_delta = gps_deviation(metadata.declared_asset_location, metadata.submission_location)
         device_use = float(
@@ -104,46 +168,27 @@ class FeatureEngineer:
         submission_hours = [t.hour for t in (package.timestamps or [])]
         if not submission_hours:
             submission_hours = [metadata.submission_timestamp.hour]
-        hour_std = float(np.std(submission_hours)) if len(submission_hours) > 1 else 0.0
         gps_value = gps_delta if gps_delta is not None else 0.0
-        gps_threshold_breach = 1.0 if gps_value > self.rules.gps_threshold_km else 0.0
         hour = metadata.submission_timestamp.hour
-        off_hours_flag = (
+        row[FEATURE_INDEX["gps_deviation_km"]] = gps_value
+        row[FEATURE_INDEX["gps_over_threshold"]] = 1.0 if gps_value > rules.gps_threshold_km else 0.0
+        row[FEATURE_INDEX["device_usage_count"]] = device_use
+        row[FEATURE_INDEX["submission_hour_std"]] = np.std(submission_hours) if len(submission_hours) > 1 else 0.0
+        row[FEATURE_INDEX["off_hours_flag"]] = (
             1.0
-            if hour < self.rules.off_hours_start or hour > self.rules.off_hours_end
+            if hour < rules.off_hours_start or hour > rules.off_hours_end
             else 0.0
         )
-        return {
-            "gps_deviation_km": gps_value,
-            "gps_over_threshold": gps_threshold_breach,
-            "device_usage_count": device_use,
-            "submission_hour_std": hour_std,
-            "off_hours_flag": off_hours_flag,
-            "submission_hour": float(hour),
-        }
+        row[FEATURE_INDEX["submission_hour"]] = hour
 
-    def _history_features(self, metadata: Metadata) -> Dict[str, float]:
+    def _history_features(self, metadata: Metadata, row: np.ndarray) -> None:
         history = metadata.applicant_history
-        timestamps = self.state.record_case_timestamp(metadata.applicant_id, metadata.submission_timestamp.isoformat())
-        rapid_submissions = self._rapid_submission_ratio(timestamps)
-        return {
-            "historical_rejections": float(history.previous_rejections),
-            "historical_flags": float(history.fraudulent_flags),
-            "total_cases": float(history.submitted_cases),
-            "rapid_submission_ratio": rapid_submissions,
-        }
-
-    def _rapid_submission_ratio(self, timestamps: List[str]) -> float:
-        if len(timestamps) < 2:
-            return 0.0
-        parsed = sorted(datetime.fromisoformat(ts) for ts in timestamps)
-        intervals = [
-            (parsed[idx] - parsed[idx - 1]).total_seconds() / 3600 for idx in range(1, len(parsed))
-        ]
-        if not intervals:
-            return 0.0
-        rapid = [1 for interval in intervals if interval < 2]
-        return float(len(rapid) / len(intervals))
+        row[FEATURE_INDEX["historical_rejections"]] = history.previous_rejections
+        row[FEATURE_INDEX["historical_flags"]] = history.fraudulent_flags
+        row[FEATURE_INDEX["total_cases"]] = history.submitted_cases
+        row[FEATURE_INDEX["rapid_submission_ratio"]] = self.state.record_submission(
+            metadata.applicant_id, metadata.submission_timestamp
+        )
 
 
-__all__ = ["FeatureEngineer"]
+__all__ = ["FEATURE_INDEX", "FEATURE_SCHEMA", "FeatureEngineer", "build_feature_matrix", "feature_row"]
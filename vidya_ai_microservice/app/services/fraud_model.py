@@ -2,55 +2,150 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 
-try:
-    import xgboost as xgb  # type: ignore[import]
-except Exception:  # pragma: no cover - optional dependency
-    xgb = None
-
 from ..config import FraudRuleConfig
 from ..schemas import FraudFeatureVector, FraudScoreResult
+from ..utils.lazy import optional_module
+from .feature_engineering import FEATURE_SCHEMA, build_feature_matrix
+
+_XGBOOST = optional_module("xgboost")
+
+
+# Column order for models saved without feature names
+DEFAULT_FEATURE_ORDER: Tuple[str, ...] = FEATURE_SCHEMA
+
+
+@dataclass(frozen=True)
+class LoadedFraudModel:
+    """A booster together with the schema fixed when it was loaded."""
+
+    booster: object | None
+    version: str
+    feature_order: Tuple[str, ...] = DEFAULT_FEATURE_ORDER
+    importance: Dict[str, float] = field(default_factory=dict)
+    path: Optional[Path] = None
+
+
+BASELINE_MODEL = LoadedFraudModel(booster=None, version="baseline")
+
+
+def load_fraud_model(path: Path) -> LoadedFraudModel:
+    """Load a saved booster and fix its feature order and importances."""
+
+    xgb = _XGBOOST.load()
+    if xgb is None:
+        raise RuntimeError("xgboost is not installed")
+    booster = xgb.Booster()
+    booster.load_model(str(path))
+    order = tuple(booster.feature_names or DEFAULT_FEATURE_ORDER)
+    # get_score keys are feature names, or f0, f1, ... for models saved without them
+    scores = booster.get_score(importance_type="weight")
+    importance = {name: float(scores.get(name, scores.get(f"f{index}", 0.0))) for index, name in enumerate(order)}
+    return LoadedFraudModel(booster=booster, version=path.stem, feature_order=order, importance=importance, path=path)
 
 
 class FraudScoringService:
-    """Wraps a trained XGBoost model with graceful fallback."""
+    """Wraps a trained XGBoost model with graceful fallback.
+
+    The model's feature order and importances are fixed once at load time;
+    scoring stacks the engineered feature rows into a float32 matrix in that
+    order with ``build_feature_matrix`` (missing features become NaN, which
+    XGBoost treats as missing) and runs a single ``inplace_predict`` over
+    the whole batch. The active model is one immutable ``LoadedFraudModel``
+    that ``swap`` replaces atomically, so each scoring call uses a single
+    consistent model even during a reload.
+    """
 
     def __init__(self, model_dir: Path, rules: FraudRuleConfig):
         self.model_dir = model_dir
         self.rules = rules
-        self.model, self.version = self._load_latest_model()
+        self.active = self._load_latest_model()
+
+    @property
+    def model(self) -> object | None:
+        return self.active.booster
+
+    @property
+    def version(self) -> str:
+        return self.active.version
 
-    def _load_latest_model(self) -> Tuple[object | None, str]:
-        if not xgb:
-            return None, "baseline"
+    @property
+    def feature_order(self) -> Tuple[str, ...]:
+        return self.active.feature_order
+
+    def _load_latest_model(self) -> LoadedFraudModel:
         if not self.model_dir.exists():
-            return None, "baseline"
+            return BASELINE_MODEL
         candidates = sorted(self.model_dir.glob("*.json"))
-        if not candidates:
-            return None, "baseline"
-        latest = candidates[-1]
-        booster = xgb.Booster()
-        booster.load_model(str(latest))
-        return booster, latest.stem
-
-    def score(self, feature_vector: FraudFeatureVector) -> FraudScoreResult:
+        # xgboost is only imported when there is a model to load
+        if not candidates or _XGBOOST.load() is None:
+            return BASELINE_MODEL
+        return load_fraud_model(candidates[-1])
+
+    def swap(self, loaded: LoadedFraudModel) -> LoadedFraudModel:
+        """Make ``loaded`` the active model; returns the one it replaced."""
+
+        previous, self.active = self.active, loaded
+        return previous
+
+    def feature_matrix(
+        self,
+        feature_vectors: Sequence[FraudFeatureVector],
+        feature_order: Optional[Tuple[str, ...]] = None,
+    ) -> np.ndarray:
+        return build_feature_matrix(feature_vectors, feature_order or self.feature_order)
+
+    def score(self, feature_vector: FraudFeatureVector, rules: Optional[FraudRuleConfig] = None) -> FraudScoreResult:
+        return self.score_many([feature_vector], [rules] if rules else None)[0]
+
+    def score_many(
+        self,
+        feature_vectors: Sequence[FraudFeatureVector],
+        rules: Optional[Sequence[Optional[FraudRuleConfig]]] = None,
+    ) -> List[FraudScoreResult]:
+        """Score any number of cases with one model call.
+
+        ``rules`` gives each case's rule penalties (its config snapshot);
+        cases without one use the service's rules.
+        """
+
+        if not feature_vectors:
+            return []
+        case_rules = [rule or self.rules for rule in rules] if rules else [self.rules] * len(feature_vectors)
+        loaded = self.active
+        probabilities: List[float | None] = [None] * len(feature_vectors)
+        if loaded.booster is not None:
+            matrix = self.feature_matrix(feature_vectors, loaded.feature_order)
+            predictions = np.asarray(loaded.booster.inplace_predict(matrix))  # type: ignore[attr-defined]
+            probabilities = [float(prob) for prob in predictions.reshape(len(feature_vectors), -1)[:, -1]]
+        return [
+            self._result(vector, prob, loaded, rule)
+            for vector, prob, rule in zip(feature_vectors, probabilities, case_rules)
+        ]
+
+    def _result(
+        self,
+        feature_vector: FraudFeatureVector,
+        prob: float | None,
+        loaded: LoadedFraudModel,
+        rules: FraudRuleConfig,
+    ) -> FraudScoreResult:
         features = feature_vector.features
-        penalties = self._rule_penalties(features)
+        penalties = self._rule_penalties(features, rules)
         penalty_total = sum(penalties.values())
 
-        if self.model and xgb:
-            dmatrix = xgb.DMatrix(np.array([list(features.values())]), feature_names=list(features.keys()))
-            prob = float(self.model.predict(dmatrix)[0])
+        if prob is not None:
             base_score = prob * 100
-            importance = {feat: float(weight) for feat, weight in zip(features.keys(), self.model.get_score().values())}
+            importance = dict(loaded.importance)
             fraud_points = float(np.clip(base_score + penalty_total, 0, 100))
             return FraudScoreResult(
                 fraud_score=round(fraud_points, 2),
-                model_version=self.version,
+                model_version=loaded.version,
                 feature_importance=importance,
                 rule_penalties=penalties,
             )
@@ -59,23 +154,23 @@ class FraudScoringService:
         importance = {feature: value for feature, value in penalties.items()}
         return FraudScoreResult(
             fraud_score=fraud_score,
-            model_version=self.version,
+            model_version=loaded.version,
             feature_importance=importance,
             rule_penalties=penalties,
         )
 
-    def _rule_penalties(self, features: Dict[str, float]) -> Dict[str, float]:
+    def _rule_penalties(self, features: Dict[str, float], rules: FraudRuleConfig) -> Dict[str, float]:
         penalties: Dict[str, float] = {}
-        if features.get("gps_deviation_km", 0.0) > self.rules.gps_threshold_km:
-            penalties["gps_deviation"] = self.rules.gps_penalty
+        if features.get("gps_deviation_km", 0.0) > rules.gps_threshold_km:
+            penalties["gps_deviation"] = rules.gps_penalty
         if features.get("off_hours_flag", 0.0) >= 1.0:
-            penalties["off_hours_submission"] = self.rules.off_hours_penalty
-        if features.get("device_usage_count", 0.0) > self.rules.device_cases_limit:
-            penalties["device_reuse"] = self.rules.device_penalty
+            penalties["off_hours_submission"] = rules.off_hours_penalty
+        if features.get("device_usage_count", 0.0) > rules.device_cases_limit:
+            penalties["device_reuse"] = rules.device_penalty
         history_total = features.get("historical_rejections", 0.0) + features.get("historical_flags", 0.0)
         if history_total > 0:
-            penalties["history_flags"] = self.rules.history_penalty
+            penalties["history_flags"] = rules.history_penalty
         return penalties
 
 
-__all__ = ["FraudScoringService"]
+__all__ = ["BASELINE_MODEL", "DEFAULT_FEATURE_ORDER", "FraudScoringService", "LoadedFraudModel", "load_fraud_model"]
@@ -0,0 +1,305 @@
+"""Near-duplicate search over 64-bit perceptual hashes."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SCOPES = ("applicant", "org", "scheme", "global")
+
+# Popcount of every 16-bit value, used when numpy lacks a native bitwise_count
+_WORD_POPCOUNT = np.array([bin(value).count("1") for value in range(1 << 16)], dtype=np.uint8)
+_bitwise_count = getattr(np, "bitwise_count", None)
+
+# Scopes at or below this size are scanned directly instead of through the chunk tables
+_DIRECT_SCAN_LIMIT = 65536
+
+
+@dataclass(frozen=True)
+class HashMatch:
+    distance: int
+    case_id: Optional[str]
+    evidence_id: str
+    applicant_id: str
+
+
+def hash_to_int(hash_hex: str) -> int:
+    return int(hash_hex, 16) & 0xFFFFFFFFFFFFFFFF
+
+
+def hamming_distances(query: int | np.uint64, hashes: np.ndarray) -> np.ndarray:
+    """Hamming distance from ``query`` to every packed hash in one vectorised pass."""
+
+    xored = np.bitwise_xor(hashes, np.uint64(query))
+    if _bitwise_count is not None:
+        return _bitwise_count(xored)
+    words = xored.view(np.uint16).reshape(-1, 4)
+    return _WORD_POPCOUNT[words].sum(axis=1, dtype=np.uint8)
+
+
+def nearest_hash(query: int | np.uint64, hashes: np.ndarray) -> Tuple[int, int]:
+    """Return ``(position, distance)`` of the closest hash, or ``(-1, 64)`` if empty."""
+
+    if not hashes.size:
+        return -1, 64
+    distances = hamming_distances(query, hashes)
+    position = int(np.argmin(distances))
+    return position, int(distances[position])
+
+
+class _ScopeArray:
+    """Contiguous packed hashes (and their index rows) for one scope value."""
+
+    __slots__ = ("hashes", "rows", "size")
+
+    def __init__(self) -> None:
+        self.hashes = np.zeros(8, dtype=np.uint64)
+        self.rows = np.zeros(8, dtype=np.int64)
+        self.size = 0
+
+    def append(self, value: int, row: int) -> None:
+        if self.size == self.hashes.size:
+            self.hashes = np.resize(self.hashes, self.size * 2)
+            self.rows = np.resize(self.rows, self.size * 2)
+        self.hashes[self.size] = value
+        self.rows[self.size] = row
+        self.size += 1
+
+
+class PerceptualHashIndex:
+    """Multi-index hashing (MIH) over packed uint64 perceptual hashes.
+
+    Each hash is split into ``radius + 1`` bit chunks; by the pigeonhole
+    principle any hash within ``radius`` bits of a query agrees with it
+    exactly on at least one chunk. Each chunk keeps a sorted array, so a
+    query is a handful of binary searches plus a popcount over the few
+    candidates, instead of a scan of every stored hash. Rows inserted since
+    the last rebuild sit in a small tail that is scanned directly.
+
+    Rows carry interned applicant/org/scheme codes so radius queries can be
+    restricted to a scope. Each scope value also keeps its own contiguous
+    uint64 array; small scopes (typically one applicant's history) are
+    answered by a single XOR + popcount pass over that array. Re-recording the same ``(applicant_id,
+    evidence_id)`` replaces the previous row, matching the state store.
+    """
+
+    _MAX_CHUNKS = 16
+    _TAIL_LIMIT = 16384
+
+    def __init__(self, radius: int = 5, initial_capacity: int = 1024) -> None:
+        self.radius = max(0, radius)
+        self.num_chunks = min(self.radius + 1, self._MAX_CHUNKS)
+        self._bounds = self._chunk_bounds(self.num_chunks)
+        self._lock = RLock()
+
+        self._size = 0
+        self._hashes = np.zeros(initial_capacity, dtype=np.uint64)
+        self._valid = np.zeros(initial_capacity, dtype=bool)
+        self._scope_codes = {scope: np.zeros(initial_capacity, dtype=np.int64) for scope in SCOPES[:3]}
+        self._codes: Dict[str, Dict[str, int]] = {scope: {} for scope in SCOPES[:3]}
+        self._case_ids: List[Optional[str]] = []
+        self._evidence: List[Tuple[str, str]] = []
+        self._rows: Dict[Tuple[str, str], int] = {}
+        self._scoped: Dict[Tuple[str, int], _ScopeArray] = {}
+
+        self._built = 0
+        self._sorted: List[np.ndarray] = []
+        self._order: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(
+        self,
+        hash_hex: str,
+        applicant_id: str,
+        evidence_id: str,
+        case_id: Optional[str],
+        org_id: Optional[str] = None,
+        scheme_code: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._insert(hash_hex, applicant_id, evidence_id, case_id, org_id, scheme_code)
+            if self._size - self._built > self._TAIL_LIMIT:
+                self._rebuild()
+
+    def extend(self, records: Iterable[Dict[str, Optional[str]]]) -> None:
+        """Bulk-load state store records, building the chunk tables once at the end."""
+
+        with self._lock:
+            for record in records:
+                if record.get("hash"):
+                    self._insert(
+                        record["hash"],  # type: ignore[arg-type]
+                        record["applicant_id"],  # type: ignore[arg-type]
+                        record["evidence_id"],  # type: ignore[arg-type]
+                        record.get("case_id"),
+                        record.get("org_id"),
+                        record.get("scheme_code"),
+                    )
+            self._rebuild()
+
+    def merge(self, records: Iterable[Dict[str, Optional[str]]]) -> int:
+        """Insert records the index does not already hold unchanged; returns how many were added.
+
+        Used for rows other processes stored, where the batch may also echo
+        this process's own writes.
+        """
+
+        added = 0
+        with self._lock:
+            for record in records:
+                hash_hex = record.get("hash")
+                if not hash_hex:
+                    continue
+                key = (record["applicant_id"], record["evidence_id"])
+                row = self._rows.get(key)
+                if (
+                    row is not None
+                    and int(self._hashes[row]) == hash_to_int(hash_hex)
+                    and self._case_ids[row] == record.get("case_id")
+                ):
+                    continue
+                self._insert(
+                    hash_hex, key[0], key[1], record.get("case_id"), record.get("org_id"), record.get("scheme_code")
+                )
+                added += 1
+            if self._size - self._built > self._TAIL_LIMIT:
+                self._rebuild()
+        return added
+
+    def _insert(
+        self,
+        hash_hex: str,
+        applicant_id: str,
+        evidence_id: str,
+        case_id: Optional[str],
+        org_id: Optional[str],
+        scheme_code: Optional[str],
+    ) -> None:
+        value = hash_to_int(hash_hex)
+        key = (applicant_id, evidence_id)
+        previous = self._rows.get(key)
+        if previous is not None:
+            self._valid[previous] = False
+        row = self._append(value)
+        for scope, scope_value in (("applicant", applicant_id), ("org", org_id), ("scheme", scheme_code)):
+            code = self._code(scope, scope_value)
+            self._scope_codes[scope][row] = code
+            if code >= 0:
+                self._scoped.setdefault((scope, code), _ScopeArray()).append(value, row)
+        self._case_ids.append(case_id)
+        self._evidence.append(key)
+        self._rows[key] = row
+
+    def nearest(
+        self,
+        hash_hex: str,
+        radius: Optional[int] = None,
+        scope: str = "global",
+        scope_value: Optional[str] = None,
+        exclude: Optional[Tuple[str, str, Optional[str]]] = None,
+    ) -> Optional[HashMatch]:
+        """Return the closest stored hash within ``radius`` bits, if any.
+
+        ``scope`` limits matches to rows sharing the applicant, org or
+        scheme given by ``scope_value``. ``exclude`` is an
+        ``(applicant_id, evidence_id, case_id)`` triple whose own earlier row
+        is ignored, so re-scoring a case does not match itself.
+        """
+
+        radius = self.radius if radius is None else radius
+        value = np.uint64(hash_to_int(hash_hex))
+        with self._lock:
+            scoped: Optional[_ScopeArray] = None
+            if scope != "global":
+                code = self._codes[scope].get(scope_value or "")
+                if code is None:
+                    return None
+                scoped = self._scoped.get((scope, code))
+                if scoped is None:
+                    return None
+
+            if scoped is not None and scoped.size <= _DIRECT_SCAN_LIMIT:
+                candidates = scoped.rows[: scoped.size]
+                hashes = scoped.hashes[: scoped.size]
+                keep = self._valid[candidates]
+            else:
+                candidates = self._candidates(value, radius)
+                hashes = self._hashes[candidates]
+                keep = self._valid[candidates]
+                if scope != "global":
+                    keep &= self._scope_codes[scope][candidates] == code
+            if exclude is not None:
+                row = self._rows.get(exclude[:2])
+                if row is not None and self._case_ids[row] == exclude[2]:
+                    keep &= candidates != row
+            if not keep.all():
+                candidates, hashes = candidates[keep], hashes[keep]
+
+            position, distance = nearest_hash(value, hashes)
+            if position < 0 or distance > radius:
+                return None
+            row = int(candidates[position])
+            applicant_id, evidence_id = self._evidence[row]
+            return HashMatch(distance, self._case_ids[row], evidence_id, applicant_id)
+
+    def _candidates(self, value: np.uint64, radius: int) -> np.ndarray:
+        tail = np.arange(self._built, self._size, dtype=np.int64)
+        if radius >= self.num_chunks or not self._built:
+            # Nothing built yet, or the pigeonhole guarantee does not hold for this radius
+            return np.arange(self._size, dtype=np.int64)
+        found = [tail]
+        for index, (shift, mask) in enumerate(self._bounds):
+            chunk = (value >> np.uint64(shift)) & mask
+            keys = self._sorted[index]
+            lo = np.searchsorted(keys, chunk, side="left")
+            hi = np.searchsorted(keys, chunk, side="right")
+            if hi > lo:
+                found.append(self._order[index][lo:hi])
+        return np.unique(np.concatenate(found))
+
+    def _rebuild(self) -> None:
+        hashes = self._hashes[: self._size]
+        self._sorted, self._order = [], []
+        for shift, mask in self._bounds:
+            chunks = (hashes >> np.uint64(shift)) & mask
+            order = np.argsort(chunks, kind="stable")
+            self._order.append(order.astype(np.int64))
+            self._sorted.append(chunks[order])
+        self._built = self._size
+
+    def _append(self, value: int) -> int:
+        if self._size == self._hashes.size:
+            capacity = self._hashes.size * 2
+            self._hashes = np.resize(self._hashes, capacity)
+            self._valid = np.resize(self._valid, capacity)
+            for scope, codes in self._scope_codes.items():
+                self._scope_codes[scope] = np.resize(codes, capacity)
+        row = self._size
+        self._hashes[row] = value
+        self._valid[row] = True
+        self._size += 1
+        return row
+
+    def _code(self, scope: str, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        codes = self._codes[scope]
+        return codes.setdefault(value, len(codes))
+
+    @staticmethod
+    def _chunk_bounds(num_chunks: int) -> List[Tuple[int, np.uint64]]:
+        bounds = []
+        start = 0
+        for index in range(num_chunks):
+            width = 64 // num_chunks + (1 if index < 64 % num_chunks else 0)
+            bounds.append((start, np.uint64((1 << width) - 1)))
+            start += width
+        return bounds
+
+
+__all__ = ["HashMatch", "PerceptualHashIndex", "SCOPES", "hamming_distances", "hash_to_int", "nearest_hash"]
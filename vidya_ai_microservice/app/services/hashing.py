@@ -2,82 +2,169 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
-
-from io import BytesIO
+from threading import Lock
+from typing import List, Optional, Tuple
 
 from PIL import Image
 
-try:
-    import imagehash  # type: ignore[import]
-except Exception:  # pragma: no cover - optional dependency
-    imagehash = None
-
 from ..config import DuplicateConfig
 from ..schemas import DuplicateResult, EvidenceDocument, EvidenceImage
+from ..utils.evidence import EvidenceContext
+from ..utils.lazy import optional_module
 from ..utils.media_loader import MediaLoader, MediaLoaderError
-from ..utils.state import LocalStateStore
+from ..utils.state import StateStore
+from .hash_index import PerceptualHashIndex
 
+PreparedHash = Tuple[Optional[str], Optional[str]]
 
-class DuplicateDetector:
-    """Detects duplicate media using perceptual hashing."""
+_IMAGEHASH = optional_module("imagehash")
 
-    def __init__(self, loader: MediaLoader, state_store: LocalStateStore, config: DuplicateConfig):
+
+class DuplicateDetector:
+    """Detects duplicate media using perceptual hashing.
+
+    Hashes are matched through a ``PerceptualHashIndex`` built from the state
+    store, so reuse is caught across applicants (or within the org, scheme
+    or applicant, per ``DuplicateConfig.scope``) without a linear scan.
+    Before each match, rows other worker processes stored since the last one
+    (past the store's ``hash_cursor``) are merged into the index.
+    """
+
+    def __init__(
+        self,
+        loader: MediaLoader,
+        state_store: StateStore,
+        config: DuplicateConfig,
+        index: Optional[PerceptualHashIndex] = None,
+    ):
         self.loader = loader
         self.state = state_store
         self.config = config
+        # Taken before the bulk load: rows stored meanwhile are merged again, harmlessly
+        self._hash_cursor = state_store.hash_cursor()
+        self._cursor_lock = Lock()
+        if index is None:
+            index = PerceptualHashIndex(radius=config.hash_distance_threshold)
+            index.extend(state_store.iter_hashes())
+        self.index = index
+
+    def warm_up(self) -> None:
+        _IMAGEHASH.load()
+
+    def evaluate_images(
+        self,
+        images: List[EvidenceImage],
+        applicant_id: str,
+        case_id: str,
+        context: Optional[EvidenceContext] = None,
+        org_id: Optional[str] = None,
+        scheme_code: Optional[str] = None,
+    ) -> List[DuplicateResult]:
+        context = context or EvidenceContext(self.loader)
+        return [
+            self.record_prepared(
+                image, self.prepare_hash(image, context), applicant_id, case_id, org_id, scheme_code
+            )
+            for image in images
+        ]
+
+    def evaluate_documents(
+        self,
+        documents: List[EvidenceDocument],
+        applicant_id: str,
+        case_id: str,
+        context: Optional[EvidenceContext] = None,
+        org_id: Optional[str] = None,
+        scheme_code: Optional[str] = None,
+    ) -> List[DuplicateResult]:
+        context = context or EvidenceContext(self.loader)
+        return [
+            self.record_prepared(doc, self.prepare_hash(doc, context), applicant_id, case_id, org_id, scheme_code)
+            for doc in documents
+        ]
+
+    def prepare_hash(self, evidence: EvidenceImage | EvidenceDocument, context: EvidenceContext) -> PreparedHash:
+        """Compute the perceptual hash (or load error) without touching state.
+
+        Hashing is the expensive, parallelisable half of duplicate detection;
+        matching and recording stay sequential so evidence within one case is
+        compared in submission order.
+        """
 
-    def evaluate_images(self, images: List[EvidenceImage], applicant_id: str, case_id: str) -> List[DuplicateResult]:
-        return [self._evaluate_single(image, applicant_id, case_id) for image in images]
-
-    def evaluate_documents(self, documents: List[EvidenceDocument], applicant_id: str, case_id: str) -> List[DuplicateResult]:
-        return [self._evaluate_single(doc, applicant_id, case_id) for doc in documents]
-
-    def _evaluate_single(self, evidence: EvidenceImage | EvidenceDocument, applicant_id: str, case_id: str) -> DuplicateResult:
         try:
-            payload = self.loader.load_image_bytes(evidence)  # Works for doc as subclass
-            hash_value = self._hash_bytes(payload)
+            return self._hash_image(context.pil(evidence)), None  # Works for doc as subclass
         except MediaLoaderError as exc:
+            return None, str(exc)
+
+    def record_prepared(
+        self,
+        evidence: EvidenceImage | EvidenceDocument,
+        prepared: PreparedHash,
+        applicant_id: str,
+        case_id: str,
+        org_id: Optional[str] = None,
+        scheme_code: Optional[str] = None,
+        config: Optional[DuplicateConfig] = None,
+    ) -> DuplicateResult:
+        config = config or self.config
+        hash_value, error = prepared
+        if hash_value is None:
             return DuplicateResult(
                 evidence_id=evidence.id,
                 duplicate_found=False,
                 hash_distance=0,
-                reference_case_id=str(exc),
+                reference_case_id=error,
             )
 
-        duplicates = self.state.list_hashes(applicant_id)
-        duplicate_found = False
-        closest_case: Optional[str] = None
-        min_distance = 64
-        for record in duplicates.values():
-            distance = self._hash_distance(hash_value, record.get("hash", ""))
-            if distance <= self.config.hash_distance_threshold and distance < min_distance:
-                duplicate_found = True
-                min_distance = distance
-                closest_case = record.get("case_id")
+        self._merge_shared_hashes()
+        scope, scope_value = self._scope(applicant_id, org_id, scheme_code, config)
+        match = self.index.nearest(
+            hash_value,
+            radius=config.hash_distance_threshold,
+            scope=scope,
+            scope_value=scope_value,
+            exclude=(applicant_id, evidence.id, case_id),
+        )
 
-        self.state.record_hash(applicant_id, evidence.id, hash_value, case_id)
+        self.state.record_hash(applicant_id, evidence.id, hash_value, case_id, org_id, scheme_code)
+        self.index.add(hash_value, applicant_id, evidence.id, case_id, org_id, scheme_code)
 
+        duplicate_found = match is not None
         return DuplicateResult(
             evidence_id=evidence.id,
             duplicate_found=duplicate_found,
-            hash_distance=min_distance if duplicate_found else 0,
-            reference_case_id=closest_case,
-            penalty_points=self.config.duplicate_penalty_points if duplicate_found else 0.0,
+            hash_distance=match.distance if match else 0,
+            reference_case_id=match.case_id if match else None,
+            penalty_points=config.duplicate_penalty_points if duplicate_found else 0.0,
         )
 
-    def _hash_bytes(self, payload: bytes) -> str:
+    def _merge_shared_hashes(self) -> None:
+        with self._cursor_lock:
+            records, self._hash_cursor = self.state.hashes_since(self._hash_cursor)
+        if records:
+            self.index.merge(records)
+
+    def _scope(
+        self,
+        applicant_id: str,
+        org_id: Optional[str],
+        scheme_code: Optional[str],
+        config: DuplicateConfig,
+    ) -> Tuple[str, Optional[str]]:
+        # Narrower scopes fall back to the applicant when the case lacks the key
+        if config.scope == "org":
+            return ("org", org_id) if org_id else ("applicant", applicant_id)
+        if config.scope == "scheme":
+            return ("scheme", scheme_code) if scheme_code else ("applicant", applicant_id)
+        if config.scope == "applicant":
+            return "applicant", applicant_id
+        return "global", None
+
+    def _hash_image(self, image: Image.Image) -> str:
+        imagehash = _IMAGEHASH.load()
         if imagehash is None:
             raise MediaLoaderError("imagehash dependency missing")
-        image = Image.open(BytesIO(payload))
         return str(imagehash.phash(image))
 
-    def _hash_distance(self, hash_a: str, hash_b: str) -> int:
-        if imagehash is None:
-            return 64
-        if not hash_a or not hash_b:
-            return 64
-        return imagehash.hex_to_hash(hash_a) - imagehash.hex_to_hash(hash_b)
-
 
 __all__ = ["DuplicateDetector"]
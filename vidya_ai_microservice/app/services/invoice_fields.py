@@ -0,0 +1,272 @@
+"""Single-pass extraction of vendor, amount and date from invoice OCR output.
+
+All field patterns are compiled once into one alternation and the OCR text
+is scanned a single time. The invoice amount is the value read against a
+total label ("Grand Total", "Amount Payable", "Total"), located on the page
+geometry when the provider returned word boxes and by text adjacency
+otherwise, falling back to the first currency-marked amount like the
+original regex parser. A bare integer next to the label ("Total  5  Rs
+4,071.00", where 5 is the quantity column) only counts when the label's
+row has no currency-marked or decimal amount. Every value that could have
+been chosen is returned as a ``FieldCandidate`` with its offsets (and box,
+when placed by layout); plain line-item amounts are not.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..schemas import FieldCandidate, OCRText, OCRWord
+
+_NUMBER = r"\d[\d,]*(?:\.\d+)?"
+
+# One alternation over the whole text. The leading guards reject most positions
+# before any branch is tried: fields start a word with one of these characters.
+_FIELDS = re.compile(
+    r"(?<![\w.])(?=[vgnatri₹\d])(?:"
+    r"(?P<vendor>vendor\b\s*:?\s*)"
+    r"|(?P<label>(?:grand\s+total|net\s+payable|amount\s+(?:payable|due)"
+    r"|total(?<!sub\stotal)(?<!sub-total))\b)"
+    r"|(?:INR|Rs\.?|₹)\s*(?P<currency>" + _NUMBER + r")"
+    r"|(?P<date>\d{1,4}[/-]\d{1,2}[/-]\d{2,4}\b))",
+    re.IGNORECASE,
+)
+# A bare number right after a total label ("Total: 4,071.00"), at most one line below
+_LABEL_VALUE = re.compile(r"[^\S\n]*[:=-]?[^\S\n]*\n?[^\S\n]*(" + _NUMBER + r")(?![/\d-])")
+# Stronger amounts later on the label's row: currency-marked or with decimals
+_ROW_AMOUNT = re.compile(
+    r"(?<![\w./-])(?:(?P<marker>(?:INR|Rs\.?|₹)\s*)(?P<marked>" + _NUMBER + r")|(?P<decimal>\d[\d,]*\.\d+))(?![/\d-])",
+    re.IGNORECASE,
+)
+_DATE = re.compile(r"(\d{1,2})[/-](\d{1,2})[/-](\d{2}|\d{4})|(\d{4})-(\d{1,2})-(\d{1,2})")
+_AMOUNT_WORD = re.compile(r"(INR|Rs\.?|₹)?\s*(" + _NUMBER + r")[.,:]?", re.IGNORECASE)
+_LABEL_RANK = {"total": 1}
+_LABEL_INITIALS = frozenset("aAdDgGnNpPsStT")
+
+
+def parse_amount(raw: str) -> Optional[float]:
+    try:
+        return float(raw.replace(",", ""))
+    except ValueError:
+        return None
+
+
+def parse_date(value: Optional[str | float]) -> Optional[datetime]:
+    """Day-first ``dd/mm/yyyy`` / ``dd-mm-yy`` or ISO ``yyyy-mm-dd``; two-digit years are 20xx."""
+
+    if not value or not isinstance(value, str):
+        return None
+    match = _DATE.fullmatch(value.strip())
+    if match is None:
+        return None
+    day, month, year, iso_year, iso_month, iso_day = match.groups()
+    if iso_year:
+        day, month, year = iso_day, iso_month, iso_year
+    try:
+        return datetime(int(year) + (2000 if len(year) == 2 else 0), int(month), int(day))
+    except ValueError:
+        return None
+
+
+def _label_rank(label: str) -> int:
+    return _LABEL_RANK.get(label, 2)
+
+
+class InvoiceFields:
+    """Selected field values plus every candidate considered."""
+
+    __slots__ = ("vendor", "amount", "date", "candidates")
+
+    def __init__(
+        self,
+        vendor: Optional[str],
+        amount: Optional[float],
+        date: Optional[str],
+        candidates: List[FieldCandidate],
+    ) -> None:
+        self.vendor = vendor
+        self.amount = amount
+        self.date = date
+        self.candidates = candidates
+
+    def as_dict(self) -> Dict[str, Optional[str | float]]:
+        return {"vendor": self.vendor, "amount": self.amount, "date": self.date}
+
+
+class InvoiceFieldExtractor:
+    """Extracts invoice fields from ``OCRText`` in one scan of the text.
+
+    ``label_window`` is how far (in characters, at most one line break)
+    after a total label a currency amount is still read as its value.
+    ``label_rows`` is how many rows below a total label the layout search
+    looks; a row is taken as twice the label's box height.
+    """
+
+    def __init__(self, label_window: int = 48, label_rows: int = 2) -> None:
+        self.label_window = label_window
+        self.label_rows = label_rows
+
+    def extract(self, recognized: OCRText | str) -> InvoiceFields:
+        if isinstance(recognized, str):
+            text, words = recognized, []
+        else:
+            text, words = recognized.text, recognized.words
+        # (field, value, start, end, label) rows; models are only built once the scan is done
+        found: List[Tuple[str, str | float, int, int, Optional[str]]] = []
+        vendor = date = first_currency = -1
+        labelled, labelled_rank = -1, 0
+        pending: Optional[Tuple[str, int]] = None
+
+        for match in _FIELDS.finditer(text):
+            kind = match.lastgroup
+            if kind == "currency":
+                label = None
+                if pending is not None:
+                    gap = text[pending[1] : match.start()]
+                    if len(gap) <= self.label_window and gap.count("\n") <= 1:
+                        label = pending[0]
+                    pending = None
+                # Line items are not kept: only labelled amounts and the first marked one can be chosen
+                if label is None and first_currency >= 0:
+                    continue
+                value = parse_amount(match.group(kind))
+                if value is None:
+                    continue
+                found.append(("amount", value, match.start(kind), match.end(), label))
+                if first_currency < 0:
+                    first_currency = len(found) - 1
+                if label is not None and _label_rank(label) >= labelled_rank:
+                    labelled, labelled_rank = len(found) - 1, _label_rank(label)
+            elif kind == "label":
+                label = " ".join(match.group(kind).lower().split())
+                bare = _LABEL_VALUE.match(text, match.end())
+                value = parse_amount(bare.group(1)) if bare else None
+                if value is None:
+                    pending = (label, match.end())
+                    continue
+                pending = None
+                start, end = bare.start(1), bare.end(1)
+                if "." not in bare.group(1):
+                    # A bare integer may be a quantity column: prefer a stronger amount on the same row
+                    line_end = text.find("\n", end)
+                    stronger = _ROW_AMOUNT.search(text, end, len(text) if line_end < 0 else line_end)
+                    if stronger is not None and stronger.group("marked"):
+                        # The scan reaches it as a currency match; hand it the label
+                        pending = (label, stronger.start())
+                        continue
+                    if stronger is not None:
+                        value = parse_amount(stronger.group("decimal"))
+                        start, end = stronger.start("decimal"), stronger.end("decimal")
+                found.append(("amount", value, start, end, label))
+                if _label_rank(label) >= labelled_rank:
+                    labelled, labelled_rank = len(found) - 1, _label_rank(label)
+            elif kind == "date":
+                found.append(("date", match.group(kind), match.start(), match.end(), None))
+                if date < 0:
+                    date = len(found) - 1
+            elif vendor < 0:
+                start = match.end()
+                end = text.find("\n", start)
+                end = len(text) if end < 0 else end
+                name = text[start:end].strip()
+                if name:
+                    found.append(("vendor", name, start, end, None))
+                    vendor = len(found) - 1
+
+        candidates = [
+            FieldCandidate.model_construct(field=field, value=value, start=start, end=end, label=label, bbox=[])
+            for field, value, start, end, label in found
+        ]
+        selected = self._nearest_to_total(text, words, candidates)
+        if selected is None:
+            index = labelled if labelled >= 0 else first_currency
+            selected = candidates[index] if index >= 0 else None
+        chosen = {id(selected)} | {id(candidates[index]) for index in (vendor, date) if index >= 0}
+        for candidate in candidates:
+            candidate.selected = id(candidate) in chosen
+        return InvoiceFields(
+            vendor=candidates[vendor].value if vendor >= 0 else None,  # type: ignore[arg-type]
+            amount=selected.value if selected is not None else None,  # type: ignore[arg-type]
+            date=candidates[date].value if date >= 0 else None,  # type: ignore[arg-type]
+            candidates=candidates,
+        )
+
+    def _nearest_to_total(
+        self, text: str, words: Sequence[OCRWord], candidates: List[FieldCandidate]
+    ) -> Optional[FieldCandidate]:
+        """Amount word closest to a total label on the page: same row to the right first, then below."""
+
+        labels: List[Tuple[OCRWord, str]] = []
+        boxed: List[OCRWord] = []
+        tops: List[float] = []
+        previous = ""
+        for word in words:
+            if len(word.bbox) != 4:
+                previous = ""
+                continue
+            boxed.append(word)
+            tops.append(word.bbox[1])
+            raw = word.text
+            # Label words and the words before them all start with one of these letters
+            if len(raw) > 9 or raw[:1] not in _LABEL_INITIALS:
+                previous = ""
+                continue
+            token = raw.strip(":.-").lower()
+            if token == "total" and previous not in ("sub", "sub-"):
+                labels.append((word, "grand total" if previous == "grand" else token))
+            elif token in ("payable", "due") and previous in ("amount", "net"):
+                labels.append((word, f"{previous} {token}"))
+            previous = token
+        if not labels:
+            return None
+        # Ordered by top edge so each label only visits its own row and the rows just below it;
+        # reading order usually is already
+        if any(later < earlier for earlier, later in zip(tops, tops[1:])):
+            order = sorted(range(len(tops)), key=tops.__getitem__)
+            boxed, tops = [boxed[index] for index in order], [tops[index] for index in order]
+        best: Optional[Tuple[Tuple[int, int, int, float], OCRWord, float, str]] = None
+        for label_word, label in labels:
+            lx1, ly1, lx2, ly2 = label_word.bbox
+            row_mid, row_half = (ly1 + ly2) / 2, max((ly2 - ly1) / 2, 1.0)
+            rank = -_label_rank(label)
+            first = bisect_left(tops, ly1 - 2 * row_half)
+            last = bisect_right(tops, ly2 + self.label_rows * 4 * row_half)
+            for word in boxed[first:last]:
+                x1, y1, x2, y2 = word.bbox
+                # Geometry first: the amount regex only runs on words right of or below the label
+                if abs((y1 + y2) / 2 - row_mid) <= row_half and x1 >= lx2:
+                    band, distance = 0, x1 - lx2
+                elif y1 >= ly2 - row_half and x2 >= lx1:
+                    band, distance = 1, (y1 - ly2) + abs(x1 - lx1)
+                else:
+                    continue
+                if best is not None and (band, rank, 0, distance) >= best[0]:
+                    continue
+                match = _AMOUNT_WORD.fullmatch(word.text)
+                value = parse_amount(match.group(2)) if match else None
+                if value is None:
+                    continue
+                # Bare integers (quantities, counts) lose to marked or decimal amounts in the same band
+                bare = 0 if match.group(1) or "." in match.group(2) else 1
+                key = (band, rank, bare, distance)
+                if best is None or key < best[0]:
+                    best = (key, word, value, label)
+        if best is None:
+            return None
+        _, word, value, label = best
+        for candidate in candidates:
+            if candidate.field == "amount" and candidate.value == value:
+                candidate.bbox, candidate.label = list(word.bbox), label
+                return candidate
+        # A bare number the text scan skipped: locate it in the text for its offsets
+        start = text.find(word.text)
+        end = start + len(word.text) if start >= 0 else -1
+        candidate = FieldCandidate(field="amount", value=value, start=start, end=end, label=label, bbox=list(word.bbox))
+        candidates.append(candidate)
+        return candidate
+
+
+__all__ = ["InvoiceFieldExtractor", "InvoiceFields", "parse_amount", "parse_date"]
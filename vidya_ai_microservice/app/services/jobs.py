@@ -0,0 +1,211 @@
+"""Asynchronous scoring jobs with bounded admission and optional webhooks."""
+
+from __future__ import annotations
+
+import ipaddress
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from ..schemas import EvidencePackage, ScoreJob, ScoreResponse
+from ..utils.job_store import JobStore
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the job queue is at its depth limit."""
+
+
+class CallbackRejectedError(ValueError):
+    """Raised when a callback URL is not an allowed webhook target."""
+
+
+def check_callback_url(url: str, allowed_hosts: Iterable[str] = ()) -> None:
+    """Reject callback URLs that could reach the service's own network.
+
+    With ``allowed_hosts`` set, the host must be one of them. Otherwise every
+    address the host resolves to must be public: loopback, private,
+    link-local (cloud metadata), reserved and multicast targets are refused.
+    """
+
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise CallbackRejectedError(f"Callback URL must be an absolute http(s) URL: {url}")
+    allowed = {name.lower() for name in allowed_hosts}
+    if allowed:
+        if host not in allowed:
+            raise CallbackRejectedError(f"Callback host {host} is not in the allowed list")
+        return
+    try:
+        resolved = socket.getaddrinfo(host, parts.port or 443, proto=socket.IPPROTO_TCP)
+    except (OSError, UnicodeError) as exc:
+        raise CallbackRejectedError(f"Callback host {host} does not resolve: {exc}") from exc
+    for *_, sockaddr in resolved:
+        address = ipaddress.ip_address(str(sockaddr[0]).split("%", 1)[0])
+        if not address.is_global or address.is_multicast:
+            raise CallbackRejectedError(f"Callback host {host} resolves to non-public address {address}")
+
+
+class JobQueue:
+    """Runs scoring jobs on a fixed pool of worker threads.
+
+    ``submit`` only records the job, so callers get an id back immediately.
+    Admission is bounded: once ``max_depth`` jobs are queued or running,
+    ``submit`` raises ``QueueFullError`` straight away instead of letting
+    work pile up. Finished jobs are POSTed to their ``callback_url`` (if
+    any) and kept for ``retention_seconds`` so clients can poll them.
+    Callback URLs are checked by ``check_callback_url`` on submit and again
+    before delivery, since DNS may have changed in between, and redirects
+    are not followed. With a leasing store (SQLite), a background thread
+    renews the leases of this queue's running jobs and requeues jobs whose
+    worker stopped renewing, so live workers sharing the store keep theirs.
+    """
+
+    _IDLE_POLL_SECONDS = 1.0
+
+    def __init__(
+        self,
+        handler: Callable[[EvidencePackage], ScoreResponse],
+        store: JobStore,
+        workers: int = 4,
+        max_depth: int = 1000,
+        webhook_timeout_seconds: float = 5.0,
+        webhook_retries: int = 2,
+        retention_seconds: int = 3600,
+        callback_allowed_hosts: Iterable[str] = (),
+    ) -> None:
+        self.handler = handler
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_depth = max(1, max_depth)
+        self.webhook_timeout_seconds = webhook_timeout_seconds
+        self.webhook_retries = max(0, webhook_retries)
+        self.retention = timedelta(seconds=retention_seconds)
+        self.callback_allowed_hosts = tuple(callback_allowed_hosts)
+        self.session = requests.Session()
+        self._admission = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self.store.requeue_expired()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"vidya-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.store.lease_seconds:
+            thread = threading.Thread(target=self._keep_leases, name="vidya-job-leases", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, payload: EvidencePackage, callback_url: Optional[str] = None) -> ScoreJob:
+        if callback_url:
+            check_callback_url(callback_url, self.callback_allowed_hosts)
+        with self._admission:
+            if self.store.depth() >= self.max_depth:
+                self.rejected += 1
+                raise QueueFullError(f"Job queue is full ({self.max_depth} jobs pending)")
+            job = ScoreJob(
+                job_id=uuid.uuid4().hex,
+                case_id=payload.case_id,
+                status="queued",
+                created_at=datetime.utcnow(),
+                callback_url=callback_url,
+            )
+            self.store.add(job, payload)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[ScoreJob]:
+        return self.store.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.store.depth(),
+            "max_depth": self.max_depth,
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+        self.session.close()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            claimed = self.store.claim()
+            if claimed is None:
+                with self._wakeup:
+                    self._wakeup.wait(self._IDLE_POLL_SECONDS)
+                continue
+            job, payload = claimed
+            try:
+                result = self.handler(payload)
+                job = job.model_copy(update={"status": "succeeded", "result": result})
+            except Exception as exc:
+                job = job.model_copy(update={"status": "failed", "error": str(exc)})
+            with self._admission:
+                if job.status == "succeeded":
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            job = job.model_copy(update={"finished_at": datetime.utcnow()})
+            self.store.save(job)
+            if job.callback_url:
+                self.store.save(job.model_copy(update={"callback_status": self._notify(job)}))
+            self.store.prune(datetime.utcnow() - self.retention)
+
+    def _keep_leases(self) -> None:
+        interval = self.store.lease_seconds / 3  # type: ignore[operator]
+        while not self._stopping.wait(interval):
+            self.store.renew_leases()
+            if self.store.requeue_expired():
+                with self._wakeup:
+                    self._wakeup.notify_all()
+
+    def _notify(self, job: ScoreJob) -> str:
+        """POST the finished job to its callback URL; returns the delivery outcome."""
+
+        try:
+            check_callback_url(job.callback_url, self.callback_allowed_hosts)  # type: ignore[arg-type]
+        except CallbackRejectedError as exc:
+            return f"rejected: {exc}"
+        outcome = "failed"
+        for _ in range(self.webhook_retries + 1):
+            try:
+                response = self.session.post(
+                    job.callback_url,  # type: ignore[arg-type]
+                    data=job.model_dump_json(),
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.webhook_timeout_seconds,
+                    allow_redirects=False,
+                )
+            except requests.RequestException as exc:
+                outcome = f"failed: {exc}"
+                continue
+            if response.ok and not response.is_redirect:
+                return "delivered"
+            outcome = f"failed: HTTP {response.status_code}"
+        return outcome
+
+
+__all__ = ["CallbackRejectedError", "JobQueue", "QueueFullError", "check_callback_url"]
@@ -0,0 +1,183 @@
+"""Background watcher that hot-swaps fraud model versions."""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .fraud_model import FraudScoringService, LoadedFraudModel, load_fraud_model
+
+
+class ModelRegistryError(RuntimeError):
+    """Raised when a requested model version cannot be activated."""
+
+
+class ModelRegistry:
+    """Watches ``model_dir`` and swaps new fraud models in without a restart.
+
+    Versions are the ``*.json`` file stems, newest last in sort order (the
+    same rule the service uses at startup). A new version is loaded and
+    warmed with a synthetic feature row on the watcher thread, then swapped
+    in with a single reference assignment, so in-flight scoring keeps the
+    model it started with. ``pin`` holds a version (auto-upgrades stop until
+    ``unpin``); ``rollback`` re-activates the previously active version and
+    pins it. Versions that fail to load or warm are recorded and skipped
+    until their file changes (modification time or size), so a file caught
+    half-copied is retried once the copy completes. Loading happens outside
+    the registry lock, so ``status`` answers while a large model loads.
+    """
+
+    _HISTORY_LIMIT = 10
+
+    def __init__(
+        self,
+        service: FraudScoringService,
+        poll_seconds: float = 30.0,
+        loader: Callable[[Path], LoadedFraudModel] = load_fraud_model,
+    ) -> None:
+        self.service = service
+        self.poll_seconds = poll_seconds
+        self.loader = loader
+        self.pinned: Optional[str] = None
+        self.failed: Dict[str, str] = {}
+        self._failed_files: Dict[str, Tuple[int, int]] = {}
+        self._history: List[LoadedFraudModel] = []
+        self._lock = threading.RLock()
+        # Serialises loads, which run without holding ``_lock``
+        self._load_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_checked: Optional[datetime] = None
+
+    def start(self) -> None:
+        if self.poll_seconds <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch, name="vidya-model-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def versions(self) -> List[str]:
+        if not self.service.model_dir.exists():
+            return []
+        return [path.stem for path in sorted(self.service.model_dir.glob("*.json"))]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self.service.version,
+                "pinned": self.pinned,
+                "available": self.versions(),
+                "history": [loaded.version for loaded in self._history],
+                "failed": dict(self.failed),
+                "last_checked": self.last_checked.isoformat() if self.last_checked else None,
+            }
+
+    def refresh(self) -> bool:
+        """Activate the newest version unless pinned; returns True if a swap happened."""
+
+        with self._load_lock:
+            with self._lock:
+                self.last_checked = datetime.utcnow()
+                if self.pinned is not None:
+                    return False
+                candidates = [version for version in self.versions() if not self._still_broken(version)]
+                if not candidates or candidates[-1] == self.service.version:
+                    return False
+            try:
+                loaded = self._load(candidates[-1])
+            except ModelRegistryError:
+                return False
+            with self._lock:
+                # Pinned while the new version was loading
+                if self.pinned is not None:
+                    return False
+                self._swap(loaded)
+            return True
+
+    def pin(self, version: str) -> Dict[str, Any]:
+        with self._load_lock:
+            loaded = self._load(version) if version != self.service.version else None
+            with self._lock:
+                if loaded is not None:
+                    self._swap(loaded)
+                self.pinned = version
+                return self.status()
+
+    def unpin(self) -> Dict[str, Any]:
+        with self._lock:
+            self.pinned = None
+        self.refresh()
+        return self.status()
+
+    def rollback(self) -> Dict[str, Any]:
+        with self._lock:
+            if not self._history:
+                raise ModelRegistryError("No previous model version to roll back to")
+            previous = self._history.pop()
+            self._warm(previous)
+            self.service.swap(previous)
+            self.pinned = previous.version
+            return self.status()
+
+    def _load(self, version: str) -> LoadedFraudModel:
+        """Load and warm ``version``; called without ``_lock`` held."""
+
+        path = self.service.model_dir / f"{version}.json"
+        signature = _file_signature(path)
+        if signature is None:
+            raise ModelRegistryError(f"Unknown model version: {version}")
+        try:
+            loaded = self.loader(path)
+            self._warm(loaded)
+        except Exception as exc:
+            with self._lock:
+                self.failed[version] = str(exc)
+                self._failed_files[version] = signature
+            raise ModelRegistryError(f"Failed to load model {version}: {exc}") from exc
+        with self._lock:
+            self.failed.pop(version, None)
+            self._failed_files.pop(version, None)
+        return loaded
+
+    def _swap(self, loaded: LoadedFraudModel) -> None:
+        self._history.append(self.service.swap(loaded))
+        del self._history[: -self._HISTORY_LIMIT]
+
+    def _still_broken(self, version: str) -> bool:
+        failed = self._failed_files.get(version)
+        return failed is not None and failed == _file_signature(self.service.model_dir / f"{version}.json")
+
+    @staticmethod
+    def _warm(loaded: LoadedFraudModel) -> None:
+        """Run one synthetic prediction so the first real case does not pay for it."""
+
+        if loaded.booster is None:
+            return
+        row = np.zeros((1, len(loaded.feature_order)), dtype=np.float32)
+        prediction = np.asarray(loaded.booster.inplace_predict(row))  # type: ignore[attr-defined]
+        if not np.all(np.isfinite(prediction)):
+            raise ValueError("warm-up prediction is not finite")
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(self.poll_seconds):
+            self.refresh()
+
+
+def _file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+__all__ = ["ModelRegistry", "ModelRegistryError"]
@@ -1,104 +1,162 @@
-"""Object detection service using YOLOv8 or fallbacks."""
+"""Object detection service using YOLOv8 (PyTorch or ONNX Runtime) or fallbacks."""
 
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, List, Optional
+from threading import Lock
+from typing import Any, Dict, List, Optional
 
-try:
-    from ultralytics import YOLO  # type: ignore
-except Exception:  # pragma: no cover - ultralytics may be missing
-    YOLO = None
+import numpy as np
 
 from ..config import DetectionConfig
 from ..schemas import EvidenceImage, ObjectDetectionResult
+from ..utils.evidence import EvidenceContext
 from ..utils.media_loader import MediaLoader, MediaLoaderError
+from .batching import MicroBatcher
+from .detection_backends import Detection, load_backend
+
+_UNSET = object()
 
 
 class ObjectDetectionService:
-    """Wraps YOLO inference for asset validation."""
+    """Wraps YOLO inference for asset validation.
+
+    The model runs on the backend chosen by ``DetectionConfig.backend``:
+    ultralytics for ``.pt`` weights, ONNX Runtime for ``.onnx`` exports.
+
+    With ``batch_max_size > 1`` frames from all in-flight cases are funnelled
+    through a ``MicroBatcher``, so concurrent requests share one batched
+    ``predict`` call instead of running many batch-of-1 inferences.
+
+    The backend (and its ultralytics/onnxruntime import) is loaded on first
+    use, or ahead of time by ``warm_up``.
+    """
 
     def __init__(self, loader: MediaLoader, config: DetectionConfig, model_path: Optional[Path] = None) -> None:
         self.loader = loader
         self.config = config
-        self.model = self._load_model(model_path) if model_path else None
-
-    def _load_model(self, model_path: Path | str | None):
-        if YOLO and model_path and Path(model_path).exists():
-            try:
-                return YOLO(str(model_path))
-            except Exception:
-                return None
-        return None
-
-    def analyze(self, images: List[EvidenceImage], declared_asset: Optional[str]) -> List[ObjectDetectionResult]:
-        results: List[ObjectDetectionResult] = []
-        for image in images:
-            try:
-                payload = self.loader.load_image_bytes(image)
-                results.append(self._run_detection(image, payload, declared_asset))
-            except MediaLoaderError as exc:
-                results.append(
-                    ObjectDetectionResult(
-                        image_id=image.id,
-                        detected_objects=[],
-                        asset_match=False,
-                        asset_match_score=0.0,
-                        match_score=0.0,
-                        details={"error": str(exc)},
-                    )
-                )
-        return results
+        self.model_path = model_path
+        self.batcher: Optional[MicroBatcher] = None
+        self._model: Any = _UNSET
+        self._model_lock = Lock()
+
+    @property
+    def model(self):
+        if self._model is _UNSET:
+            with self._model_lock:
+                if self._model is _UNSET:
+                    self._load_model()
+        return self._model
+
+    @model.setter
+    def model(self, value) -> None:
+        self._model = value
+
+    def _load_model(self) -> None:
+        model = load_backend(self.model_path, self.config)
+        if model is not None and self.config.batch_max_size > 1:
+            self.batcher = MicroBatcher(
+                self._predict_batch,
+                max_batch_size=self.config.batch_max_size,
+                max_wait_ms=self.config.batch_max_wait_ms,
+                name="detection-batcher",
+            )
+        self._model = model
+
+    def warm_up(self) -> None:
+        """Load the backend and run one blank frame through it."""
+
+        if self.model is not None:
+            size = self.config.input_size
+            self._predict_batch([np.zeros((size, size, 3), dtype=np.uint8)])
+
+    def analyze(
+        self,
+        images: List[EvidenceImage],
+        declared_asset: Optional[str],
+        context: Optional[EvidenceContext] = None,
+    ) -> List[ObjectDetectionResult]:
+        context = context or EvidenceContext(self.loader)
+        return [self.analyze_image(image, declared_asset, context) for image in images]
+
+    def analyze_image(
+        self,
+        image: EvidenceImage,
+        declared_asset: Optional[str],
+        context: EvidenceContext,
+        config: Optional[DetectionConfig] = None,
+    ) -> ObjectDetectionResult:
+        """Detect and match one image; ``config`` (a case's snapshot section) defaults to the service's own."""
+
+        try:
+            if self.model:
+                frame = context.bgr(image)
+            else:
+                # Fallback mode never decodes, but still surfaces load failures
+                context.payload(image)
+                frame = None
+            return self._run_detection(image, frame, declared_asset, config or self.config)
+        except MediaLoaderError as exc:
+            return ObjectDetectionResult(
+                image_id=image.id,
+                detected_objects=[],
+                asset_match=False,
+                asset_match_score=0.0,
+                match_score=0.0,
+                details={"error": str(exc)},
+            )
 
     def _run_detection(
         self,
         image: EvidenceImage,
-        payload: bytes,
+        frame: Optional[np.ndarray],
         declared_asset: Optional[str],
+        config: DetectionConfig,
     ) -> ObjectDetectionResult:
-        keywords = self._keywords(declared_asset, image.declared_asset_type)
+        keywords = self._keywords(declared_asset, image.declared_asset_type, config)
         if not self.model:
             haystack = (image.declared_asset_type or "").lower()
             match_score = 1.0 if keywords and any(keyword in haystack for keyword in keywords) else 0.0
-            return self._result_from_scores(image.id, [], match_score, declared_asset, "fallback")
+            return self._result_from_scores(image.id, [], match_score, declared_asset, "fallback", config)
 
-        detections = self.model.predict(
-            source=payload,
-            verbose=False,
-            conf=self.config.confidence_threshold,
-            iou=self.config.iou_threshold,
-        )
+        if self.batcher is not None:
+            detections = self.batcher(frame)
+        else:
+            detections = self._predict_batch([frame])[0]
         detected_objects: List[Dict[str, float | str]] = []
         best_match = 0.0
         matched_label: Optional[str] = None
-        for result in detections:
-            boxes = result.boxes
-            if boxes is None:
-                continue
-            for box in boxes:
-                cls_name = self.model.names.get(int(box.cls[0]), "object")
-                conf = float(box.conf[0])
-                detected_objects.append(
-                    {
-                        "label": cls_name,
-                        "confidence": round(conf, 3),
-                        "bbox": box.xyxy[0].tolist(),
-                    }
-                )
-                if keywords and any(keyword in cls_name.lower() for keyword in keywords):
-                    if conf > best_match:
-                        best_match = conf
-                        matched_label = cls_name
+        for detection in detections:
+            detected_objects.append(
+                {
+                    "label": detection.label,
+                    "confidence": round(detection.confidence, 3),
+                    "bbox": list(detection.bbox),
+                }
+            )
+            if keywords and any(keyword in detection.label.lower() for keyword in keywords):
+                if detection.confidence > best_match:
+                    best_match = detection.confidence
+                    matched_label = detection.label
 
         return self._result_from_scores(
             image.id,
             detected_objects,
             best_match,
             declared_asset,
-            "yolov8",
+            self.model.name,
+            config,
             matched_label,
         )
 
+    def _predict_batch(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        """Run one backend call over several frames; returns detections per frame."""
+
+        return self.model.predict(frames)
+
+    def batch_stats(self) -> Optional[Dict[str, object]]:
+        return self.batcher.stats() if self.batcher else None
+
     def _result_from_scores(
         self,
         image_id: str,
@@ -106,9 +164,10 @@ class ObjectDetectionService:
         match_score: float,
         declared_asset: Optional[str],
         mode: str,
+        config: DetectionConfig,
         matched_label: Optional[str] = None,
     ) -> ObjectDetectionResult:
-        normalized_score = 1.0 if match_score >= self.config.confidence_threshold else 0.0
+        normalized_score = 1.0 if match_score >= config.confidence_threshold else 0.0
         details = {"mode": mode, "declared_asset": declared_asset}
         if matched_label:
             details["matched_label"] = matched_label
@@ -121,11 +180,13 @@ class ObjectDetectionService:
             details=details,
         )
 
-    def _keywords(self, declared_asset: Optional[str], fallback_asset: Optional[str]) -> List[str]:
+    def _keywords(
+        self, declared_asset: Optional[str], fallback_asset: Optional[str], config: DetectionConfig
+    ) -> List[str]:
         if not declared_asset and not fallback_asset:
             return []
         asset_key = (declared_asset or fallback_asset or "").lower()
-        synonyms = self.config.asset_synonyms.get(asset_key, [])
+        synonyms = config.asset_synonyms.get(asset_key, [])
         return list({asset_key, *[syn.lower() for syn in synonyms]})
 
 
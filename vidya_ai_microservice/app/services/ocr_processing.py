@@ -1,39 +1,76 @@
-"""OCR and document parsing via Google Cloud Vision."""
+"""OCR and invoice field parsing over pluggable OCR providers."""
 
 from __future__ import annotations
 
-import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from threading import Lock
 from typing import Any, Dict, List, Optional
 
-try:
-    from google.cloud import vision  # type: ignore
-except Exception:  # pragma: no cover - API optional
-    vision = None
-
 from ..config import OCRConfig
-from ..schemas import EvidenceDocument, OCRResult
+from ..schemas import EvidenceDocument, OCRResult, OCRText
+from ..utils.evidence import EvidenceContext
 from ..utils.media_loader import MediaLoader, MediaLoaderError
+from ..utils.ocr_cache import OCRCache
+from .invoice_fields import InvoiceFieldExtractor, parse_date
+from .ocr_providers import OCRProvider, OCRProviderError, load_provider
+
+
+_UNSET = object()
 
 
 class DocumentOCRService:
-    """Handles OCR extraction and business-field parsing."""
+    """Handles OCR extraction and business-field parsing.
+
+    Recognition is delegated to an ``OCRProvider`` (Vision REST with
+    ``api_key``, the Vision gRPC client, local Tesseract, or none), chosen by
+    ``OCRConfig.provider`` and created on first use rather than at startup.
+    With an ``OCRCache`` attached, provider output is reused for documents
+    whose bytes were already recognised by the same provider version.
+    """
 
-    def __init__(self, loader: MediaLoader, config: OCRConfig, credentials_path: Optional[str] = None):
+    def __init__(
+        self,
+        loader: MediaLoader,
+        config: OCRConfig,
+        credentials_path: Optional[str] = None,
+        cache: Optional[OCRCache] = None,
+        api_key: Optional[str] = None,
+    ):
         self.loader = loader
         self.config = config
-        self.client = self._init_client(credentials_path) if vision else None
-
-    def _init_client(self, credentials_path: Optional[str]):  # pragma: no cover - network
-        if not vision:
-            return None
-        try:
-            if credentials_path:
-                return vision.ImageAnnotatorClient.from_service_account_file(credentials_path)
-            return vision.ImageAnnotatorClient()
-        except Exception:
-            # Credentials missing; fall back to regex-only parsing
-            return None
+        self.credentials_path = credentials_path
+        self.api_key = api_key
+        self.cache = cache
+        self.extractor = InvoiceFieldExtractor()
+        self._provider: Any = _UNSET
+        self._provider_lock = Lock()
+
+    @property
+    def provider(self) -> OCRProvider:
+        if self._provider is _UNSET:
+            with self._provider_lock:
+                if self._provider is _UNSET:
+                    self._provider = load_provider(self.config, self.api_key, self.credentials_path)
+        return self._provider
+
+    @provider.setter
+    def provider(self, value: OCRProvider) -> None:
+        self._provider = value
+
+    @property
+    def mode(self) -> str:
+        return self.provider.name
+
+    @property
+    def provider_version(self) -> str:
+        return f"{self.provider.name}/{self.provider.version}"
+
+    def batch_stats(self) -> Optional[Dict[str, Any]]:
+        return None if self._provider is _UNSET else self._provider.stats()
+
+    def warm_up(self) -> None:
+        self.provider.warm_up()
 
     def process_documents(
         self,
@@ -41,25 +78,49 @@ class DocumentOCRService:
         declared_vendor: Optional[str],
         declared_amount: Optional[float],
         declared_date: Optional[datetime],
+        context: Optional[EvidenceContext] = None,
     ) -> List[OCRResult]:
-        results: List[OCRResult] = []
-        for doc in documents:
-            try:
-                payload = self.loader.load_document_bytes(doc)
-                results.append(self._process_single(doc, payload, declared_vendor, declared_amount, declared_date))
-            except MediaLoaderError as exc:
-                results.append(
-                    OCRResult(
-                        doc_id=doc.id,
-                        raw_text="",
-                        ocr_confidence=0.0,
-                        parsed_fields={},
-                        crosscheck_results={"error": str(exc)},
-                        penalties={"load_failure": self.config.amount_penalty},
-                        match_score=0.0,
-                    )
-                )
-        return results
+        context = context or EvidenceContext(self.loader)
+
+        def process(doc: EvidenceDocument) -> OCRResult:
+            return self.process_document(doc, declared_vendor, declared_amount, declared_date, context)
+
+        if len(documents) > 1 and self.provider.parallel:
+            # Submitted together, the documents share a Vision batch or spread over the OCR pool
+            with ThreadPoolExecutor(max_workers=len(documents), thread_name_prefix="vidya-ocr-docs") as pool:
+                return list(pool.map(process, documents))
+        return [process(doc) for doc in documents]
+
+    def process_document(
+        self,
+        document: EvidenceDocument,
+        declared_vendor: Optional[str],
+        declared_amount: Optional[float],
+        declared_date: Optional[datetime],
+        context: EvidenceContext,
+        config: Optional[OCRConfig] = None,
+    ) -> OCRResult:
+        """OCR and cross-check one document; ``config`` (a case's snapshot section) defaults to the service's."""
+
+        config = config or self.config
+        try:
+            payload = context.payload(document)
+            return self._process_single(document, payload, declared_vendor, declared_amount, declared_date, config)
+        except MediaLoaderError as exc:
+            return self._failed(document, exc, "load_failure", config)
+        except OCRProviderError as exc:
+            return self._failed(document, exc, "ocr_failure", config)
+
+    def _failed(self, document: EvidenceDocument, exc: Exception, reason: str, config: OCRConfig) -> OCRResult:
+        return OCRResult(
+            doc_id=document.id,
+            raw_text="",
+            ocr_confidence=0.0,
+            parsed_fields={},
+            crosscheck_results={"error": str(exc)},
+            penalties={reason: config.amount_penalty},
+            match_score=0.0,
+        )
 
     def _process_single(
         self,
@@ -68,28 +129,18 @@ class DocumentOCRService:
         declared_vendor: Optional[str],
         declared_amount: Optional[float],
         declared_date: Optional[datetime],
+        config: OCRConfig,
     ) -> OCRResult:
-        if not self.client:
-            # Lightweight regex fallback if GCV unavailable
-            text = ""
-            confidence = 0.5
-        else:  # pragma: no cover - network
-            image = vision.Image(content=payload)
-            response = self.client.document_text_detection(image=image)
-            if response.error.message:
-                raise RuntimeError(response.error.message)
-            text = response.full_text_annotation.text
-            # Use average symbol confidence when available
-            confidences = [s.confidence for p in response.full_text_annotation.pages for b in p.blocks for paragraph in b.paragraphs for word in paragraph.words for s in word.symbols]
-            confidence = float(sum(confidences) / len(confidences)) if confidences else 0.8
-
-        parsed_fields = self._parse_fields(text)
-        penalties, crosscheck = self._crosscheck(parsed_fields, declared_vendor, declared_amount, declared_date, confidence)
+        recognized = self.recognize(payload)
+        text, confidence = recognized.text, recognized.confidence
+
+        fields = self.extractor.extract(recognized)
+        parsed_fields = fields.as_dict()
+        penalties, crosscheck = self._crosscheck(
+            parsed_fields, declared_vendor, declared_amount, declared_date, confidence, config
+        )
         max_penalty = (
-            self.config.vendor_penalty
-            + self.config.amount_penalty
-            + self.config.date_penalty
-            + self.config.low_confidence_penalty
+            config.vendor_penalty + config.amount_penalty + config.date_penalty + config.low_confidence_penalty
         )
         match_score = max(0.0, 1 - (sum(penalties.values()) / max_penalty)) if max_penalty else 1.0
 
@@ -101,34 +152,25 @@ class DocumentOCRService:
             crosscheck_results=crosscheck,
             penalties=penalties,
             match_score=round(match_score, 3),
+            field_candidates=fields.candidates,
         )
 
-    def _parse_fields(self, text: str) -> Dict[str, Optional[str | float]]:
-        vendor = self._extract_vendor(text)
-        amount = self._extract_amount(text)
-        date = self._extract_date(text)
-        return {
-            "vendor": vendor,
-            "amount": amount,
-            "date": date,
-        }
-
-    def _extract_vendor(self, text: str) -> Optional[str]:
-        match = re.search(r"Vendor\s*:?\s*(.+)", text, re.IGNORECASE)
-        return match.group(1).strip() if match else None
+    def recognize(self, payload: bytes) -> OCRText:
+        """Raw OCR for a document, served from the cache when the same bytes were seen."""
 
-    def _extract_amount(self, text: str) -> Optional[float]:
-        match = re.search(r"(INR|Rs\.?|₹)\s*([0-9,]+\.?[0-9]*)", text, re.IGNORECASE)
-        if match:
-            return float(match.group(2).replace(",", ""))
-        match = re.search(r"Total\s*:?\s*([0-9,]+\.?[0-9]*)", text, re.IGNORECASE)
-        if match:
-            return float(match.group(1).replace(",", ""))
-        return None
+        provider = self.provider
+        if self.cache is None or not provider.cacheable:
+            return provider.recognize(payload)
+        digest, version = OCRCache.digest(payload), self.provider_version
+        cached = self.cache.get(digest, version)
+        if cached is not None:
+            return cached
+        recognized = provider.recognize(payload)
+        self.cache.put(digest, version, recognized)
+        return recognized
 
-    def _extract_date(self, text: str) -> Optional[str]:
-        match = re.search(r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})", text)
-        return match.group(1) if match else None
+    def _parse_fields(self, text: str) -> Dict[str, Optional[str | float]]:
+        return self.extractor.extract(text).as_dict()
 
     def _crosscheck(
         self,
@@ -137,34 +179,36 @@ class DocumentOCRService:
         declared_amount: Optional[float],
         declared_date: Optional[datetime],
         confidence: float,
+        config: Optional[OCRConfig] = None,
     ) -> tuple[Dict[str, float], Dict[str, Any]]:
+        config = config or self.config
         penalties: Dict[str, float] = {}
         vendor_match = False
         parsed_vendor = parsed.get("vendor")
         if parsed_vendor and declared_vendor:
             vendor_match = declared_vendor.lower() in parsed_vendor.lower()
         if declared_vendor and not vendor_match:
-            penalties["vendor_mismatch"] = self.config.vendor_penalty
+            penalties["vendor_mismatch"] = config.vendor_penalty
 
         amount_match = False
         parsed_amount = parsed.get("amount")
         if parsed_amount and declared_amount:
             diff = abs(float(parsed_amount) - declared_amount)
             if declared_amount:
-                amount_match = diff <= self.config.amount_tolerance_pct * declared_amount
+                amount_match = diff <= config.amount_tolerance_pct * declared_amount
         if declared_amount and not amount_match:
-            penalties["amount_mismatch"] = self.config.amount_penalty
+            penalties["amount_mismatch"] = config.amount_penalty
 
         date_match = True
         parsed_date_value = self._normalize_date(parsed.get("date"))
         if declared_date and parsed_date_value:
             delta_days = abs((parsed_date_value - declared_date).days)
-            date_match = delta_days <= self.config.date_tolerance_days
+            date_match = delta_days <= config.date_tolerance_days
         if declared_date and not date_match:
-            penalties["date_mismatch"] = self.config.date_penalty
+            penalties["date_mismatch"] = config.date_penalty
 
-        if confidence < self.config.provider_confidence_threshold:
-            penalties["low_confidence"] = self.config.low_confidence_penalty
+        if confidence < config.provider_confidence_threshold:
+            penalties["low_confidence"] = config.low_confidence_penalty
 
         crosscheck = {
             "vendor_match": vendor_match,
@@ -178,14 +222,7 @@ class DocumentOCRService:
         return penalties, crosscheck
 
     def _normalize_date(self, value: Optional[str | float]) -> Optional[datetime]:
-        if not value or not isinstance(value, str):
-            return None
-        for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d"):
-            try:
-                return datetime.strptime(value, fmt)
-            except ValueError:
-                continue
-        return None
+        return parse_date(value)
 
 
 __all__ = ["DocumentOCRService"]
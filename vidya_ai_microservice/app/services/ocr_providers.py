@@ -0,0 +1,489 @@
+"""Interchangeable OCR providers for the document layer.
+
+``VisionBatchClient`` batches documents into Google Vision REST calls,
+``GoogleVisionProvider`` batches them through the ``google-cloud-vision``
+gRPC client's ``batch_annotate_images``, and
+``TesseractProvider`` runs a local Tesseract binary on a process pool for
+offices without connectivity, after deskewing and binarising the page with
+OpenCV. All return plain ``OCRText`` records; ``NullOCRProvider`` is the
+empty-text fallback used when nothing else is available.
+"""
+
+from __future__ import annotations
+
+import base64
+import multiprocessing
+import shutil
+import subprocess
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import requests
+
+try:
+    import cv2  # type: ignore
+except Exception:  # pragma: no cover - cv2 may be missing
+    cv2 = None
+
+from ..config import OCRConfig
+from ..schemas import OCRText, OCRWord
+from ..utils.lazy import optional_module
+from ..utils.rate_limit import TokenBucket
+from .batching import MicroBatcher
+
+_VISION = optional_module("google.cloud.vision")
+
+# Skew beyond this is more likely a rotated page than a tilted photo
+_MAX_SKEW_DEGREES = 15.0
+
+
+class OCRProviderError(RuntimeError):
+    """Raised when a provider cannot recognise a document."""
+
+
+class VisionError(OCRProviderError):
+    """Raised when Vision cannot annotate a document."""
+
+
+class OCRProvider(ABC):
+    """Turns document bytes into ``OCRText``.
+
+    ``cacheable`` providers have their output stored in the ``OCRCache``;
+    ``parallel`` providers gain from receiving a case's documents at once.
+    """
+
+    name: str = "ocr"
+    version: str = "unknown"
+    cacheable = True
+    parallel = False
+
+    @abstractmethod
+    def recognize(self, payload: bytes) -> OCRText:
+        """Recognise one document; raises ``OCRProviderError`` on failure."""
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    def warm_up(self) -> None:
+        """Start pools or connections ahead of the first document."""
+
+    def close(self) -> None:
+        """Release provider resources."""
+
+
+class NullOCRProvider(OCRProvider):
+    """No OCR available: empty text at a neutral confidence, so only regex parsing runs."""
+
+    name = "regex-fallback"
+    version = "1"
+    cacheable = False
+
+    def recognize(self, payload: bytes) -> OCRText:
+        return OCRText(text="", confidence=0.5, provider=self.name)
+
+
+class _BatchedVision(OCRProvider):
+    """Gathers documents into Vision batches of up to ``vision_batch_size`` images.
+
+    Documents submitted from any thread (every document of a case, and of
+    all concurrent cases) are gathered by a ``MicroBatcher``, so a
+    multi-document case costs one round trip. A gathered batch is split
+    further so no request carries more than ``vision_batch_max_bytes`` of
+    base64 content; a document over the cap on its own is sent alone.
+    Calls are paced to ``vision_images_per_minute`` by a token bucket. An
+    error Vision reports for one image fails only that document; a failed
+    call fails the documents of that request.
+    """
+
+    name = "google-vision"
+    parallel = True
+
+    def __init__(self, config: OCRConfig) -> None:
+        self.config = config
+        self.limiter = TokenBucket(config.vision_images_per_minute / 60.0, burst=config.vision_batch_size)
+        self.batcher = MicroBatcher(
+            self._annotate_batch,
+            max_batch_size=config.vision_batch_size,
+            max_wait_ms=config.vision_batch_wait_ms,
+            name="vision-batcher",
+        )
+
+    def recognize(self, payload: bytes) -> OCRText:
+        return self.batcher(payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.batcher.stats()
+
+    def close(self) -> None:
+        self.batcher.close()
+
+    def _annotate_batch(self, payloads: Sequence[bytes]) -> List[OCRText | VisionError]:
+        results: List[OCRText | VisionError] = []
+        for request in _byte_bounded(payloads, self.config.vision_batch_max_bytes):
+            self.limiter.acquire(len(request))
+            try:
+                results.extend(self._annotate(request))
+            except VisionError as exc:
+                results.extend([exc] * len(request))
+        return results
+
+    @abstractmethod
+    def _annotate(self, payloads: Sequence[bytes]) -> List[OCRText | VisionError]:
+        """One Vision call for ``payloads``: a result or per-image error for each, in order."""
+
+
+class GoogleVisionProvider(_BatchedVision):
+    """``DOCUMENT_TEXT_DETECTION`` through the ``google-cloud-vision`` gRPC client.
+
+    Used with service-account or default credentials. Documents are batched
+    like ``VisionBatchClient`` batches them, with one
+    ``batch_annotate_images`` call per request.
+    """
+
+    def __init__(self, client: Any, config: OCRConfig) -> None:
+        super().__init__(config)
+        self.client = client
+        vision = _VISION.load()
+        self.version = str(getattr(vision, "__version__", "unknown"))
+        self._feature = {
+            "type_": vision.Feature.Type.DOCUMENT_TEXT_DETECTION if vision is not None else "DOCUMENT_TEXT_DETECTION"
+        }
+
+    def _annotate(self, payloads: Sequence[bytes]) -> List[OCRText | VisionError]:
+        batch_requests = [{"image": {"content": payload}, "features": [self._feature]} for payload in payloads]
+        try:
+            batch = self.client.batch_annotate_images(
+                requests=batch_requests, timeout=self.config.vision_timeout_seconds
+            )
+        except Exception as exc:  # google.api_core errors; the library may not be importable here
+            raise VisionError(f"Vision request failed: {exc}") from exc
+        responses = list(batch.responses)
+        if len(responses) != len(payloads):
+            raise VisionError(f"Vision returned {len(responses)} responses for {len(payloads)} images")
+        return [self._parse(response) for response in responses]
+
+    def _parse(self, response: Any) -> OCRText | VisionError:
+        if response.error.message:
+            return VisionError(response.error.message)
+        annotation = response.full_text_annotation
+        words: List[OCRWord] = []
+        symbol_confidences: List[float] = []
+        for page in annotation.pages:
+            for block in page.blocks:
+                for paragraph in block.paragraphs:
+                    for word in paragraph.words:
+                        symbol_confidences.extend(symbol.confidence for symbol in word.symbols)
+                        xs = [vertex.x for vertex in word.bounding_box.vertices]
+                        ys = [vertex.y for vertex in word.bounding_box.vertices]
+                        words.append(
+                            OCRWord(
+                                text="".join(symbol.text for symbol in word.symbols),
+                                confidence=float(word.confidence),
+                                bbox=[min(xs), min(ys), max(xs), max(ys)] if xs else [],
+                            )
+                        )
+        # Use average symbol confidence when available
+        confidence = float(sum(symbol_confidences) / len(symbol_confidences)) if symbol_confidences else 0.8
+        return OCRText(text=annotation.text, confidence=confidence, words=words, provider=self.name)
+
+
+class VisionBatchClient(_BatchedVision):
+    """Sends documents to Vision in ``images:annotate`` REST batches, authenticated by an API key."""
+
+    version = "v1-rest"
+
+    def __init__(self, api_key: str, config: OCRConfig, session: requests.Session | None = None) -> None:
+        super().__init__(config)
+        self.api_key = api_key
+        self.session = session or requests.Session()
+
+    def close(self) -> None:
+        super().close()
+        self.session.close()
+
+    def _annotate(self, payloads: Sequence[bytes]) -> List[OCRText | VisionError]:
+        body = {
+            "requests": [
+                {
+                    "image": {"content": base64.b64encode(payload).decode("ascii")},
+                    "features": [{"type": "DOCUMENT_TEXT_DETECTION"}],
+                }
+                for payload in payloads
+            ]
+        }
+        try:
+            response = self.session.post(
+                self.config.vision_endpoint,
+                params={"key": self.api_key},
+                json=body,
+                timeout=self.config.vision_timeout_seconds,
+            )
+        except requests.RequestException as exc:
+            raise VisionError(f"Vision request failed: {exc}") from exc
+        if not response.ok:
+            raise VisionError(f"Vision request failed (HTTP {response.status_code}): {response.text[:200]}")
+        responses = response.json().get("responses", [])
+        if len(responses) != len(payloads):
+            raise VisionError(f"Vision returned {len(responses)} responses for {len(payloads)} images")
+        return [self._parse(item) for item in responses]
+
+    def _parse(self, item: Dict[str, Any]) -> OCRText | VisionError:
+        error = item.get("error")
+        if error:
+            return VisionError(error.get("message") or f"Vision error code {error.get('code')}")
+        annotation = item.get("fullTextAnnotation") or {}
+        words: List[OCRWord] = []
+        symbol_confidences: List[float] = []
+        for page in annotation.get("pages", []):
+            for block in page.get("blocks", []):
+                for paragraph in block.get("paragraphs", []):
+                    for word in paragraph.get("words", []):
+                        symbols = word.get("symbols", [])
+                        symbol_confidences.extend(float(symbol.get("confidence", 0.0)) for symbol in symbols)
+                        # JSON omits zero coordinates
+                        vertices = word.get("boundingBox", {}).get("vertices", [])
+                        xs = [float(vertex.get("x", 0)) for vertex in vertices]
+                        ys = [float(vertex.get("y", 0)) for vertex in vertices]
+                        words.append(
+                            OCRWord(
+                                text="".join(symbol.get("text", "") for symbol in symbols),
+                                confidence=float(word.get("confidence", 0.0)),
+                                bbox=[min(xs), min(ys), max(xs), max(ys)] if xs else [],
+                            )
+                        )
+        confidence = sum(symbol_confidences) / len(symbol_confidences) if symbol_confidences else 0.8
+        return OCRText(text=annotation.get("text", ""), confidence=confidence, words=words, provider=self.name)
+
+
+def _byte_bounded(payloads: Sequence[bytes], max_bytes: int) -> List[Sequence[bytes]]:
+    """Split ``payloads`` in order into runs whose base64 length stays within ``max_bytes``."""
+
+    runs: List[Sequence[bytes]] = []
+    start, size = 0, 0
+    for index, payload in enumerate(payloads):
+        encoded = 4 * ((len(payload) + 2) // 3)
+        if index > start and size + encoded > max_bytes:
+            runs.append(payloads[start:index])
+            start, size = index, 0
+        size += encoded
+    if start < len(payloads):
+        runs.append(payloads[start:])
+    return runs
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Adaptive threshold to black text on white; copes with uneven phone-camera lighting."""
+
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 15)
+
+
+def estimate_skew(binary: np.ndarray) -> float:
+    """Angle in degrees (counter-clockwise positive) of the text lines on a binarised page."""
+
+    ink = cv2.findNonZero(255 - binary)
+    if ink is None or len(ink) < 50:
+        return 0.0
+    (_, _), (width, height), angle = cv2.minAreaRect(ink)
+    # Normalise OpenCV's rectangle angle to the tilt of its long (line) side
+    if width < height:
+        angle -= 90.0
+    angle = -((angle + 45.0) % 90.0 - 45.0)
+    return angle if abs(angle) <= _MAX_SKEW_DEGREES else 0.0
+
+
+def deskew(binary: np.ndarray) -> np.ndarray:
+    angle = estimate_skew(binary)
+    if abs(angle) < 0.1:
+        return binary
+    height, width = binary.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), -angle, 1.0)
+    return cv2.warpAffine(
+        binary, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=255
+    )
+
+
+def preprocess_page(payload: bytes) -> np.ndarray:
+    """Decode a document straight to grayscale, binarise it and straighten the text lines."""
+
+    gray = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise OCRProviderError("Document is not a decodable image")
+    return deskew(binarize(gray))
+
+
+def parse_tesseract_tsv(tsv: str) -> OCRText:
+    """Build ``OCRText`` from ``tesseract ... tsv`` output (word rows are level 5)."""
+
+    words: List[OCRWord] = []
+    lines: Dict[tuple, List[str]] = {}
+    for row in tsv.splitlines()[1:]:
+        columns = row.split("\t")
+        if len(columns) < 12 or columns[0] != "5" or not columns[11].strip():
+            continue
+        left, top, width, height = (float(value) for value in columns[6:10])
+        confidence = max(0.0, float(columns[10])) / 100.0
+        words.append(OCRWord(text=columns[11], confidence=confidence, bbox=[left, top, left + width, top + height]))
+        lines.setdefault(tuple(columns[1:5]), []).append(columns[11])
+    text = "\n".join(" ".join(line) for line in lines.values())
+    confidence = sum(word.confidence for word in words) / len(words) if words else 0.0
+    return OCRText(text=text, confidence=confidence, words=words, provider=TesseractProvider.name)
+
+
+def _tesseract_job(payload: bytes, command: str, lang: str, psm: int, timeout: float, preprocess: bool) -> OCRText:
+    """Process-pool entry point: pre-process the page and run Tesseract on it."""
+
+    if preprocess:
+        page = preprocess_page(payload)
+        ok, encoded = cv2.imencode(".png", page)
+        if not ok:
+            raise OCRProviderError("Could not encode the pre-processed page")
+        payload = encoded.tobytes()
+    try:
+        completed = subprocess.run(
+            [command, "stdin", "stdout", "-l", lang, "--psm", str(psm), "tsv"],
+            input=payload,
+            capture_output=True,
+            timeout=timeout,
+            check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        raise OCRProviderError(f"Tesseract failed: {exc}") from exc
+    if completed.returncode != 0:
+        raise OCRProviderError(f"Tesseract failed: {completed.stderr.decode('utf-8', 'replace')[:200]}")
+    return parse_tesseract_tsv(completed.stdout.decode("utf-8", "replace"))
+
+
+class TesseractProvider(OCRProvider):
+    """Local Tesseract on a process pool, for offices without Vision connectivity.
+
+    Each document is deskewed and binarised with OpenCV in a worker process
+    and piped to the ``tesseract`` binary, so neither the CPU-heavy
+    pre-processing nor the OCR run holds the API process's GIL. The pool
+    (``local_ocr_workers`` processes, spawned) starts on first use. A worker
+    that dies fails its document and the pool is replaced for the next one.
+    """
+
+    name = "tesseract"
+    parallel = True
+
+    def __init__(self, config: OCRConfig) -> None:
+        command = shutil.which(config.tesseract_cmd)
+        if command is None or cv2 is None:
+            raise OCRProviderError(f"Tesseract binary not found: {config.tesseract_cmd}")
+        self.command = command
+        self.config = config
+        self.version = self._read_version(command)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    @staticmethod
+    def _read_version(command: str) -> str:
+        try:
+            output = subprocess.run([command, "--version"], capture_output=True, timeout=10, check=False)
+        except (OSError, subprocess.TimeoutExpired) as exc:
+            raise OCRProviderError(f"Tesseract is not runnable: {exc}") from exc
+        first_line = (output.stdout or output.stderr).decode("utf-8", "replace").splitlines()[:1]
+        return first_line[0].split()[-1] if first_line else "unknown"
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.config.local_ocr_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._pool
+
+    def recognize(self, payload: bytes) -> OCRText:
+        config = self.config
+        pool = self._executor()
+        try:
+            return pool.submit(
+                _tesseract_job,
+                payload,
+                self.command,
+                config.tesseract_lang,
+                config.tesseract_psm,
+                config.local_ocr_timeout_seconds,
+                config.local_ocr_preprocess,
+            ).result()
+        except OCRProviderError:
+            raise
+        except BrokenProcessPool as exc:
+            # Not retried: the document may be what killed the worker
+            self._discard(pool)
+            raise OCRProviderError(f"Tesseract worker died: {exc}") from exc
+        except Exception as exc:
+            # e.g. cv2.error from pre-processing, re-raised here from the worker
+            raise OCRProviderError(f"Tesseract failed: {exc}") from exc
+
+    def _discard(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self) -> None:
+        self._executor()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def load_provider(
+    config: OCRConfig,
+    api_key: Optional[str] = None,
+    credentials_path: Optional[str] = None,
+) -> OCRProvider:
+    """Build the configured provider, falling back to ``NullOCRProvider``.
+
+    ``provider="auto"`` prefers Vision (REST with an API key, else the gRPC
+    client with service-account or default credentials, both batched) and
+    then local Tesseract.
+    """
+
+    choice = config.provider
+    if choice in ("auto", "google-vision"):
+        if api_key:
+            return VisionBatchClient(api_key, config)
+        vision = _VISION.load()
+        if vision is not None:
+            try:
+                if credentials_path:
+                    client = vision.ImageAnnotatorClient.from_service_account_file(credentials_path)
+                else:
+                    client = vision.ImageAnnotatorClient()
+                return GoogleVisionProvider(client, config)
+            except Exception:  # pragma: no cover - needs Google credentials
+                # Credentials missing; try the next provider
+                pass
+    if choice in ("auto", "tesseract"):
+        try:
+            return TesseractProvider(config)
+        except OCRProviderError:
+            pass
+    return NullOCRProvider()
+
+
+__all__ = [
+    "GoogleVisionProvider",
+    "NullOCRProvider",
+    "OCRProvider",
+    "OCRProviderError",
+    "TesseractProvider",
+    "VisionBatchClient",
+    "VisionError",
+    "binarize",
+    "deskew",
+    "estimate_skew",
+    "load_provider",
+    "parse_tesseract_tsv",
+    "preprocess_page",
+]
@@ -2,11 +2,18 @@
 
 from __future__ import annotations
 
-from typing import Dict
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar
+
+import numpy as np
 
 from ..config import (
+    ConfigSnapshot,
     DetectionConfig,
     DuplicateConfig,
+    ExecutionConfig,
     FraudRuleConfig,
     OCRConfig,
     QualityConfig,
@@ -14,18 +21,56 @@ from ..config import (
     WeightConfig,
     settings,
 )
-from ..schemas import EvidencePackage, ScoreBreakdown, ScoreResponse
-from ..utils.media_loader import MediaLoader
-from ..utils.state import LocalStateStore
-from .aggregation import RiskAggregator
-from .feature_engineering import FeatureEngineer
+from ..schemas import (
+    BatchScoreItem,
+    DuplicateResult,
+    EvidencePackage,
+    FraudFeatureVector,
+    FraudScoreResult,
+    ImageQualityResult,
+    OCRResult,
+    ObjectDetectionResult,
+    ScoreBreakdown,
+    ScoreResponse,
+    ScoreSummary,
+    ScoreView,
+    TierMove,
+    WeightSimulationResponse,
+)
+from ..utils.evidence import EvidenceContext
+from ..utils.layer_store import LayerOutputStore
+from ..utils.media_cache import MediaCache
+from ..utils.media_loader import MediaLoader, MediaLoaderError
+from ..utils.metrics import StageMetrics, StageTimings
+from ..utils.ocr_cache import OCRCache
+from ..utils.state import open_state_store
+from .aggregation import COMPONENTS, RISK_TIERS, RiskAggregator, tier_migration
+from .batching import MicroBatcher
+from .config_watcher import ConfigWatcher
+from .executor import StageExecutor
+from .feature_engineering import FEATURE_SCHEMA, FeatureEngineer, feature_row
 from .fraud_model import FraudScoringService
 from .hashing import DuplicateDetector
+from .model_registry import ModelRegistry
 from .object_detection import ObjectDetectionService
 from .ocr_processing import DocumentOCRService
 from .quality import ImageQualityAnalyzer
 
 
+Prefetched = Mapping[str, bytes | MediaLoaderError]
+ItemType = TypeVar("ItemType")
+ResultType = TypeVar("ResultType")
+
+
+@dataclass
+class _LayerResults:
+    quality: List[ImageQualityResult]
+    detection: List[ObjectDetectionResult]
+    ocr: List[OCRResult]
+    duplicates: List[DuplicateResult]
+    timings: StageTimings
+
+
 class VidyaAIPipeline:
     """Coordinates all processing layers and builds audit trail."""
 
@@ -38,9 +83,44 @@ class VidyaAIPipeline:
         ocr_cfg: OCRConfig,
         duplicate_cfg: DuplicateConfig,
         fraud_rules: FraudRuleConfig,
+        execution_cfg: ExecutionConfig | None = None,
+        metrics: StageMetrics | None = None,
     ):
-        self.loader = MediaLoader()
-        self.duplicate_state = LocalStateStore(settings.duplicate_state_path)
+        self.metrics = metrics or StageMetrics()
+        # Every case reads the live snapshot once; the watcher swaps in a new one when the weight file changes
+        self.configs = ConfigWatcher(
+            settings.weight_file,
+            ConfigSnapshot(
+                weights=weights,
+                thresholds=thresholds,
+                quality=quality_cfg,
+                detection=detection_cfg,
+                ocr=ocr_cfg,
+                duplicates=duplicate_cfg,
+                fraud_rules=fraud_rules,
+                execution=execution_cfg or ExecutionConfig(),
+            ),
+            poll_seconds=settings.config_reload_poll_seconds,
+        )
+        self.loader = MediaLoader(
+            timeout_seconds=settings.media_timeout_seconds,
+            max_bytes=settings.media_max_bytes,
+            pool_per_host=settings.media_pool_per_host,
+            retries=settings.media_fetch_retries,
+            backoff_factor=settings.media_retry_backoff,
+            cache=MediaCache(settings.media_cache_dir, settings.media_cache_max_bytes)
+            if settings.media_cache_dir
+            else None,
+            revalidate_cache=settings.media_cache_revalidate,
+            metrics=self.metrics,
+        )
+        self.execution = self.configs.current.execution
+        self.executor = StageExecutor(self.execution)
+        self.duplicate_state = open_state_store(
+            settings.state_backend,
+            json_path=settings.duplicate_state_path,
+            sqlite_path=settings.state_db_path,
+        )
         self.device_state = self.duplicate_state  # reuse same store for simplicity
 
         self.quality = ImageQualityAnalyzer(loader=self.loader, config=quality_cfg)
@@ -53,6 +133,10 @@ class VidyaAIPipeline:
             loader=self.loader,
             config=ocr_cfg,
             credentials_path=settings.google_credentials_path,
+            api_key=settings.google_api_key,
+            cache=OCRCache(settings.ocr_cache_path, settings.ocr_cache_ttl_seconds, settings.ocr_cache_max_bytes)
+            if settings.ocr_cache_path
+            else None,
         )
         self.duplicates = DuplicateDetector(
             loader=self.loader,
@@ -61,46 +145,322 @@ class VidyaAIPipeline:
         )
         self.features = FeatureEngineer(state_store=self.device_state, rules=fraud_rules)
         self.fraud = FraudScoringService(model_dir=settings.model_registry_path, rules=fraud_rules)
+        self.model_registry = ModelRegistry(self.fraud, poll_seconds=settings.model_registry_poll_seconds)
         self.aggregator = RiskAggregator(weights, thresholds)
+        self.layer_store = (
+            LayerOutputStore(
+                settings.layer_store_dir, COMPONENTS, FEATURE_SCHEMA, flush_rows=settings.layer_store_flush_rows
+            )
+            if settings.layer_store_dir
+            else None
+        )
+        # Fraud scoring for cases scored side by side in score_batch shares one model call
+        self.fraud_batcher = MicroBatcher(
+            self._score_fraud_batch,
+            max_batch_size=self.execution.fraud_batch_max_size,
+            max_wait_ms=self.execution.fraud_batch_max_wait_ms,
+            name="fraud-batcher",
+        )
+
+    def warm_up(self) -> None:
+        """Load every lazily imported backend now instead of on the first case."""
 
-    def update_weights(self, new_weights: WeightConfig) -> None:
+        self.detector.warm_up()
+        self.ocr.warm_up()
+        self.duplicates.warm_up()
+
+    def update_weights(self, new_weights: WeightConfig) -> ConfigSnapshot:
         self.aggregator.update_weights(new_weights)
+        return self.configs.update_weights(new_weights)
 
     def current_weights(self) -> WeightConfig:
-        return self.aggregator.weights
-
-    def score_case(self, payload: EvidencePackage) -> ScoreResponse:
-        quality_asset = self.quality.analyze_batch(payload.asset_images)
-        quality_docs = self.quality.analyze_batch(payload.doc_images)
-        quality_results = quality_asset + quality_docs
-
-        detection_results = self.detector.analyze(payload.asset_images, payload.metadata.declared_asset_type)
-        ocr_results = self.ocr.process_documents(
-            payload.doc_images,
-            payload.metadata.declared_vendor,
-            payload.metadata.declared_invoice_amount,
-            payload.metadata.declared_invoice_date,
-        )
-        duplicate_asset = self.duplicates.evaluate_images(payload.asset_images, payload.metadata.applicant_id, payload.case_id)
-        duplicate_docs = self.duplicates.evaluate_documents(payload.doc_images, payload.metadata.applicant_id, payload.case_id)
-        duplicate_results = duplicate_asset + duplicate_docs
+        return self.configs.current.weights
 
-        feature_vector = self.features.build_feature_vector(
-            package=payload,
-            quality=quality_results,
-            detection=detection_results,
-            ocr_results=ocr_results,
-            duplicates=duplicate_results,
+    def simulate_weights(
+        self,
+        weights: WeightConfig,
+        thresholds: ThresholdConfig | None = None,
+        sample: int = 20,
+    ) -> WeightSimulationResponse:
+        """Re-score every recorded case under ``weights`` and count how each moves between tiers.
+
+        Cases keep the components recorded when they were scored, so this
+        answers "what if these weights had been live" without re-running any
+        layer. Requires ``layer_store_dir``.
+        """
+
+        if self.layer_store is None:
+            raise RuntimeError("layer store is disabled; set LAYER_STORE_DIR to record cases")
+        started = time.perf_counter()
+        thresholds = thresholds or self.configs.current.thresholds
+        history = self.layer_store.snapshot()
+        scores = self.aggregator.score_many(history.components, weights)
+        tiers = self.aggregator.tier_many(scores, thresholds)
+        migration = tier_migration(history.tiers, tiers)
+        moved = [
+            TierMove(
+                case_id=history.case_ids[row],
+                recorded_score=float(history.scores[row]),
+                simulated_score=float(scores[row]),
+                recorded_tier=RISK_TIERS[history.tiers[row]],
+                simulated_tier=RISK_TIERS[tiers[row]],
+            )
+            for row in np.flatnonzero(history.tiers != tiers)[:sample]
+        ]
+        return WeightSimulationResponse(
+            cases=len(history),
+            changed=int(migration.sum() - np.trace(migration)),
+            weights=weights.model_dump(),
+            thresholds=thresholds.model_dump(),
+            tiers=list(RISK_TIERS),
+            migration=migration.tolist(),
+            recorded_counts=dict(zip(RISK_TIERS, migration.sum(axis=1).tolist())),
+            simulated_counts=dict(zip(RISK_TIERS, migration.sum(axis=0).tolist())),
+            mean_score_delta=round(float((scores - history.scores).mean()), 4) if len(history) else 0.0,
+            moved=moved,
+            elapsed_seconds=round(time.perf_counter() - started, 4),
         )
-        fraud_score = self.fraud.score(feature_vector)
 
+    def close(self) -> None:
+        """Stop the config watcher and write out buffered layer-store rows."""
+
+        self.configs.stop()
+        if self.layer_store is not None:
+            self.layer_store.close()
+
+    def score_case(
+        self,
+        payload: EvidencePackage,
+        prefetched: Optional[Prefetched] = None,
+        view: ScoreView = "audit",
+    ) -> ScoreSummary:
+        """Score one case; ``view`` picks the response shape (see ``ScoreResponse``)."""
+
+        snapshot = self.configs.current
+        layers = self._run_layers(payload, prefetched, snapshot)
+        feature_vector = self._feature_vector(payload, layers, snapshot)
+        with self.metrics.time("fraud", self._fraud_backend(), layers.timings):
+            fraud_score = self.fraud.score(feature_vector, snapshot.fraud_rules)
+        return self._build_response(payload, layers, feature_vector, fraud_score, snapshot, view)
+
+    def score_batch(
+        self,
+        payloads: Iterable[EvidencePackage],
+        prefetched: Optional[Mapping[str, Prefetched]] = None,
+        view: ScoreView = "audit",
+    ) -> Iterator[BatchScoreItem]:
+        """Score many cases, yielding one item per case in completion order.
+
+        Up to ``batch_max_in_flight`` cases run side by side, so their
+        detection frames and fraud feature vectors meet in the shared
+        micro-batchers. ``prefetched`` maps case id to that case's
+        prefetched media. An exception fails only its own case.
+        """
+
+        prefetched = prefetched or {}
+        limit = self.execution.batch_max_in_flight
+        pending: Dict[Future, Tuple[int, str]] = {}
+        with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="vidya-batch") as pool:
+            for index, payload in enumerate(payloads):
+                if len(pending) >= limit:
+                    yield from self._drain(pending)
+                future = pool.submit(self._score_batched, payload, prefetched.get(payload.case_id), view)
+                pending[future] = (index, payload.case_id)
+            while pending:
+                yield from self._drain(pending)
+
+    def _drain(self, pending: Dict[Future, Tuple[int, str]]) -> Iterator[BatchScoreItem]:
+        done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+        for future in done:
+            index, case_id = pending.pop(future)
+            try:
+                yield BatchScoreItem(index=index, case_id=case_id, status="ok", result=future.result())
+            except Exception as exc:
+                yield BatchScoreItem(index=index, case_id=case_id, status="error", error=str(exc))
+
+    def _score_batched(
+        self,
+        payload: EvidencePackage,
+        prefetched: Optional[Prefetched],
+        view: ScoreView,
+    ) -> ScoreSummary:
+        snapshot = self.configs.current
+        layers = self._run_layers(payload, prefetched, snapshot)
+        feature_vector = self._feature_vector(payload, layers, snapshot)
+        with self.metrics.time("fraud", self._fraud_backend(), layers.timings):
+            fraud_score = self.fraud_batcher((feature_vector, snapshot.fraud_rules))
+        return self._build_response(payload, layers, feature_vector, fraud_score, snapshot, view)
+
+    def _score_fraud_batch(
+        self, items: List[Tuple[FraudFeatureVector, FraudRuleConfig]]
+    ) -> List[FraudScoreResult]:
+        return self.fraud.score_many([vector for vector, _ in items], [rules for _, rules in items])
+
+    def _fraud_backend(self) -> str:
+        return "xgboost" if self.fraud.model is not None else "rules"
+
+    def _timed(
+        self,
+        stage: str,
+        timings: StageTimings,
+        fn: Callable[[ItemType], ResultType],
+        backend: Callable[[ResultType], str] | str = "default",
+        failed: Optional[Callable[[ResultType], bool]] = None,
+    ) -> Callable[[ItemType], ResultType]:
+        """Wrap a per-item layer call so each call lands in the stage histogram.
+
+        Layers catch their own errors and return a normal-looking result, so
+        ``failed`` tells from the result whether the call is an ``error``.
+        """
+
+        def run(item: ItemType) -> ResultType:
+            with self.metrics.time(stage, backend if isinstance(backend, str) else "default", timings) as span:
+                result = fn(item)
+                if not isinstance(backend, str):
+                    span.backend = backend(result)
+                if failed is not None and failed(result):
+                    span.outcome = "error"
+                return result
+
+        return run
+
+    def _run_layers(
+        self, payload: EvidencePackage, prefetched: Optional[Prefetched], snapshot: ConfigSnapshot
+    ) -> _LayerResults:
+        # One context per case: every layer shares the same fetched bytes and decoded frames
+        context = EvidenceContext(self.loader, prefetched)
+        timings = StageTimings()
+        metadata = payload.metadata
+        evidence = [*payload.asset_images, *payload.doc_images]
+        try:
+            # Independent layers fan out per item; feature engineering joins on all of them
+            quality_futures = self.executor.map(
+                "quality",
+                self._timed(
+                    "quality",
+                    timings,
+                    lambda item: self.quality.analyze_image(item, context, snapshot.quality),
+                    "opencv",
+                    # A load error is reported as a reason without any quality flag
+                    lambda result: bool(result.reason_if_fail) and not result.flags,
+                ),
+                evidence,
+            )
+            detection_futures = self.executor.map(
+                "detection",
+                self._timed(
+                    "detection",
+                    timings,
+                    lambda item: self.detector.analyze_image(
+                        item, metadata.declared_asset_type, context, snapshot.detection
+                    ),
+                    lambda result: str(result.details.get("mode", "default")),
+                    lambda result: "error" in result.details,
+                ),
+                payload.asset_images,
+            )
+            ocr_futures = self.executor.map(
+                "ocr",
+                self._timed(
+                    "ocr",
+                    timings,
+                    lambda item: self.ocr.process_document(
+                        item,
+                        metadata.declared_vendor,
+                        metadata.declared_invoice_amount,
+                        metadata.declared_invoice_date,
+                        context,
+                        snapshot.ocr,
+                    ),
+                    lambda _: self.ocr.mode,
+                    lambda result: "error" in result.crosscheck_results,
+                ),
+                payload.doc_images,
+            )
+            hash_futures = self.executor.map(
+                "duplicates",
+                self._timed(
+                    "hashing",
+                    timings,
+                    lambda item: self.duplicates.prepare_hash(item, context),
+                    "imagehash",
+                    lambda prepared: prepared[1] is not None,
+                ),
+                evidence,
+            )
+
+            quality_results = self.executor.gather(quality_futures)
+            detection_results = self.executor.gather(detection_futures)
+            ocr_results = self.executor.gather(ocr_futures)
+            prepared_hashes = self.executor.gather(hash_futures)
+            with self.metrics.time("state_write", settings.state_backend, timings):
+                duplicate_results = [
+                    self.duplicates.record_prepared(
+                        item,
+                        prepared,
+                        metadata.applicant_id,
+                        payload.case_id,
+                        metadata.org_id,
+                        metadata.scheme_code,
+                        snapshot.duplicates,
+                    )
+                    for item, prepared in zip(evidence, prepared_hashes)
+                ]
+        finally:
+            context.release()
+        return _LayerResults(quality_results, detection_results, ocr_results, duplicate_results, timings)
+
+    def _feature_vector(
+        self, payload: EvidencePackage, layers: _LayerResults, snapshot: ConfigSnapshot
+    ) -> FraudFeatureVector:
+        with self.metrics.time("features", timings=layers.timings):
+            return self.features.build_feature_vector(
+                package=payload,
+                quality=layers.quality,
+                detection=layers.detection,
+                ocr_results=layers.ocr,
+                duplicates=layers.duplicates,
+                rules=snapshot.fraud_rules,
+            )
+
+    def _build_response(
+        self,
+        payload: EvidencePackage,
+        layers: _LayerResults,
+        feature_vector: FraudFeatureVector,
+        fraud_score: FraudScoreResult,
+        snapshot: ConfigSnapshot,
+        view: ScoreView = "audit",
+    ) -> ScoreSummary:
+        quality_results, detection_results = layers.quality, layers.detection
+        ocr_results, duplicate_results = layers.ocr, layers.duplicates
         aggregate = self.aggregator.aggregate(
             quality=quality_results,
             detection=detection_results,
             ocr_results=ocr_results,
             duplicates=duplicate_results,
             fraud_score=fraud_score,
+            weights=snapshot.weights,
+            thresholds=snapshot.thresholds,
         )
+        if self.layer_store is not None:
+            components = aggregate["components"]
+            self.layer_store.record(
+                payload.case_id,
+                np.array([components[name] for name in COMPONENTS], dtype=np.float64),
+                feature_row(feature_vector),
+                aggregate["final_risk_score"],
+                RISK_TIERS.index(aggregate["risk_tier"]),
+            )
+        decision = {
+            "case_id": payload.case_id,
+            "final_risk_score": aggregate["final_risk_score"],
+            "risk_tier": aggregate["risk_tier"],
+            "routing_decision": aggregate["routing_decision"],
+            "config_version": snapshot.label,
+        }
+        if view == "summary":
+            return ScoreSummary(**decision)
 
         breakdown = ScoreBreakdown(
             image_quality=quality_results,
@@ -111,24 +471,22 @@ class VidyaAIPipeline:
             xgboost=fraud_score,
         )
 
-        explanation: Dict[str, object] = {
-            "image_quality": [result.model_dump() for result in quality_results],
-            "object_detection": [result.model_dump() for result in detection_results],
-            "ocr": [result.model_dump() for result in ocr_results],
-            "duplicates": [result.model_dump() for result in duplicate_results],
-            "fraud_features": feature_vector.model_dump(),
-            "fraud_score": fraud_score.model_dump(),
-            "aggregation_components": aggregate["components"],
-        }
+        explanation: Dict[str, object] = {"aggregation_components": aggregate["components"]}
+        if view == "audit":
+            # The audit trail repeats every layer result as plain dicts
+            explanation = {
+                "image_quality": [result.model_dump() for result in quality_results],
+                "object_detection": [result.model_dump() for result in detection_results],
+                "ocr": [result.model_dump() for result in ocr_results],
+                "duplicates": [result.model_dump() for result in duplicate_results],
+                "fraud_features": feature_vector.model_dump(),
+                "fraud_score": fraud_score.model_dump(),
+                **explanation,
+            }
+        if snapshot.execution.explain_stage_timings:
+            explanation["stage_timings"] = layers.timings.as_dict()
 
-        return ScoreResponse(
-            case_id=payload.case_id,
-            scores=breakdown,
-            final_risk_score=aggregate["final_risk_score"],
-            risk_tier=aggregate["risk_tier"],
-            routing_decision=aggregate["routing_decision"],
-            full_explanation=explanation,
-        )
+        return ScoreResponse(**decision, scores=breakdown, full_explanation=explanation)
 
 
 __all__ = ["VidyaAIPipeline"]
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from statistics import mean
-from typing import List
+from typing import Iterable, List, Optional
 
 import numpy as np
 
@@ -14,38 +14,64 @@ except Exception:  # pragma: no cover - OpenCV may be unavailable in CI
 
 from ..config import QualityConfig
 from ..schemas import EvidenceImage, ImageQualityResult
+from ..utils.evidence import EvidenceContext
 from ..utils.media_loader import MediaLoader, MediaLoaderError
 
 
 class ImageQualityAnalyzer:
-    """Evaluates blur, lighting, and resolution for evidence images."""
+    """Evaluates blur, lighting, and resolution for evidence images.
+
+    By default the grayscale frame is converted from the shared colour
+    frame. With ``decode_mode="gray"`` images are decoded straight to grayscale,
+    at half resolution when ``decode_scale`` is 2; resolution is then read
+    from the image header. How Laplacian variance changes with scale depends
+    on the content (calibration saw ratios from 0.25 to about 12), so no
+    fixed factor keeps the blur decision. The half-scale frame is trusted
+    only when its variance clears the threshold by ``blur_scale_max_ratio``
+    and its contrast (a lower bound of the full-resolution contrast) clears
+    that threshold; anything else is measured on the full-resolution frame,
+    so flags and scores match a full decode. On the fast path the reported
+    blur variance is the same conservative lower bound.
+    """
 
     def __init__(self, loader: MediaLoader, config: QualityConfig) -> None:
         self.loader = loader
         self.config = config
 
-    def analyze_batch(self, images: List[EvidenceImage]) -> List[ImageQualityResult]:
-        results: List[ImageQualityResult] = []
-        for image in images:
-            try:
-                payload = self.loader.load_image_bytes(image)
-                results.append(self._analyze_single(image, payload))
-            except MediaLoaderError as exc:
-                results.append(
-                    ImageQualityResult(
-                        image_id=image.id,
-                        quality_score=0.0,
-                        blur_variance=0.0,
-                        brightness=0.0,
-                        contrast=0.0,
-                        resolution_ok=False,
-                        reason_if_fail=str(exc),
-                    )
-                )
-        return results
-
-    def _analyze_single(self, evidence: EvidenceImage, payload: bytes) -> ImageQualityResult:
+    def analyze_batch(
+        self,
+        images: List[EvidenceImage],
+        context: Optional[EvidenceContext] = None,
+    ) -> List[ImageQualityResult]:
+        context = context or EvidenceContext(self.loader)
+        return [self.analyze_image(image, context) for image in images]
+
+    def analyze_image(
+        self,
+        image: EvidenceImage,
+        context: EvidenceContext,
+        config: Optional[QualityConfig] = None,
+    ) -> ImageQualityResult:
+        """Score one image; ``config`` (a case's snapshot section) defaults to the analyzer's own."""
+
+        try:
+            return self._analyze_single(image, context, config or self.config)
+        except MediaLoaderError as exc:
+            return ImageQualityResult(
+                image_id=image.id,
+                quality_score=0.0,
+                blur_variance=0.0,
+                brightness=0.0,
+                contrast=0.0,
+                resolution_ok=False,
+                reason_if_fail=str(exc),
+            )
+
+    def _analyze_single(
+        self, evidence: EvidenceImage, context: EvidenceContext, config: QualityConfig
+    ) -> ImageQualityResult:
         if not cv2:
+            context.payload(evidence)
             # Basic fallback when OpenCV is missing
             return ImageQualityResult(
                 image_id=evidence.id,
@@ -59,30 +85,38 @@ class ImageQualityAnalyzer:
                 reason_if_fail="OpenCV not installed; defaulting to neutral score",
             )
 
-        array = np.frombuffer(payload, dtype=np.uint8)
-        frame = cv2.imdecode(array, cv2.IMREAD_COLOR)
-        if frame is None:
-            raise MediaLoaderError(f"Failed to decode image {evidence.id}")
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blur_variance = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        if config.decode_mode == "gray":
+            gray = context.decoded_gray(evidence, config.decode_scale)
+            width, height = context.dimensions(evidence) if config.decode_scale > 1 else gray.shape[::-1]
+            blur_variance = laplacian_variance(gray)
+            contrast_value = float(np.std(gray))
+            if config.decode_scale > 1:
+                blur_variance /= config.blur_scale_max_ratio
+                if blur_variance < config.blur_variance_threshold or contrast_value < config.contrast_threshold:
+                    # Too close to call at half scale
+                    gray = context.decoded_gray(evidence, 1)
+                    blur_variance = laplacian_variance(gray)
+                    contrast_value = float(np.std(gray))
+        else:
+            gray = context.gray(evidence)
+            height, width = gray.shape
+            blur_variance = laplacian_variance(gray)
+            contrast_value = float(np.std(gray))
         brightness = float(np.mean(gray))
-        contrast_value = float(np.std(gray))
-        height, width = gray.shape
-        resolution_ok = width >= self.config.min_width and height >= self.config.min_height
+        resolution_ok = width >= config.min_width and height >= config.min_height
 
         flags: List[str] = []
 
         blur_score = 1.0
-        if blur_variance < self.config.blur_variance_threshold:
-            blur_score = max(0.0, blur_variance / self.config.blur_variance_threshold)
+        if blur_variance < config.blur_variance_threshold:
+            blur_score = max(0.0, blur_variance / config.blur_variance_threshold)
             flags.append("blurry")
 
-        brightness_score = self._normalize_brightness(brightness, flags)
+        brightness_score = self._normalize_brightness(brightness, flags, config)
 
         contrast_score = 1.0
-        if contrast_value < self.config.contrast_threshold:
-            contrast_score = max(0.0, contrast_value / self.config.contrast_threshold)
+        if contrast_value < config.contrast_threshold:
+            contrast_score = max(0.0, contrast_value / config.contrast_threshold)
             flags.append("low_contrast")
 
         resolution_score = 1.0 if resolution_ok else 0.0
@@ -90,7 +124,7 @@ class ImageQualityAnalyzer:
             flags.append("low_resolution")
 
         quality_score = mean([blur_score, brightness_score, contrast_score, resolution_score])
-        officer_flag = quality_score < self.config.officer_review_quality_threshold
+        officer_flag = quality_score < config.officer_review_quality_threshold
         reason = ", ".join(flags) if flags else None
 
         return ImageQualityResult(
@@ -105,9 +139,9 @@ class ImageQualityAnalyzer:
             reason_if_fail=reason,
         )
 
-    def _normalize_brightness(self, brightness: float, flags: List[str]) -> float:
-        low = self.config.brightness_dark_threshold
-        high = self.config.brightness_bright_threshold
+    def _normalize_brightness(self, brightness: float, flags: List[str], config: QualityConfig) -> float:
+        low = config.brightness_dark_threshold
+        high = config.brightness_bright_threshold
         if brightness <= low:
             flags.append("too_dark")
             return max(0.0, brightness / max(low, 1.0))
@@ -117,4 +151,29 @@ class ImageQualityAnalyzer:
         return 1.0
 
 
-__all__ = ["ImageQualityAnalyzer"]
+def laplacian_variance(gray: np.ndarray) -> float:
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def calibrate_blur_scale(payloads: Iterable[bytes], scale: int = 2) -> float:
+    """Largest ratio of reduced-scale to full-resolution Laplacian variance.
+
+    Feed it a representative sample of evidence photos (sharp and blurred)
+    and store the result as ``quality.blur_scale_max_ratio``.
+    """
+
+    flags = {2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+    ratios = []
+    for payload in payloads:
+        buffer = np.frombuffer(payload, dtype=np.uint8)
+        full = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+        reduced = cv2.imdecode(buffer, flags[scale]) if scale > 1 else full
+        if full is None or reduced is None:
+            continue
+        full_variance = laplacian_variance(full)
+        if full_variance > 0:
+            ratios.append(laplacian_variance(reduced) / full_variance)
+    return round(max(ratios), 3) if ratios else 1.0
+
+
+__all__ = ["ImageQualityAnalyzer", "calibrate_blur_scale", "laplacian_variance"]
@@ -1,13 +1,39 @@
 """Utility exports for VIDYA AI."""
 
 from .media_loader import MediaLoader, MediaLoaderError
-from .state import LocalStateStore
+from .evidence import EvidenceContext
+from .media_cache import MediaCache
+from .metrics import StageMetrics, StageTimings
+from .ocr_cache import OCRCache
+from .rate_limit import TokenBucket
+from .lazy import OptionalModule, import_report, optional_module
+from .layer_store import LayerOutputStore, LayerSnapshot
+from .job_store import InMemoryJobStore, JobStore, SQLiteJobStore, open_job_store
+from .state import LocalStateStore, SQLiteStateStore, StateStore, open_state_store
 from .geospatial import gps_deviation, haversine_distance_km
 
 __all__ = [
+    "EvidenceContext",
+    "InMemoryJobStore",
+    "JobStore",
+    "LayerOutputStore",
+    "LayerSnapshot",
+    "SQLiteJobStore",
+    "open_job_store",
+    "MediaCache",
+    "OCRCache",
+    "OptionalModule",
+    "StageMetrics",
+    "StageTimings",
+    "import_report",
+    "optional_module",
     "MediaLoader",
     "MediaLoaderError",
     "LocalStateStore",
+    "SQLiteStateStore",
+    "StateStore",
+    "TokenBucket",
+    "open_state_store",
     "gps_deviation",
     "haversine_distance_km",
 ]
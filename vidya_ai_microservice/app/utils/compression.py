@@ -0,0 +1,69 @@
+"""Content negotiation and compression for JSON score responses."""
+
+from __future__ import annotations
+
+import gzip
+from typing import Optional
+
+from starlette.responses import Response
+
+from .lazy import optional_module
+
+_BROTLI = optional_module("brotli")
+
+# Below this a compressed body is rarely smaller once headers are counted
+MIN_COMPRESS_BYTES = 512
+# Mid-range levels: most of the size win at a fraction of the CPU of the maximum
+_BROTLI_QUALITY = 5
+_GZIP_LEVEL = 6
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header, or ``None``.
+
+    Brotli wins when the client accepts it and the ``brotli`` package is
+    installed; codings refused with ``q=0`` are skipped.
+    """
+
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    if ("br" in accepted or "*" in accepted) and _BROTLI.available() and _BROTLI.load() is not None:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return _BROTLI.load().compress(body, quality=_BROTLI_QUALITY)  # type: ignore[union-attr]
+    return gzip.compress(body, compresslevel=_GZIP_LEVEL)
+
+
+def json_response(
+    body: bytes | str,
+    accept_encoding: str = "",
+    status_code: int = 200,
+    media_type: str = "application/json",
+) -> Response:
+    """Wrap an already serialised JSON body, compressing it when the client allows."""
+
+    content = body.encode("utf-8") if isinstance(body, str) else body
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding) if len(content) >= MIN_COMPRESS_BYTES else None
+    if encoding:
+        content = compress(content, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, status_code=status_code, media_type=media_type, headers=headers)
+
+
+__all__ = ["MIN_COMPRESS_BYTES", "compress", "json_response", "negotiate_encoding"]
@@ -0,0 +1,241 @@
+"""Per-case evidence context sharing fetched payloads and decoded views."""
+
+from __future__ import annotations
+
+from io import BytesIO
+from threading import Lock
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import cv2  # type: ignore
+except Exception:  # pragma: no cover - OpenCV may be unavailable in CI
+    cv2 = None
+
+from ..schemas import EvidenceDocument, EvidenceImage, EvidenceVideo
+from .media_loader import MediaLoader, MediaLoaderError
+
+Evidence = EvidenceImage | EvidenceDocument | EvidenceVideo
+
+_GRAY_DECODE_FLAGS: Dict[int, int] = (
+    {
+        1: cv2.IMREAD_GRAYSCALE,
+        2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+        4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+        8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    }
+    if cv2 is not None
+    else {}
+)
+
+# Orientations 5-8 rotate the stored pixels by 90 or 270 degrees
+_EXIF_ORIENTATION = 0x0112
+
+
+class _EvidenceEntry:
+    """Lazily populated views for a single evidence item."""
+
+    __slots__ = ("lock", "payload", "bgr", "gray", "pil", "error", "decode_error", "reduced", "size")
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.payload: Optional[bytes] = None
+        self.bgr: Optional[np.ndarray] = None
+        self.gray: Optional[np.ndarray] = None
+        self.pil: Optional[Image.Image] = None
+        # A failed fetch fails every view; a failed decode only the pixel views,
+        # so the raw bytes still reach OCR providers that read formats cv2 cannot
+        self.error: Optional[MediaLoaderError] = None
+        self.decode_error: Optional[MediaLoaderError] = None
+        self.reduced: Dict[int, np.ndarray] = {}
+        self.size: Optional[Tuple[int, int]] = None
+
+
+class EvidenceContext:
+    """Fetches each evidence payload once per case and decodes it at most once.
+
+    Every layer of the pipeline asks the context for the view it needs (raw
+    bytes, BGR frame, grayscale frame or PIL image). Pixel views are derived
+    from the single decoded BGR frame; the PIL image is opened from the raw
+    bytes, as perceptual hashes have always been computed. Load and decode
+    failures are remembered separately so a broken URL is not retried by
+    each layer. Items are keyed by kind and id, since asset images and
+    documents number their ids independently. Payloads already downloaded in
+    parallel (see ``MediaLoader.prefetch_package_async``, keyed by URL) can
+    be handed in up front. ``decoded_gray`` decodes straight to grayscale, optionally at
+    1/2, 1/4 or 1/8 scale, for layers that never need colour. Layers may run concurrently, so
+    each item is guarded by its own lock and only the first caller does work.
+    """
+
+    def __init__(
+        self,
+        loader: MediaLoader,
+        prefetched: Optional[Mapping[str, bytes | MediaLoaderError]] = None,
+    ) -> None:
+        self.loader = loader
+        self._prefetched = dict(prefetched or {})
+        self._entries: Dict[Tuple[str, str], _EvidenceEntry] = {}
+        self._lock = Lock()
+
+    def payload(self, evidence: Evidence) -> bytes:
+        entry = self._entry(evidence)
+        with entry.lock:
+            return self._payload(evidence, entry)
+
+    def bgr(self, evidence: Evidence) -> np.ndarray:
+        entry = self._entry(evidence)
+        with entry.lock:
+            return self._bgr(evidence, entry)
+
+    def gray(self, evidence: Evidence) -> np.ndarray:
+        entry = self._entry(evidence)
+        with entry.lock:
+            if entry.gray is None:
+                frame = self._bgr(evidence, entry)
+                entry.gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            return entry.gray
+
+    def decoded_gray(self, evidence: Evidence, scale: int = 1) -> np.ndarray:
+        """Grayscale frame decoded directly from the payload at ``1/scale`` resolution.
+
+        Unlike ``gray`` this never builds the colour frame, and JPEG payloads
+        are downscaled inside the decoder, so a 12 MP photo costs a fraction
+        of a full decode. At full scale a colour frame another layer already
+        decoded is converted instead of decoding the payload again.
+        """
+
+        entry = self._entry(evidence)
+        with entry.lock:
+            frame = entry.reduced.get(scale)
+            if frame is None and scale == 1 and entry.bgr is not None:
+                if entry.gray is None:
+                    entry.gray = cv2.cvtColor(entry.bgr, cv2.COLOR_BGR2GRAY)
+                frame = entry.gray
+            if frame is None:
+                if cv2 is None:
+                    raise MediaLoaderError("OpenCV not installed; cannot decode images")
+                if entry.decode_error is not None:
+                    raise entry.decode_error
+                buffer = np.frombuffer(self._payload(evidence, entry), dtype=np.uint8)
+                frame = cv2.imdecode(buffer, _GRAY_DECODE_FLAGS[scale])
+                if frame is None:
+                    entry.decode_error = MediaLoaderError(f"Failed to decode image {evidence.id}")
+                    raise entry.decode_error
+                entry.reduced[scale] = frame
+            return frame
+
+    def dimensions(self, evidence: Evidence) -> Tuple[int, int]:
+        """Full-resolution ``(width, height)`` read from the image header only.
+
+        The size is reported after EXIF orientation, as cv2 decodes the frame.
+        """
+
+        entry = self._entry(evidence)
+        with entry.lock:
+            if entry.size is None:
+                if entry.bgr is not None:
+                    entry.size = (entry.bgr.shape[1], entry.bgr.shape[0])
+                else:
+                    try:
+                        with Image.open(BytesIO(self._payload(evidence, entry))) as image:
+                            width, height = image.size
+                            rotated = image.getexif().get(_EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+                        entry.size = (height, width) if rotated else (width, height)
+                    except MediaLoaderError:
+                        raise
+                    except Exception:
+                        frame = self._bgr(evidence, entry)
+                        entry.size = (frame.shape[1], frame.shape[0])
+            return entry.size
+
+    def pil(self, evidence: Evidence) -> Image.Image:
+        entry = self._entry(evidence)
+        with entry.lock:
+            if entry.pil is None:
+                # Not from the cv2 frame: imdecode applies EXIF orientation, which would change stored pHashes
+                entry.pil = self._open_pil(evidence, entry)
+            return entry.pil
+
+    def release(self) -> None:
+        """Drop all cached payloads and frames once the case is scored."""
+
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": len(self._entries),
+            "decoded": sum(1 for entry in self._entries.values() if entry.bgr is not None),
+            "decoded_gray": sum(len(entry.reduced) for entry in self._entries.values()),
+            "errors": sum(1 for entry in self._entries.values() if entry.error is not None),
+            "decode_errors": sum(1 for entry in self._entries.values() if entry.decode_error is not None),
+        }
+
+    def _entry(self, evidence: Evidence) -> _EvidenceEntry:
+        key = (_kind(evidence), evidence.id)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.setdefault(key, _EvidenceEntry())
+        return entry
+
+    def _payload(self, evidence: Evidence, entry: _EvidenceEntry) -> bytes:
+        if entry.error is not None:
+            raise entry.error
+        if entry.payload is None:
+            fetched = self._prefetched.get(str(evidence.url)) if _remote(evidence) else None
+            if isinstance(fetched, MediaLoaderError):
+                entry.error = fetched
+                raise fetched
+            if fetched is not None:
+                entry.payload = fetched
+                return fetched
+            try:
+                entry.payload = self.loader.load_image_bytes(evidence)  # type: ignore[arg-type]
+            except MediaLoaderError as exc:
+                entry.error = exc
+                raise
+        return entry.payload
+
+    def _bgr(self, evidence: Evidence, entry: _EvidenceEntry) -> np.ndarray:
+        if entry.bgr is None:
+            if cv2 is None:
+                raise MediaLoaderError("OpenCV not installed; cannot decode images")
+            if entry.decode_error is not None:
+                raise entry.decode_error
+            frame = cv2.imdecode(np.frombuffer(self._payload(evidence, entry), dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                entry.decode_error = MediaLoaderError(f"Failed to decode image {evidence.id}")
+                raise entry.decode_error
+            entry.bgr = frame
+        return entry.bgr
+
+    def _open_pil(self, evidence: Evidence, entry: _EvidenceEntry) -> Image.Image:
+        try:
+            image = Image.open(BytesIO(self._payload(evidence, entry)))
+            image.load()
+        except MediaLoaderError:
+            raise
+        except Exception as exc:
+            raise MediaLoaderError(f"Failed to decode image {evidence.id}: {exc}") from exc
+        return image
+
+
+def _kind(evidence: Evidence) -> str:
+    # EvidenceDocument subclasses EvidenceImage, so it is checked first
+    if isinstance(evidence, EvidenceDocument):
+        return "document"
+    if isinstance(evidence, EvidenceVideo):
+        return "video"
+    return "image"
+
+
+def _remote(evidence: Evidence) -> bool:
+    """Whether the payload comes from ``url``, matching ``MediaLoader._resolve_payload``."""
+
+    return bool(evidence.url) and not evidence.base64_data and not getattr(evidence, "file_path", None)
+
+
+__all__ = ["EvidenceContext"]
@@ -0,0 +1,281 @@
+"""Persistence for asynchronous scoring jobs.
+
+``InMemoryJobStore`` keeps jobs in process memory; ``SQLiteJobStore``
+persists them so queued work survives a restart and can be shared by
+several worker processes. Both hand out queued jobs in submission order
+and move each to ``running`` exactly once. A SQLite claim is a lease held
+by the claiming store; only jobs whose lease ran out go back to the queue.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from ..schemas import EvidencePackage, ScoreJob
+
+ClaimedJob = Tuple[ScoreJob, EvidencePackage]
+
+
+class JobStore(ABC):
+    """Interface shared by all job queue backends.
+
+    ``lease_seconds`` is set by backends whose claims expire; the queue then
+    renews its leases and requeues expired ones every third of that period.
+    """
+
+    lease_seconds: Optional[float] = None
+
+    @abstractmethod
+    def add(self, job: ScoreJob, payload: EvidencePackage) -> None:
+        """Persist a new ``queued`` job with its evidence package."""
+
+    @abstractmethod
+    def claim(self) -> Optional[ClaimedJob]:
+        """Mark the oldest queued job as running and return it, if any."""
+
+    @abstractmethod
+    def save(self, job: ScoreJob) -> None:
+        """Persist the job's status, result and callback outcome."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[ScoreJob]:
+        """Return a job by id."""
+
+    @abstractmethod
+    def depth(self) -> int:
+        """Number of queued plus running jobs."""
+
+    @abstractmethod
+    def requeue_expired(self) -> int:
+        """Return ``running`` jobs whose claim lease ran out (a dead worker's) to the queue."""
+
+    def renew_leases(self) -> int:
+        """Extend the leases of the jobs this store is running; returns how many."""
+
+        return 0
+
+    @abstractmethod
+    def prune(self, finished_before: datetime) -> int:
+        """Delete finished jobs older than ``finished_before``."""
+
+    def close(self) -> None:
+        """Release backend resources."""
+
+
+class InMemoryJobStore(JobStore):
+    """Thread-safe job store that lives only as long as the process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, ScoreJob]" = OrderedDict()
+        self._payloads: Dict[str, EvidencePackage] = {}
+        self._queued: Deque[str] = deque()
+        self._running = 0
+
+    def add(self, job: ScoreJob, payload: EvidencePackage) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._payloads[job.job_id] = payload
+            self._queued.append(job.job_id)
+
+    def claim(self) -> Optional[ClaimedJob]:
+        with self._lock:
+            if not self._queued:
+                return None
+            job_id = self._queued.popleft()
+            job = self._jobs[job_id].model_copy(update={"status": "running", "started_at": datetime.utcnow()})
+            self._jobs[job_id] = job
+            self._running += 1
+            return job, self._payloads.pop(job_id)
+
+    def save(self, job: ScoreJob) -> None:
+        with self._lock:
+            previous = self._jobs.get(job.job_id)
+            if previous is not None and previous.status == "running" and job.status != "running":
+                self._running -= 1
+            self._jobs[job.job_id] = job
+
+    def get(self, job_id: str) -> Optional[ScoreJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._queued) + self._running
+
+    def requeue_expired(self) -> int:
+        # Nothing survives a restart in memory, and no other process shares the jobs
+        return 0
+
+    def prune(self, finished_before: datetime) -> int:
+        with self._lock:
+            stale = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < finished_before
+            ]
+            for job_id in stale:
+                del self._jobs[job_id]
+            return len(stale)
+
+
+class SQLiteJobStore(JobStore):
+    """SQLite-backed job store (WAL mode); queued jobs survive restarts.
+
+    ``claim`` records this store's ``owner`` id and a lease ending
+    ``lease_seconds`` later. Live stores renew their leases, so another
+    worker process (or a restarted one) sharing the file only requeues jobs
+    whose owner stopped renewing.
+    """
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            finished_at TEXT,
+            payload TEXT,
+            job TEXT NOT NULL,
+            owner TEXT,
+            lease_until REAL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)",
+    )
+
+    def __init__(self, path: Path, lease_seconds: float = 60.0, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.clock = clock
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            for statement in self._SCHEMA:
+                connection.execute(statement)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}
+            # Databases created before claims carried leases
+            for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    def add(self, job: ScoreJob, payload: EvidencePackage) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, status, created_at, payload, job) VALUES (?, ?, ?, ?, ?)",
+                (job.job_id, job.status, job.created_at.isoformat(), payload.model_dump_json(), job.model_dump_json()),
+            )
+
+    def claim(self) -> Optional[ClaimedJob]:
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT job_id, payload, job FROM jobs WHERE status = 'queued' ORDER BY created_at, rowid LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, payload, stored = row
+            job = ScoreJob.model_validate_json(stored).model_copy(
+                update={"status": "running", "started_at": datetime.utcnow()}
+            )
+            connection.execute(
+                "UPDATE jobs SET status = 'running', job = ?, owner = ?, lease_until = ? WHERE job_id = ?",
+                (job.model_dump_json(), self.owner, self.clock() + self.lease_seconds, job_id),
+            )
+        return job, EvidencePackage.model_validate_json(payload)
+
+    def save(self, job: ScoreJob) -> None:
+        finished = job.status in ("succeeded", "failed")
+        with self._connection() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, job = ?, payload = CASE WHEN ? THEN NULL ELSE payload END "
+                "WHERE job_id = ?",
+                (
+                    job.status,
+                    job.finished_at.isoformat() if job.finished_at else None,
+                    job.model_dump_json(),
+                    finished,
+                    job.job_id,
+                ),
+            )
+
+    def get(self, job_id: str) -> Optional[ScoreJob]:
+        row = self._connection().execute("SELECT job FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return ScoreJob.model_validate_json(row[0]) if row else None
+
+    def depth(self) -> int:
+        (count,) = self._connection().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchone()
+        return int(count)
+
+    def requeue_expired(self) -> int:
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            rows = connection.execute(
+                "SELECT job_id, job FROM jobs WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)",
+                (self.clock(),),
+            ).fetchall()
+            for job_id, stored in rows:
+                job = ScoreJob.model_validate_json(stored).model_copy(update={"status": "queued", "started_at": None})
+                connection.execute(
+                    "UPDATE jobs SET status = 'queued', job = ?, owner = NULL, lease_until = NULL WHERE job_id = ?",
+                    (job.model_dump_json(), job_id),
+                )
+        return len(rows)
+
+    def renew_leases(self) -> int:
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_until = ? WHERE status = 'running' AND owner = ?",
+                (self.clock() + self.lease_seconds, self.owner),
+            )
+        return cursor.rowcount
+
+    def prune(self, finished_before: datetime) -> int:
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (finished_before.isoformat(),)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def open_job_store(backend: str, sqlite_path: Path, lease_seconds: float = 60.0) -> JobStore:
+    if backend == "sqlite":
+        return SQLiteJobStore(sqlite_path, lease_seconds=lease_seconds)
+    if backend == "memory":
+        return InMemoryJobStore()
+    raise ValueError(f"Unknown job store backend: {backend}")
+
+
+__all__ = ["JobStore", "InMemoryJobStore", "SQLiteJobStore", "open_job_store"]
@@ -0,0 +1,367 @@
+"""Columnar store of per-case layer outputs for what-if re-scoring."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover - advisory locks are POSIX only
+    fcntl = None
+
+_SEGMENT_GLOB = "segment-*.npz"
+_COMPACT_LOCK = "compact.lock"
+
+
+@dataclass(frozen=True)
+class LayerSnapshot:
+    """Consistent copy of the store's columns, one row per case."""
+
+    case_ids: Tuple[str, ...]
+    scored_at: np.ndarray
+    components: np.ndarray
+    features: np.ndarray
+    scores: np.ndarray
+    tiers: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.case_ids)
+
+
+class LayerOutputStore:
+    """Aggregation components and fraud features of every scored case, kept as columns.
+
+    Rows live in preallocated NumPy columns (float64 components so a re-run
+    of the live weights reproduces the recorded scores, float32 features,
+    int8 tier codes) and a re-scored case overwrites its row. Columns are
+    matched by name on load, so a segment written before a feature was
+    added reads that feature as NaN.
+
+    Every process sharing ``directory`` (one per uvicorn worker) writes its
+    own ``segment-<writer>-<n>.npz`` files, where ``writer`` is unique to the
+    store instance, and holds ``writer-<writer>.lock`` for its lifetime.
+    Changed rows are written by a background thread once ``flush_rows`` are
+    pending, and on ``close``. Segments are merged by ``scored_at``, so the
+    newest row of a case wins whichever process wrote it, and ``snapshot``
+    first picks up segments other processes wrote since the last call.
+    Once a writer has more than ``compact_segments`` files it rewrites the
+    rows it owns as one segment, under an advisory lock on the directory.
+    Files of writers that have exited (their lock is free) are adopted by
+    the next compaction, so they do not pile up across restarts.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        component_names: Sequence[str],
+        feature_names: Sequence[str],
+        flush_rows: int = 256,
+        compact_segments: int = 16,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.component_names = tuple(component_names)
+        self.feature_names = tuple(feature_names)
+        self.flush_rows = max(1, flush_rows)
+        self.compact_segments = compact_segments
+        self.writer = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.failed: Optional[str] = None
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._case_ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._dirty: Dict[int, None] = {}
+        self._owned: Dict[int, None] = {}
+        self._own_segments: List[Path] = []
+        self._seen: Dict[str, None] = {}
+        self._next_segment = 0
+        self._allocate(1024)
+        self._writer_lock = _hold_lock(self.directory / f"writer-{self.writer}.lock")
+        self.refresh()
+        if len(self._orphans()) > self.compact_segments:
+            self.compact()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vidya-layer-store", daemon=True)
+        self._thread.start()
+
+    def _allocate(self, capacity: int) -> None:
+        self._scored_at = np.zeros(capacity, dtype=np.float64)
+        self._components = np.zeros((capacity, len(self.component_names)), dtype=np.float64)
+        self._features = np.full((capacity, len(self.feature_names)), np.nan, dtype=np.float32)
+        self._scores = np.zeros(capacity, dtype=np.float64)
+        self._tiers = np.zeros(capacity, dtype=np.int8)
+
+    def _grow(self) -> None:
+        size = len(self._case_ids)
+        columns = (self._scored_at, self._components, self._features, self._scores, self._tiers)
+        self._allocate(len(self._scored_at) * 2)
+        for target, source in zip(
+            (self._scored_at, self._components, self._features, self._scores, self._tiers), columns
+        ):
+            target[:size] = source[:size]
+
+    def __len__(self) -> int:
+        return len(self._case_ids)
+
+    def record(
+        self,
+        case_id: str,
+        components: np.ndarray,
+        features: np.ndarray,
+        score: float,
+        tier: int,
+        scored_at: float | None = None,
+    ) -> None:
+        """Store (or replace) one case's row; rows are written out in batches off the calling thread."""
+
+        with self._lock:
+            row = self._row(case_id)
+            self._scored_at[row] = time.time() if scored_at is None else scored_at
+            self._components[row] = components
+            self._features[row] = features
+            self._scores[row] = score
+            self._tiers[row] = tier
+            self._dirty[row] = None
+            self._owned[row] = None
+            pending = len(self._dirty)
+        if pending >= self.flush_rows:
+            self._wake.set()
+
+    def _row(self, case_id: str) -> int:
+        row = self._index.get(case_id)
+        if row is None:
+            if len(self._case_ids) == len(self._scored_at):
+                self._grow()
+            row = self._index[case_id] = len(self._case_ids)
+            self._case_ids.append(case_id)
+        return row
+
+    def snapshot(self) -> LayerSnapshot:
+        self.refresh()
+        with self._lock:
+            size = len(self._case_ids)
+            return LayerSnapshot(
+                case_ids=tuple(self._case_ids),
+                scored_at=self._scored_at[:size].copy(),
+                components=self._components[:size].copy(),
+                features=self._features[:size].copy(),
+                scores=self._scores[:size].copy(),
+                tiers=self._tiers[:size].copy(),
+            )
+
+    def refresh(self) -> int:
+        """Merge segments written by other processes since the last call; returns how many were read."""
+
+        loaded = 0
+        with self._io_lock:
+            present = sorted(self.directory.glob(_SEGMENT_GLOB))
+            for path in present:
+                if path.name in self._seen:
+                    continue
+                try:
+                    self._load_segment(path)
+                except FileNotFoundError:
+                    # Compacted away meanwhile; its rows are in the writer's new segment
+                    continue
+                self._seen[path.name] = None
+                loaded += 1
+            names = {path.name for path in present}
+            self._seen = {name: None for name in self._seen if name in names}
+        return loaded
+
+    def flush(self) -> None:
+        """Write pending rows now, compacting this writer's segments if needed."""
+
+        with self._io_lock:
+            self._flush()
+            if len(self._own_segments) > self.compact_segments:
+                self._compact()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.flush()
+            except (OSError, ValueError) as exc:
+                self.failed = str(exc)
+
+    def _flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = np.fromiter(self._dirty, dtype=np.intp, count=len(self._dirty))
+            columns = self._columns(rows)
+            self._dirty.clear()
+        try:
+            self._write_segment(columns)
+        except OSError:
+            with self._lock:
+                self._dirty.update(dict.fromkeys(rows.tolist()))
+            raise
+        self.failed = None
+
+    def _columns(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        return {
+            "case_ids": np.array([self._case_ids[row] for row in rows], dtype=str),
+            "scored_at": self._scored_at[rows],
+            "components": self._components[rows],
+            "features": self._features[rows],
+            "scores": self._scores[rows],
+            "tiers": self._tiers[rows],
+        }
+
+    def _write_segment(self, columns: Dict[str, np.ndarray]) -> Path:
+        path = self.directory / f"segment-{self.writer}-{self._next_segment:06d}.npz"
+        partial = path.with_suffix(".tmp")
+        with open(partial, "wb") as handle:
+            np.savez(
+                handle,
+                component_names=np.array(self.component_names, dtype=str),
+                feature_names=np.array(self.feature_names, dtype=str),
+                **columns,
+            )
+        os.replace(partial, path)
+        self._next_segment += 1
+        self._seen[path.name] = None
+        self._own_segments.append(path)
+        return path
+
+    def _load_segment(self, path: Path) -> np.ndarray:
+        with np.load(path) as segment:
+            case_ids = segment["case_ids"].tolist()
+            scored_at = segment["scored_at"]
+            components = _by_name(segment["components"], segment["component_names"], self.component_names, 0.0)
+            features = _by_name(segment["features"], segment["feature_names"], self.feature_names, np.nan)
+            scores, tiers = segment["scores"], segment["tiers"]
+        with self._lock:
+            # Case ids are unique within a segment, so each column is one scatter
+            rows = np.fromiter((self._row(case_id) for case_id in case_ids), dtype=np.intp, count=len(case_ids))
+            newer = scored_at >= self._scored_at[rows]
+            target = rows[newer]
+            self._scored_at[target] = scored_at[newer]
+            self._components[target] = components[newer]
+            self._features[target] = features[newer]
+            self._scores[target] = scores[newer]
+            self._tiers[target] = tiers[newer]
+        return rows
+
+    def compact(self) -> None:
+        """Rewrite the rows this writer owns as one segment and remove its older files."""
+
+        with self._io_lock:
+            self._flush()
+            self._compact()
+
+    def _compact(self) -> None:
+        with _locked(self.directory / _COMPACT_LOCK):
+            adopted: List[Path] = []
+            for path, lock in self._orphans():
+                try:
+                    rows = self._load_segment(path)
+                except FileNotFoundError:
+                    continue
+                with self._lock:
+                    self._owned.update(dict.fromkeys(rows.tolist()))
+                adopted.append(path)
+                if lock is not None:
+                    adopted.append(lock)
+            stale = self._own_segments
+            self._own_segments = []
+            with self._lock:
+                owned = np.fromiter(self._owned, dtype=np.intp, count=len(self._owned))
+                columns = self._columns(np.sort(owned)) if len(owned) else None
+            if columns is not None:
+                self._write_segment(columns)
+            for path in (*stale, *adopted):
+                path.unlink(missing_ok=True)
+
+    def _orphans(self) -> List[Tuple[Path, Optional[Path]]]:
+        """Segments whose writer has exited, with that writer's lock file if there is one."""
+
+        orphans: List[Tuple[Path, Optional[Path]]] = []
+        alive: Dict[str, bool] = {self.writer: True}
+        for path in sorted(self.directory.glob(_SEGMENT_GLOB)):
+            # segment-<pid>-<hex>-<n>; single-process stores named them segment-<n>
+            writer = path.stem[len("segment-"):].rpartition("-")[0]
+            lock = self.directory / f"writer-{writer}.lock" if writer else None
+            if writer not in alive:
+                alive[writer] = lock is not None and lock.exists() and not _lock_is_free(lock)
+            if not alive[writer]:
+                orphans.append((path, lock))
+        return orphans
+
+    def stats(self) -> Dict[str, int | str | None]:
+        with self._lock:
+            return {
+                "cases": len(self._case_ids),
+                "pending_rows": len(self._dirty),
+                "segments": len(self._own_segments),
+                "writer": self.writer,
+                "failed": self.failed,
+            }
+
+    def close(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._writer_lock.close()
+        (self.directory / f"writer-{self.writer}.lock").unlink(missing_ok=True)
+
+
+def _hold_lock(path: Path) -> IO[bytes]:
+    handle = open(path, "ab")
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    return handle
+
+
+def _lock_is_free(path: Path) -> bool:
+    if fcntl is None:
+        # Without advisory locks a live writer cannot be told from an exited one
+        return False
+    try:
+        with open(path, "ab") as handle:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    except FileNotFoundError:
+        return True
+    return True
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    with open(path, "ab") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _by_name(values: np.ndarray, stored: np.ndarray, wanted: Sequence[str], fill: float) -> np.ndarray:
+    names = stored.tolist()
+    if tuple(names) == tuple(wanted):
+        return values
+    result = np.full((len(values), len(wanted)), fill, dtype=values.dtype)
+    for column, name in enumerate(wanted):
+        if name in names:
+            result[:, column] = values[:, names.index(name)]
+    return result
+
+
+__all__ = ["LayerOutputStore", "LayerSnapshot"]
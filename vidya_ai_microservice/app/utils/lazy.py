@@ -0,0 +1,86 @@
+"""Lazy, memoised imports for optional heavy dependencies."""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import time
+from threading import Lock
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+
+class OptionalModule:
+    """An optional dependency imported on first ``load()`` and never again.
+
+    ``available()`` answers from ``importlib.util.find_spec`` without
+    executing the module, and both answers are memoised, so health checks
+    cost a dict lookup. Import time and failures are kept for the startup
+    report.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = Lock()
+        self._module: Optional[ModuleType] = None
+        self._attempted = False
+        self._available: Optional[bool] = None
+        self.import_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def available(self) -> bool:
+        if self._module is not None:
+            return True
+        if self._available is None:
+            try:
+                self._available = importlib.util.find_spec(self.name) is not None
+            except (ImportError, ValueError):
+                self._available = False
+        return self._available
+
+    def load(self) -> Optional[ModuleType]:
+        if self._attempted:
+            return self._module
+        with self._lock:
+            if not self._attempted:
+                started = time.perf_counter()
+                try:
+                    self._module = importlib.import_module(self.name)
+                except Exception as exc:  # pragma: no cover - depends on the environment
+                    self.error = f"{type(exc).__name__}: {exc}"
+                self.import_seconds = round(time.perf_counter() - started, 4)
+                self._attempted = True
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "available": self.available(),
+            "loaded": self.loaded,
+            "import_seconds": self.import_seconds,
+            "error": self.error,
+        }
+
+
+_MODULES: Dict[str, OptionalModule] = {}
+_MODULES_LOCK = Lock()
+
+
+def optional_module(name: str) -> OptionalModule:
+    """Return the shared ``OptionalModule`` for ``name``."""
+
+    module = _MODULES.get(name)
+    if module is None:
+        with _MODULES_LOCK:
+            module = _MODULES.setdefault(name, OptionalModule(name))
+    return module
+
+
+def import_report() -> Dict[str, Dict[str, Any]]:
+    return {name: module.status() for name, module in sorted(_MODULES.items())}
+
+
+__all__ = ["OptionalModule", "import_report", "optional_module"]
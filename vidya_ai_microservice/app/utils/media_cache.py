@@ -0,0 +1,150 @@
+"""Content-addressed on-disk cache for downloaded evidence media."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional
+
+
+class MediaCache:
+    """Size-bounded LRU cache of media payloads stored on local disk.
+
+    Entries are addressed by the SHA-256 of ``url + ETag``. A small per-URL
+    pointer file remembers the last ETag seen so a re-scored case can be
+    served without any network round trip. Files are written through unique
+    temporary names and renamed into place, so concurrent writers never see
+    a partial entry, and recency is tracked via file mtimes, so the LRU
+    order survives restarts.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._objects = self.root / "objects"
+        self._urls = self.root / "urls"
+        self._objects.mkdir(parents=True, exist_ok=True)
+        self._urls.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._scan()
+
+    @staticmethod
+    def key_for_url(url: str, etag: Optional[str] = None) -> str:
+        return hashlib.sha256(f"{url}\n{etag or ''}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+        try:
+            payload = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._forget(key)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return payload
+
+    def put(self, key: str, payload: bytes) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, payload)
+        with self._lock:
+            self._forget(key)
+            self._index[key] = len(payload)
+            self._size += len(payload)
+            self._evict()
+
+    def get_url(self, url: str) -> Optional[bytes]:
+        """Return the cached payload for the last ETag seen on ``url``."""
+
+        etag = self.url_etag(url)
+        if etag is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        return self.get(self.key_for_url(url, etag))
+
+    def put_url(self, url: str, etag: Optional[str], payload: bytes) -> None:
+        self.put(self.key_for_url(url, etag), payload)
+        _write_atomic(self._url_pointer(url), (etag or "").encode("utf-8"))
+
+    def url_etag(self, url: str) -> Optional[str]:
+        try:
+            return self._url_pointer(url).read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _scan(self) -> None:
+        entries = []
+        for path in self._objects.glob("*/*"):
+            if path.suffix == ".tmp":
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+        with self._lock:
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            self.evictions += 1
+            self._path(key).unlink(missing_ok=True)
+
+    def _forget(self, key: str) -> None:
+        size = self._index.pop(key, None)
+        if size is not None:
+            self._size -= size
+
+    def _path(self, key: str) -> Path:
+        return self._objects / key[:2] / key
+
+    def _url_pointer(self, url: str) -> Path:
+        return self._urls / hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: Path, payload: bytes) -> None:
+    # A unique name per write: threads of one process would collide on a pid suffix
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False) as handle:
+        handle.write(payload)
+    try:
+        os.replace(handle.name, path)
+    except OSError:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+
+
+__all__ = ["MediaCache"]
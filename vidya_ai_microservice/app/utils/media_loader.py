@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from ..schemas import EvidenceDocument, EvidenceImage, EvidenceVideo
+from ..schemas import EvidenceDocument, EvidenceImage, EvidencePackage, EvidenceVideo
+from .media_cache import MediaCache
+from .metrics import StageMetrics
 
 
 class MediaLoaderError(RuntimeError):
@@ -16,10 +22,58 @@ class MediaLoaderError(RuntimeError):
 
 
 class MediaLoader:
-    """Helper to fetch media bytes from URLs, disk, or embedded payloads."""
-
-    def __init__(self, timeout_seconds: int = 10):
+    """Helper to fetch media bytes from URLs, disk, or embedded payloads.
+
+    URL downloads go through one pooled keep-alive ``requests.Session`` so
+    repeated fetches from the same object-store hosts reuse connections.
+    Bodies are streamed and capped at ``max_bytes``; transient failures are
+    retried with exponential backoff. With a ``MediaCache`` attached, URLs
+    already downloaded are served from disk without touching the network
+    (or, with ``revalidate_cache``, after a conditional ``If-None-Match``).
+    With ``metrics`` attached, every URL fetch is timed as the
+    ``media_fetch`` stage, labelled ``cache`` or ``http``.
+    """
+
+    _CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        timeout_seconds: int = 10,
+        max_bytes: int = 25 * 1024 * 1024,
+        pool_per_host: int = 8,
+        retries: int = 3,
+        backoff_factor: float = 0.3,
+        cache: Optional[MediaCache] = None,
+        revalidate_cache: bool = False,
+        metrics: Optional[StageMetrics] = None,
+    ):
         self.timeout_seconds = timeout_seconds
+        self.cache = cache
+        self.revalidate_cache = revalidate_cache
+        self.metrics = metrics
+        self.max_bytes = max_bytes
+        self.pool_per_host = max(1, pool_per_host)
+        self.session = self._build_session(retries, backoff_factor)
+
+    def _build_session(self, retries: int, backoff_factor: float) -> requests.Session:
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        # pool_block caps concurrent connections per host instead of opening extras
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=self.pool_per_host,
+            pool_block=True,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     def _load_from_base64(self, encoded: str) -> bytes:
         return base64.b64decode(encoded.encode("utf-8"))
@@ -31,10 +85,60 @@ class MediaLoader:
         return path.read_bytes()
 
     def _load_from_url(self, url: str) -> bytes:
-        response = requests.get(url, timeout=self.timeout_seconds)
-        if not response.ok:
-            raise MediaLoaderError(f"Failed to download media: {url}")
-        return response.content
+        if self.metrics is None:
+            return self._fetch_url(url)[0]
+        with self.metrics.time("media_fetch", "http") as span:
+            payload, span.backend = self._fetch_url(url)
+            return payload
+
+    def _fetch_url(self, url: str) -> Tuple[bytes, str]:
+        """Return the payload and where it came from (``cache`` or ``http``)."""
+
+        if self.cache is None:
+            return self._download(url)[0], "http"  # type: ignore[return-value]
+
+        headers = None
+        if self.revalidate_cache:
+            etag = self.cache.url_etag(url)
+            headers = {"If-None-Match": etag} if etag else None
+        else:
+            cached = self.cache.get_url(url)
+            if cached is not None:
+                return cached, "cache"
+        payload, etag = self._download(url, headers)
+        if payload is None:
+            # 304 Not Modified: serve our copy, or re-download if it was evicted meanwhile
+            cached = self.cache.get_url(url)
+            if cached is not None:
+                return cached, "cache"
+            payload, etag = self._download(url)
+        self.cache.put_url(url, etag, payload)
+        return payload, "http"  # type: ignore[return-value]
+
+    def _download(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[Optional[bytes], Optional[str]]:
+        """Fetch ``url``; returns ``(None, etag)`` when the server answers 304."""
+
+        try:
+            with self.session.get(url, timeout=self.timeout_seconds, stream=True, headers=headers) as response:
+                etag = response.headers.get("ETag")
+                if response.status_code == 304 and headers:
+                    return None, etag
+                if not response.ok:
+                    raise MediaLoaderError(f"Failed to download media: {url} (HTTP {response.status_code})")
+                declared = response.headers.get("Content-Length")
+                if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                    raise MediaLoaderError(f"Media exceeds {self.max_bytes} bytes: {url}")
+                return self._read_capped(response, url), etag
+        except requests.RequestException as exc:
+            raise MediaLoaderError(f"Failed to download media: {url} ({exc})") from exc
+
+    def _read_capped(self, response: requests.Response, url: str) -> bytes:
+        buffer = bytearray()
+        for chunk in response.iter_content(chunk_size=self._CHUNK_SIZE):
+            buffer.extend(chunk)
+            if len(buffer) > self.max_bytes:
+                raise MediaLoaderError(f"Media exceeds {self.max_bytes} bytes: {url}")
+        return bytes(buffer)
 
     def load_image_bytes(self, evidence: EvidenceImage) -> bytes:
         return self._resolve_payload(evidence)
@@ -45,6 +149,49 @@ class MediaLoader:
     def load_video_bytes(self, evidence: EvidenceVideo) -> bytes:
         return self._resolve_payload(evidence)
 
+    async def fetch_urls_async(self, urls: Iterable[str]) -> Dict[str, bytes | MediaLoaderError]:
+        """Download many URLs in parallel, bounded per host by the pool size.
+
+        Downloads run on worker threads through the pooled session so the
+        event loop stays free; failures are returned per URL rather than
+        raised, so one broken link does not cancel the rest.
+        """
+
+        unique = list(dict.fromkeys(urls))
+        limits: Dict[str, asyncio.Semaphore] = {}
+
+        async def fetch(url: str) -> bytes | MediaLoaderError:
+            host = urlsplit(url).netloc
+            limit = limits.setdefault(host, asyncio.Semaphore(self.pool_per_host))
+            async with limit:
+                try:
+                    return await asyncio.to_thread(self._load_from_url, url)
+                except MediaLoaderError as exc:
+                    return exc
+
+        results = await asyncio.gather(*(fetch(url) for url in unique))
+        return dict(zip(unique, results))
+
+    async def prefetch_package_async(self, package: EvidencePackage) -> Dict[str, bytes | MediaLoaderError]:
+        """Fetch every URL-backed image and document of a package, keyed by URL.
+
+        Keys are URLs rather than evidence ids because asset images and
+        documents number their ids independently.
+        """
+
+        remote = [
+            item
+            for item in (*package.asset_images, *package.doc_images)
+            if item.url and not item.base64_data and not item.file_path
+        ]
+        return await self.fetch_urls_async(str(item.url) for item in remote)
+
+    def cache_stats(self) -> Optional[Dict[str, int]]:
+        return self.cache.stats() if self.cache else None
+
+    def close(self) -> None:
+        self.session.close()
+
     def _resolve_payload(self, evidence: EvidenceImage | EvidenceDocument | EvidenceVideo) -> bytes:
         if evidence.base64_data:
             return self._load_from_base64(evidence.base64_data)
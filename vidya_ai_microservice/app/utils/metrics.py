@@ -0,0 +1,115 @@
+"""Per-stage latency instrumentation exported as Prometheus histograms."""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .lazy import optional_module
+
+_PROMETHEUS = optional_module("prometheus_client")
+
+# Seconds; spans a cached media hit up to a slow Vision call or cold YOLO batch
+STAGE_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class StageSpan:
+    """Labels of one timed call; the caller may refine ``backend``/``outcome`` inside the block."""
+
+    __slots__ = ("stage", "backend", "outcome")
+
+    def __init__(self, stage: str, backend: str) -> None:
+        self.stage = stage
+        self.backend = backend
+        self.outcome = "ok"
+
+
+class StageTimings:
+    """Wall-clock time per stage for a single case, summed over its evidence items."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._seconds: Dict[str, float] = {}
+        self._calls: Dict[str, int] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._seconds[stage] = self._seconds.get(stage, 0.0) + seconds
+            self._calls[stage] = self._calls.get(stage, 0) + 1
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                stage: {"seconds": round(seconds, 4), "calls": self._calls[stage]}
+                for stage, seconds in self._seconds.items()
+            }
+
+
+class StageMetrics:
+    """Records stage durations in a ``vidya_stage_duration_seconds`` histogram.
+
+    The histogram is labelled by ``stage``, ``backend`` (e.g. ``yolov8`` or
+    ``fallback``) and ``outcome`` (``ok``/``error``) and lives in its own
+    registry, together with the process CPU/memory collector. Without
+    ``prometheus_client`` installed, observations are dropped and only the
+    per-case ``StageTimings`` are kept.
+    """
+
+    def __init__(self, registry: Any = None, buckets: Tuple[float, ...] = STAGE_BUCKETS) -> None:
+        prometheus = _PROMETHEUS.load()
+        self.registry = None
+        self._histogram = None
+        if prometheus is None:
+            return
+        if registry is None:
+            registry = prometheus.CollectorRegistry()
+            prometheus.ProcessCollector(registry=registry)
+        self.registry = registry
+        self._histogram = prometheus.Histogram(
+            "vidya_stage_duration_seconds",
+            "Time spent in each VIDYA pipeline stage.",
+            ("stage", "backend", "outcome"),
+            buckets=buckets,
+            registry=registry,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self._histogram is not None
+
+    def observe(self, stage: str, backend: str, outcome: str, seconds: float) -> None:
+        if self._histogram is not None:
+            self._histogram.labels(stage=stage, backend=backend, outcome=outcome).observe(seconds)
+
+    @contextmanager
+    def time(
+        self,
+        stage: str,
+        backend: str = "default",
+        timings: Optional[StageTimings] = None,
+    ) -> Iterator[StageSpan]:
+        span = StageSpan(stage, backend)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.outcome = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(span.stage, span.backend, span.outcome, elapsed)
+            if timings is not None:
+                timings.add(span.stage, elapsed)
+
+    def exposition(self) -> Tuple[bytes, str]:
+        """Return the text exposition and its content type for ``/metrics``."""
+
+        prometheus = _PROMETHEUS.load()
+        if prometheus is None or self.registry is None:
+            raise RuntimeError("prometheus_client is not installed")
+        return prometheus.generate_latest(self.registry), prometheus.CONTENT_TYPE_LATEST
+
+
+__all__ = ["STAGE_BUCKETS", "StageMetrics", "StageSpan", "StageTimings"]
@@ -0,0 +1,158 @@
+"""Persistent cache of OCR provider output keyed by document content."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from ..schemas import OCRText
+
+
+class OCRCache:
+    """SQLite cache of ``OCRText`` keyed by document SHA-256 and provider version.
+
+    Re-submitted invoices are served without another provider call; a new
+    provider version misses naturally. Entries expire ``ttl_seconds`` after
+    they were stored, and once the stored JSON exceeds ``max_bytes`` the
+    least recently used entries are evicted down to 90% of the bound. Only
+    the recognised text is cached: parsing and cross-checks against the
+    declared values always run fresh.
+    """
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS ocr_cache (
+            digest TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            size INTEGER NOT NULL,
+            result TEXT NOT NULL,
+            PRIMARY KEY (digest, provider)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_used ON ocr_cache (last_used)",
+    )
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: float = 30 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            for statement in self._SCHEMA:
+                connection.execute(statement)
+        self._size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+
+    @staticmethod
+    def digest(payload: bytes) -> str:
+        return hashlib.sha256(payload).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    def get(self, digest: str, provider: str) -> Optional[OCRText]:
+        now = self.clock()
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT result FROM ocr_cache WHERE digest = ? AND provider = ? AND created_at > ?",
+            (digest, provider, now - self.ttl_seconds),
+        ).fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        connection.execute(
+            "UPDATE ocr_cache SET last_used = ? WHERE digest = ? AND provider = ?", (now, digest, provider)
+        )
+        with self._lock:
+            self.hits += 1
+        return OCRText.model_validate_json(row[0])
+
+    def put(self, digest: str, provider: str, result: OCRText) -> None:
+        encoded = result.model_dump_json()
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+        now = self.clock()
+        connection = self._connection()
+        with self._lock, connection:
+            previous = connection.execute(
+                "SELECT size FROM ocr_cache WHERE digest = ? AND provider = ?", (digest, provider)
+            ).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO ocr_cache (digest, provider, created_at, last_used, size, result) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, provider, now, now, size, encoded),
+            )
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict(connection, now)
+
+    def _evict(self, connection: sqlite3.Connection, now: float) -> None:
+        expired = connection.execute(
+            "DELETE FROM ocr_cache WHERE created_at <= ? RETURNING size", (now - self.ttl_seconds,)
+        ).fetchall()
+        self._drop(expired)
+        excess = self._size - int(self.max_bytes * 0.9)
+        victims, freed = [], 0
+        cursor = connection.execute("SELECT digest, provider, size FROM ocr_cache ORDER BY last_used")
+        for digest, provider, size in cursor:
+            if freed >= excess:
+                break
+            victims.append((digest, provider))
+            freed += size
+        cursor.close()
+        connection.executemany("DELETE FROM ocr_cache WHERE digest = ? AND provider = ?", victims)
+        self._size -= freed
+        self.evictions += len(victims)
+
+    def _drop(self, rows) -> None:
+        self._size -= sum(row[0] for row in rows)
+        self.evictions += len(rows)
+
+    def purge_expired(self) -> int:
+        connection = self._connection()
+        with self._lock, connection:
+            expired = connection.execute(
+                "DELETE FROM ocr_cache WHERE created_at <= ? RETURNING size", (self.clock() - self.ttl_seconds,)
+            ).fetchall()
+            self._drop(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "bytes": self._size}
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+__all__ = ["OCRCache"]
@@ -0,0 +1,53 @@
+"""Blocking token-bucket rate limiter for outbound provider quotas."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Allows ``rate`` tokens per second with bursts of up to ``burst`` tokens.
+
+    ``acquire`` blocks the calling thread until enough tokens are available,
+    so callers are paced to the quota instead of collecting 429s. Requests
+    larger than ``burst`` are allowed once the bucket is full.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take ``tokens``, waiting as needed; returns the seconds spent waiting."""
+
+        needed = min(tokens, self.burst)
+        waited = 0.0
+        with self._lock:
+            while True:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+                self.sleep(delay)
+                waited += delay
+
+
+__all__ = ["TokenBucket"]
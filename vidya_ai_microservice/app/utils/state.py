@@ -1,15 +1,111 @@
-"""Simple JSON-backed state tracking for duplicates and device usage."""
+"""Pluggable state tracking for duplicates and device usage.
+
+Two backends share the ``StateStore`` interface: the original JSON file
+(``LocalStateStore``) and an SQLite database in WAL mode
+(``SQLiteStateStore``) that writes only the touched rows. Device usage and
+submission velocity are bounded incremental counters (see ``velocity``), so
+a heavy user's cases cost the same as anyone else's.
+"""
 
 from __future__ import annotations
 
 import json
-from datetime import datetime, timedelta
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
 from pathlib import Path
 from threading import Lock
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .velocity import SlidingWindowCounter, SubmissionVelocity, epoch_seconds
+
+# Device counts are exact to this many seconds at the edge of their window
+DEVICE_BUCKET_SECONDS = 60
+
+
+class StateStore(ABC):
+    """Interface shared by all state backends."""
+
+    @abstractmethod
+    def record_hash(
+        self,
+        applicant_id: str,
+        evidence_id: str,
+        hash_value: str,
+        case_id: str,
+        org_id: Optional[str] = None,
+        scheme_code: Optional[str] = None,
+    ) -> None:
+        """Persist the perceptual hash of one evidence item."""
+
+    @abstractmethod
+    def list_hashes(self, applicant_id: str) -> Dict[str, Dict[str, str]]:
+        """Return ``{evidence_id: {"hash": ..., "case_id": ...}}`` for an applicant."""
+
+    @abstractmethod
+    def iter_hashes(self) -> Iterator[Dict[str, Optional[str]]]:
+        """Yield every stored hash record with its applicant/org/scheme keys."""
+
+    def hash_cursor(self) -> int:
+        """Position of the newest stored hash, for ``hashes_since``; 0 if the store is not shared."""
+
+        return 0
+
+    def hashes_since(self, cursor: int) -> Tuple[List[Dict[str, Optional[str]]], int]:
+        """Hash records stored (by any process) after ``cursor``, and the cursor past them."""
+
+        return [], cursor
+
+    @abstractmethod
+    def record_device_usage(self, device_id: Optional[str], timestamp: datetime, window_days: int = 7) -> int:
+        """Record a submission from ``device_id`` and return its count within the window."""
+
+    @abstractmethod
+    def record_submission(self, applicant_id: str, timestamp: datetime) -> float:
+        """Record a case submission and return the applicant's rapid-submission ratio.
 
+        The ratio is the share of gaps between consecutive submissions that
+        are shorter than ``RAPID_SUBMISSION_SECONDS``.
+        """
 
-class LocalStateStore:
+    def close(self) -> None:
+        """Release backend resources."""
+
+
+def _device_counter(entry: Dict[str, Any], window_days: int = 7) -> SlidingWindowCounter:
+    """Counter from a stored device entry: ``buckets`` or the old list of ISO ``events``."""
+
+    window = window_days * 86400
+    if "buckets" in entry:
+        return SlidingWindowCounter(window, DEVICE_BUCKET_SECONDS, entry["buckets"])
+    counter = SlidingWindowCounter(window, DEVICE_BUCKET_SECONDS)
+    for epoch in sorted(_epochs(entry.get("events", []))):
+        counter.add(epoch)
+    return counter
+
+
+def _velocity(entry: Dict[str, Any]) -> SubmissionVelocity:
+    """Velocity from a stored applicant entry: ``velocity`` or the old ISO ``timestamps`` history."""
+
+    state = entry.get("velocity")
+    if state is not None:
+        return SubmissionVelocity(recent=state["recent"], intervals=state["intervals"], rapid=state["rapid"])
+    return SubmissionVelocity.from_history(_epochs(entry.get("timestamps", [])))
+
+
+def _epochs(values: Iterable[str]) -> Iterator[int]:
+    return (epoch_seconds(datetime.fromisoformat(value)) for value in values)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (SlidingWindowCounter, SubmissionVelocity)):
+        return value.to_state()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class LocalStateStore(StateStore):
     """Thread-safe helper persisting lightweight state to JSON files."""
 
     def __init__(self, path: Path):
@@ -27,46 +123,371 @@ class LocalStateStore:
         else:
             self.path.parent.mkdir(parents=True, exist_ok=True)
             self.path.write_text("{}", encoding="utf-8")
+        # Counters live in the state as objects and are serialised by _encode
+        devices = self._state.setdefault("devices", {})
+        for device_id, entry in devices.items():
+            devices[device_id] = _device_counter(entry)
+        for applicant in self._applicants().values():
+            if "velocity" in applicant or "timestamps" in applicant:
+                applicant["velocity"] = _velocity(applicant)
+                applicant.pop("timestamps", None)
 
     def _persist(self) -> None:
-        self.path.write_text(json.dumps(self._state, indent=2), encoding="utf-8")
+        self.path.write_text(json.dumps(self._state, indent=2, default=_encode), encoding="utf-8")
 
     def _applicants(self) -> Dict[str, Any]:
         return self._state.setdefault("applicants", {})
 
-    def record_hash(self, applicant_id: str, evidence_id: str, hash_value: str, case_id: str) -> None:
+    def record_hash(
+        self,
+        applicant_id: str,
+        evidence_id: str,
+        hash_value: str,
+        case_id: str,
+        org_id: Optional[str] = None,
+        scheme_code: Optional[str] = None,
+    ) -> None:
         with self._lock:
             applicant = self._applicants().setdefault(applicant_id, {})
             hashes = applicant.setdefault("hashes", {})
-            hashes[evidence_id] = {"hash": hash_value, "case_id": case_id}
+            record = {"hash": hash_value, "case_id": case_id}
+            if org_id:
+                record["org_id"] = org_id
+            if scheme_code:
+                record["scheme_code"] = scheme_code
+            hashes[evidence_id] = record
             self._persist()
 
     def list_hashes(self, applicant_id: str) -> Dict[str, Dict[str, str]]:
-        applicant = self._applicants().get(applicant_id, {})
-        return applicant.get("hashes", {})  # type: ignore[return-value]
+        with self._lock:
+            applicant = self._applicants().get(applicant_id, {})
+            return dict(applicant.get("hashes", {}))  # type: ignore[return-value]
+
+    def iter_hashes(self) -> Iterator[Dict[str, Optional[str]]]:
+        with self._lock:
+            records = [
+                {"applicant_id": applicant_id, "evidence_id": evidence_id, **record}
+                for applicant_id, applicant in self._applicants().items()
+                for evidence_id, record in applicant.get("hashes", {}).items()
+            ]
+        return iter(records)
 
     def record_device_usage(self, device_id: Optional[str], timestamp: datetime, window_days: int = 7) -> int:
         if not device_id:
             return 0
         with self._lock:
             devices = self._state.setdefault("devices", {})
-            device_state = devices.setdefault(device_id, {"events": []})
-            events: List[str] = device_state.setdefault("events", [])
-            events.append(timestamp.isoformat())
-            cutoff = timestamp - timedelta(days=window_days)
-            device_state["events"] = [
-                event for event in events if datetime.fromisoformat(event) >= cutoff
-            ]
+            counter = devices.get(device_id)
+            if counter is None:
+                counter = devices[device_id] = SlidingWindowCounter(window_days * 86400, DEVICE_BUCKET_SECONDS)
+            counter.window_seconds = window_days * 86400
+            count = counter.add(epoch_seconds(timestamp))
             self._persist()
-            return len(device_state["events"])
+            return count
 
-    def record_case_timestamp(self, applicant_id: str, timestamp: str) -> List[str]:
+    def record_submission(self, applicant_id: str, timestamp: datetime) -> float:
         with self._lock:
             applicant = self._applicants().setdefault(applicant_id, {})
-            history = applicant.setdefault("timestamps", [])
-            history.append(timestamp)
+            velocity = applicant.get("velocity")
+            if velocity is None:
+                velocity = applicant["velocity"] = SubmissionVelocity()
+            ratio = velocity.add(epoch_seconds(timestamp))
             self._persist()
-            return history
+            return ratio
+
+
+class SQLiteStateStore(StateStore):
+    """SQLite-backed state store (WAL mode) indexed by applicant and device.
+
+    Each call touches only its own rows, and WAL lets readers proceed while a
+    writer commits, so cost no longer grows with total history. Device usage
+    is kept as per-minute buckets plus a running total, and submission
+    velocity as one row per applicant. Connections are per thread; SQLite
+    serialises the writers itself.
+    """
+
+    _SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS hashes (
+            applicant_id TEXT NOT NULL,
+            evidence_id TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            case_id TEXT,
+            org_id TEXT,
+            scheme_code TEXT,
+            PRIMARY KEY (applicant_id, evidence_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS device_buckets (
+            device_id TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (device_id, bucket)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS device_totals (
+            device_id TEXT PRIMARY KEY,
+            total INTEGER NOT NULL,
+            newest INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS submission_velocity (
+            applicant_id TEXT PRIMARY KEY,
+            recent TEXT NOT NULL,
+            intervals INTEGER NOT NULL,
+            rapid INTEGER NOT NULL
+        )
+        """,
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    )
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            for statement in self._SCHEMA:
+                connection.execute(statement)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(hashes)")}
+            for column in ("org_id", "scheme_code"):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE hashes ADD COLUMN {column} TEXT")
+            self._migrate_event_tables(connection)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    def record_hash(
+        self,
+        applicant_id: str,
+        evidence_id: str,
+        hash_value: str,
+        case_id: str,
+        org_id: Optional[str] = None,
+        scheme_code: Optional[str] = None,
+    ) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO hashes (applicant_id, evidence_id, hash, case_id, org_id, scheme_code) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (applicant_id, evidence_id, hash_value, case_id, org_id, scheme_code),
+            )
+
+    def list_hashes(self, applicant_id: str) -> Dict[str, Dict[str, str]]:
+        rows = self._connection().execute(
+            "SELECT evidence_id, hash, case_id FROM hashes WHERE applicant_id = ?",
+            (applicant_id,),
+        )
+        return {evidence_id: {"hash": hash_value, "case_id": case_id} for evidence_id, hash_value, case_id in rows}
+
+    def iter_hashes(self) -> Iterator[Dict[str, Optional[str]]]:
+        rows = self._connection().execute(
+            "SELECT applicant_id, evidence_id, hash, case_id, org_id, scheme_code FROM hashes"
+        )
+        for applicant_id, evidence_id, hash_value, case_id, org_id, scheme_code in rows:
+            yield {
+                "applicant_id": applicant_id,
+                "evidence_id": evidence_id,
+                "hash": hash_value,
+                "case_id": case_id,
+                "org_id": org_id,
+                "scheme_code": scheme_code,
+            }
+
+    def hash_cursor(self) -> int:
+        (rowid,) = self._connection().execute("SELECT COALESCE(MAX(rowid), 0) FROM hashes").fetchone()
+        return int(rowid)
+
+    def hashes_since(self, cursor: int) -> Tuple[List[Dict[str, Optional[str]]], int]:
+        # INSERT OR REPLACE gives a re-recorded hash a new rowid, so updates show up here too
+        rows = self._connection().execute(
+            "SELECT rowid, applicant_id, evidence_id, hash, case_id, org_id, scheme_code FROM hashes "
+            "WHERE rowid > ? ORDER BY rowid",
+            (cursor,),
+        ).fetchall()
+        records = [
+            {
+                "applicant_id": applicant_id,
+                "evidence_id": evidence_id,
+                "hash": hash_value,
+                "case_id": case_id,
+                "org_id": org_id,
+                "scheme_code": scheme_code,
+            }
+            for _, applicant_id, evidence_id, hash_value, case_id, org_id, scheme_code in rows
+        ]
+        return records, int(rows[-1][0]) if rows else cursor
+
+    def record_device_usage(self, device_id: Optional[str], timestamp: datetime, window_days: int = 7) -> int:
+        if not device_id:
+            return 0
+        # Same bucketing as SlidingWindowCounter, kept in rows so one call touches O(1) of them
+        epoch, window, width = epoch_seconds(timestamp), window_days * 86400, DEVICE_BUCKET_SECONDS
+        bucket = epoch - epoch % width
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT total, newest FROM device_totals WHERE device_id = ?", (device_id,)
+            ).fetchone()
+            total, newest = row if row is not None else (0, bucket)
+            if bucket + width <= newest - window:
+                return int(total)
+            connection.execute(
+                "INSERT INTO device_buckets (device_id, bucket, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (device_id, bucket) DO UPDATE SET count = count + 1",
+                (device_id, bucket),
+            )
+            newest = max(newest, bucket)
+            expired = connection.execute(
+                "DELETE FROM device_buckets WHERE device_id = ? AND bucket <= ? RETURNING count",
+                (device_id, newest - window - width),
+            ).fetchall()
+            total += 1 - sum(count for (count,) in expired)
+            connection.execute(
+                "INSERT OR REPLACE INTO device_totals (device_id, total, newest) VALUES (?, ?, ?)",
+                (device_id, total, newest),
+            )
+        return int(total)
+
+    def record_submission(self, applicant_id: str, timestamp: datetime) -> float:
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            velocity = self._load_velocity(connection, applicant_id)
+            ratio = velocity.add(epoch_seconds(timestamp))
+            self._store_velocity(connection, applicant_id, velocity)
+        return ratio
+
+    @staticmethod
+    def _load_velocity(connection: sqlite3.Connection, applicant_id: str) -> SubmissionVelocity:
+        row = connection.execute(
+            "SELECT recent, intervals, rapid FROM submission_velocity WHERE applicant_id = ?", (applicant_id,)
+        ).fetchone()
+        if row is None:
+            return SubmissionVelocity()
+        return SubmissionVelocity(recent=json.loads(row[0]), intervals=row[1], rapid=row[2])
+
+    @staticmethod
+    def _store_velocity(connection: sqlite3.Connection, applicant_id: str, velocity: SubmissionVelocity) -> None:
+        connection.execute(
+            "INSERT OR REPLACE INTO submission_velocity (applicant_id, recent, intervals, rapid) VALUES (?, ?, ?, ?)",
+            (applicant_id, json.dumps(velocity.recent()), velocity.intervals, velocity.rapid),
+        )
+
+    @staticmethod
+    def _store_device(connection: sqlite3.Connection, device_id: str, counter: SlidingWindowCounter) -> None:
+        buckets = counter.buckets()
+        connection.execute("DELETE FROM device_buckets WHERE device_id = ?", (device_id,))
+        connection.executemany(
+            "INSERT INTO device_buckets (device_id, bucket, count) VALUES (?, ?, ?)",
+            [(device_id, bucket, count) for bucket, count in buckets],
+        )
+        if buckets:
+            connection.execute(
+                "INSERT OR REPLACE INTO device_totals (device_id, total, newest) VALUES (?, ?, ?)",
+                (device_id, counter.total, buckets[-1][0]),
+            )
+
+    def _migrate_event_tables(self, connection: sqlite3.Connection) -> None:
+        """Fold the raw ``device_events``/``case_timestamps`` tables of older databases into counters."""
+
+        legacy = ("device_events", "case_timestamps")
+        query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)"
+        if not connection.execute(query, legacy).fetchall():
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        # Another process may have migrated while this one waited for the lock
+        tables = {name for (name,) in connection.execute(query, legacy)}
+        if "device_events" in tables:
+            events: Dict[str, List[str]] = {}
+            for device_id, ts in connection.execute("SELECT device_id, ts FROM device_events"):
+                events.setdefault(device_id, []).append(ts)
+            for device_id, timestamps in events.items():
+                self._store_device(connection, device_id, _device_counter({"events": timestamps}))
+            connection.execute("DROP TABLE device_events")
+        if "case_timestamps" in tables:
+            history: Dict[str, List[str]] = {}
+            for applicant_id, ts in connection.execute(
+                "SELECT applicant_id, ts FROM case_timestamps ORDER BY seq"
+            ):
+                history.setdefault(applicant_id, []).append(ts)
+            for applicant_id, timestamps in history.items():
+                self._store_velocity(connection, applicant_id, _velocity({"timestamps": timestamps}))
+            connection.execute("DROP TABLE case_timestamps")
+
+    def migrate_from_json(self, json_path: Path) -> bool:
+        """Import a ``LocalStateStore`` file once; returns True if rows were imported."""
+
+        if not json_path.exists():
+            return False
+        connection = self._connection()
+        marker = "SELECT value FROM meta WHERE key = 'migrated_from'"
+        if connection.execute(marker).fetchone() is not None:
+            return False
+        try:
+            state = json.loads(json_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            state = {}
+
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            # Another worker may have imported while this one waited for the lock
+            if connection.execute(marker).fetchone() is not None:
+                return False
+            for applicant_id, applicant in state.get("applicants", {}).items():
+                connection.executemany(
+                    "INSERT OR REPLACE INTO hashes (applicant_id, evidence_id, hash, case_id, org_id, scheme_code) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            applicant_id,
+                            evidence_id,
+                            record.get("hash", ""),
+                            record.get("case_id"),
+                            record.get("org_id"),
+                            record.get("scheme_code"),
+                        )
+                        for evidence_id, record in applicant.get("hashes", {}).items()
+                    ],
+                )
+                if "velocity" in applicant or "timestamps" in applicant:
+                    self._store_velocity(connection, applicant_id, _velocity(applicant))
+            for device_id, device in state.get("devices", {}).items():
+                self._store_device(connection, device_id, _device_counter(device))
+            connection.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('migrated_from', ?)", (os.fspath(json_path),)
+            )
+        return True
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+def open_state_store(backend: str, json_path: Path, sqlite_path: Path) -> StateStore:
+    """Build the configured backend, migrating an existing JSON file into SQLite once."""
+
+    if backend == "sqlite":
+        store = SQLiteStateStore(sqlite_path)
+        store.migrate_from_json(json_path)
+        return store
+    if backend == "json":
+        return LocalStateStore(json_path)
+    raise ValueError(f"Unknown state backend: {backend}")
 
 
-__all__ = ["LocalStateStore"]
+__all__ = ["StateStore", "LocalStateStore", "SQLiteStateStore", "open_state_store"]
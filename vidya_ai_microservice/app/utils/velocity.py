@@ -0,0 +1,167 @@
+"""Bounded, incremental counters for device reuse and submission velocity.
+
+Timestamps are kept as epoch seconds. ``SlidingWindowCounter`` counts
+events over a trailing window in fixed-width time buckets, dropping whole
+buckets as the window moves; ``SubmissionVelocity`` keeps the share of
+short gaps between consecutive submissions as two running counts plus a
+small ring of recent timestamps. Both update in O(1) amortised time for
+in-order events and hold a bounded amount of state however long the
+history grows.
+"""
+
+from __future__ import annotations
+
+import calendar
+from bisect import bisect_right
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Sequence, Tuple
+
+# Gaps between an applicant's submissions shorter than this count as rapid
+RAPID_SUBMISSION_SECONDS = 2 * 3600
+
+
+def epoch_seconds(timestamp: datetime) -> int:
+    """Whole seconds since the epoch; naive timestamps are taken as UTC."""
+
+    return calendar.timegm(timestamp.utctimetuple())
+
+
+class SlidingWindowCounter:
+    """Number of events in the trailing ``window_seconds``, in ``bucket_seconds`` buckets.
+
+    The window is anchored at the newest bucket seen, so a late event older
+    than the window is dropped on arrival. A bucket is kept while any part of
+    it is inside the window, so counts at the window edge are exact to one
+    bucket width. At most ``window_seconds / bucket_seconds + 1`` buckets are
+    held.
+    """
+
+    __slots__ = ("window_seconds", "bucket_seconds", "total", "_buckets")
+
+    def __init__(
+        self,
+        window_seconds: int,
+        bucket_seconds: int = 60,
+        buckets: Iterable[Sequence[int]] = (),
+    ) -> None:
+        self.window_seconds = int(window_seconds)
+        self.bucket_seconds = max(1, int(bucket_seconds))
+        # [bucket_start, count] pairs in ascending bucket order
+        self._buckets: Deque[List[int]] = deque([int(start), int(count)] for start, count in buckets)
+        self.total = sum(count for _, count in self._buckets)
+        self._expire()
+
+    def add(self, epoch: int, count: int = 1) -> int:
+        """Record ``count`` events at ``epoch`` and return the count within the window."""
+
+        start = epoch - epoch % self.bucket_seconds
+        buckets = self._buckets
+        if not buckets or start > buckets[-1][0]:
+            buckets.append([start, count])
+        elif start == buckets[-1][0]:
+            buckets[-1][1] += count
+        elif start + self.bucket_seconds <= buckets[-1][0] - self.window_seconds:
+            return self.total
+        else:
+            starts = [bucket[0] for bucket in buckets]
+            index = bisect_right(starts, start)
+            if index and starts[index - 1] == start:
+                buckets[index - 1][1] += count
+            else:
+                buckets.insert(index, [start, count])
+        self.total += count
+        self._expire()
+        return self.total
+
+    def _expire(self) -> None:
+        buckets = self._buckets
+        if not buckets:
+            return
+        cutoff = buckets[-1][0] - self.window_seconds
+        while buckets[0][0] + self.bucket_seconds <= cutoff:
+            self.total -= buckets.popleft()[1]
+
+    def buckets(self) -> List[Tuple[int, int]]:
+        return [(start, count) for start, count in self._buckets]
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"buckets": [list(bucket) for bucket in self._buckets]}
+
+
+class SubmissionVelocity:
+    """Running share of consecutive-submission gaps shorter than ``rapid_seconds``.
+
+    Only the newest ``retain`` timestamps are kept. A late submission that
+    falls among them splits the gap it lands in exactly; one older than all
+    of them is counted as a gap to the oldest retained timestamp.
+    """
+
+    __slots__ = ("rapid_seconds", "retain", "intervals", "rapid", "_recent")
+
+    def __init__(
+        self,
+        rapid_seconds: int = RAPID_SUBMISSION_SECONDS,
+        recent: Iterable[int] = (),
+        intervals: int = 0,
+        rapid: int = 0,
+        retain: int = 32,
+    ) -> None:
+        self.rapid_seconds = int(rapid_seconds)
+        self.retain = max(2, int(retain))
+        self.intervals = int(intervals)
+        self.rapid = int(rapid)
+        self._recent: List[int] = sorted(int(epoch) for epoch in recent)[-self.retain :]
+
+    @classmethod
+    def from_history(
+        cls, epochs: Iterable[int], rapid_seconds: int = RAPID_SUBMISSION_SECONDS
+    ) -> "SubmissionVelocity":
+        """Rebuild from a full list of submission times (used when migrating old state)."""
+
+        velocity = cls(rapid_seconds)
+        for epoch in sorted(epochs):
+            velocity.add(epoch)
+        return velocity
+
+    @property
+    def ratio(self) -> float:
+        return self.rapid / self.intervals if self.intervals else 0.0
+
+    def add(self, epoch: int) -> float:
+        """Record a submission and return the updated ratio."""
+
+        recent = self._recent
+        if not recent:
+            recent.append(epoch)
+            return self.ratio
+        if epoch >= recent[-1]:
+            self._gap(epoch - recent[-1], 1)
+            recent.append(epoch)
+        elif epoch < recent[0]:
+            self._gap(recent[0] - epoch, 1)
+            recent.insert(0, epoch)
+        else:
+            index = bisect_right(recent, epoch)
+            before, after = recent[index - 1], recent[index]
+            self._gap(after - before, -1)
+            self._gap(epoch - before, 1)
+            self._gap(after - epoch, 1)
+            recent.insert(index, epoch)
+        if len(recent) > self.retain:
+            del recent[0]
+        return self.ratio
+
+    def _gap(self, seconds: int, sign: int) -> None:
+        self.intervals += sign
+        if seconds < self.rapid_seconds:
+            self.rapid += sign
+
+    def recent(self) -> List[int]:
+        return list(self._recent)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"recent": list(self._recent), "intervals": self.intervals, "rapid": self.rapid}
+
+
+__all__ = ["RAPID_SUBMISSION_SECONDS", "SlidingWindowCounter", "SubmissionVelocity", "epoch_seconds"]
@@ -0,0 +1,107 @@
+"""Benchmark: replaying many cases through score_case one by one vs score_batch.
+
+Builds ``--cases`` synthetic evidence packages (two asset photos and one
+invoice each, written to a temp directory) and scores them sequentially and
+then through ``VidyaAIPipeline.score_batch``. State goes to a throwaway
+directory so the real duplicate history is untouched.
+
+Run from the service root::
+
+    python -m benchmarks.batch_replay --cases 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+
+def _packages(root: Path, count: int, prefix: str) -> List[dict]:
+    rng = np.random.default_rng(0)
+    packages = []
+    for index in range(count):
+        paths = []
+        for suffix in ("a", "b", "doc"):
+            path = root / f"{prefix}-{index}-{suffix}.jpg"
+            frame = cv2.GaussianBlur(rng.integers(0, 256, size=(720, 960, 3), dtype=np.uint8), (0, 0), 1.5)
+            cv2.imwrite(str(path), frame)
+            paths.append(str(path))
+        case_id = f"{prefix}-{index}"
+        packages.append(
+            {
+                "case_id": case_id,
+                "asset_images": [{"id": f"{case_id}-a", "file_path": paths[0]}, {"id": f"{case_id}-b", "file_path": paths[1]}],
+                "doc_images": [{"id": f"{case_id}-doc", "file_path": paths[2], "document_type": "invoice"}],
+                "metadata": {
+                    "case_id": case_id,
+                    "applicant_id": f"applicant-{index % 97}",
+                    "declared_loan_amount": 100000,
+                    "declared_asset_type": "tractor",
+                    "submission_device_id": f"device-{index % 13}",
+                },
+            }
+        )
+    return packages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        root = Path(scratch)
+        os.environ["DUPLICATE_STATE_PATH"] = str(root / "state.json")
+        os.environ["STATE_DB_PATH"] = str(root / "state.db")
+
+        from app.config import (
+            detection_config,
+            duplicate_config,
+            execution_config,
+            fraud_rule_config,
+            ocr_config,
+            quality_config,
+            threshold_config,
+            weight_config,
+        )
+        from app.schemas import EvidencePackage
+        from app.services import VidyaAIPipeline
+
+        pipeline = VidyaAIPipeline(
+            weights=weight_config,
+            thresholds=threshold_config,
+            quality_cfg=quality_config,
+            detection_cfg=detection_config,
+            ocr_cfg=ocr_config,
+            duplicate_cfg=duplicate_config,
+            fraud_rules=fraud_rule_config,
+            execution_cfg=execution_config,
+        )
+        sequential = [EvidencePackage.model_validate(p) for p in _packages(root, args.cases, "seq")]
+        batched = [EvidencePackage.model_validate(p) for p in _packages(root, args.cases, "batch")]
+
+        started = time.perf_counter()
+        for package in sequential:
+            pipeline.score_case(package)
+        sequential_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        errors = sum(item.status == "error" for item in pipeline.score_batch(batched))
+        batch_seconds = time.perf_counter() - started
+
+    print(f"{'mode':>12} {'cases/s':>10} {'seconds':>10}")
+    print(f"{'score_case':>12} {args.cases / sequential_seconds:>10.1f} {sequential_seconds:>10.2f}")
+    print(f"{'score_batch':>12} {args.cases / batch_seconds:>10.1f} {batch_seconds:>10.2f}")
+    if errors:
+        print(f"{errors} cases failed")
+
+
+if __name__ == "__main__":
+    main()
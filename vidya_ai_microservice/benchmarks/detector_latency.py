@@ -0,0 +1,70 @@
+"""Microbenchmark: per-image detection latency for the ultralytics and ONNX backends.
+
+Loads each model through ``load_backend`` and times ``predict`` on single
+frames (the unbatched case) after a short warm-up. Pass ``--images`` to
+use real evidence photos; otherwise random 1280x720 frames are used.
+
+Run from the service root::
+
+    python -m benchmarks.detector_latency --pt yolov8n.pt --onnx yolov8n.onnx
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from app.config import DetectionConfig
+from app.services.detection_backends import load_backend
+
+
+def _frames(paths: List[Path], count: int) -> List[np.ndarray]:
+    frames = [frame for frame in (cv2.imread(str(path)) for path in paths) if frame is not None]
+    if frames:
+        return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, size=(720, 1280, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def run(label: str, model_path: Optional[Path], backend: str, frames: List[np.ndarray], warmup: int) -> None:
+    if model_path is None:
+        return
+    model = load_backend(model_path, DetectionConfig(backend=backend))  # type: ignore[arg-type]
+    if model is None:
+        print(f"{label:>12} unavailable (missing runtime or model)")
+        return
+    for frame in frames[:warmup]:
+        model.predict([frame])
+    timings = []
+    for frame in frames:
+        started = time.perf_counter()
+        model.predict([frame])
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:>12} {statistics.mean(timings):>10.2f} {statistics.median(timings):>10.2f} {p95:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pt", type=Path, help="ultralytics weights (.pt)")
+    parser.add_argument("--onnx", type=Path, help="ONNX export of the same model")
+    parser.add_argument("--images", type=Path, nargs="*", default=[])
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = _frames(args.images, args.count)
+    print(f"{'backend':>12} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    run("ultralytics", args.pt, "ultralytics", frames, args.warmup)
+    run("onnx", args.onnx, "onnx", frames, args.warmup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Microbenchmark: duplicate-hash comparison paths at increasing history sizes.
+
+Compares, per query:
+
+* ``legacy``  - the original loop building two ``ImageHash`` objects from hex
+  strings for every stored record (``imagehash.hex_to_hash(a) - ...``);
+* ``kernel``  - one XOR + popcount pass over a contiguous uint64 array;
+* ``index``   - ``PerceptualHashIndex.nearest`` (multi-index hashing).
+
+Run from the service root::
+
+    python -m benchmarks.hamming_kernel --sizes 1000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Callable, List
+
+import numpy as np
+
+try:
+    import imagehash  # type: ignore[import]
+except Exception:  # pragma: no cover - optional dependency
+    imagehash = None
+
+from app.services.hash_index import PerceptualHashIndex, nearest_hash
+
+
+def _per_query_ms(fn: Callable[[int], object], queries: List[int], budget_seconds: float) -> float:
+    started = time.perf_counter()
+    runs = 0
+    for query in queries:
+        fn(query)
+        runs += 1
+        if time.perf_counter() - started > budget_seconds:
+            break
+    return (time.perf_counter() - started) / runs * 1000
+
+
+def run(size: int, queries: int, legacy_limit: int) -> dict:
+    rng = np.random.default_rng(size)
+    packed = rng.integers(0, 2**63, size=size, dtype=np.int64).astype(np.uint64)
+    hex_records = {f"ev-{i}": {"hash": f"{int(value):016x}", "case_id": f"case-{i}"} for i, value in enumerate(packed)}
+    probes = [int(packed[int(i)]) ^ 0b101 for i in rng.integers(0, size, size=queries)]
+
+    def legacy(query: int) -> None:
+        target = imagehash.hex_to_hash(f"{query:016x}")
+        best = 64
+        for record in hex_records.values():
+            distance = target - imagehash.hex_to_hash(record["hash"])
+            best = min(best, distance)
+
+    def kernel(query: int) -> None:
+        nearest_hash(query, packed)
+
+    index = PerceptualHashIndex(radius=5)
+    index.extend(
+        {"hash": record["hash"], "applicant_id": "bench", "evidence_id": key, "case_id": record["case_id"]}
+        for key, record in hex_records.items()
+    )
+
+    def indexed(query: int) -> None:
+        index.nearest(f"{query:016x}")
+
+    result = {"size": size}
+    if imagehash is not None and size <= legacy_limit:
+        result["legacy_ms"] = _per_query_ms(legacy, probes[:5], budget_seconds=20.0)
+    result["kernel_ms"] = _per_query_ms(kernel, probes, budget_seconds=5.0)
+    result["index_ms"] = _per_query_ms(indexed, probes, budget_seconds=5.0)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--legacy-limit",
+        type=int,
+        default=1_000_000,
+        help="Skip the imagehash path above this many stored hashes (it is linear and slow).",
+    )
+    args = parser.parse_args()
+
+    print(f"{'hashes':>10} {'legacy ms':>12} {'kernel ms':>12} {'index ms':>12}")
+    for size in args.sizes:
+        row = run(size, args.queries, args.legacy_limit)
+        legacy = f"{row['legacy_ms']:.3f}" if "legacy_ms" in row else "skipped"
+        print(f"{row['size']:>10} {legacy:>12} {row['kernel_ms']:>12.3f} {row['index_ms']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
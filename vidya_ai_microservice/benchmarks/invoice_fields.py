@@ -0,0 +1,176 @@
+"""Benchmark: invoice field extraction throughput and accuracy.
+
+Generates a seeded corpus of synthetic invoices (varying length, currency
+markers, date formats, sub-total/tax lines, label wording and tables whose
+total row carries the quantity column before the amount, with word
+boxes laid out line by line as a layout-aware OCR provider would return
+them) and compares:
+
+* ``legacy``  - the original per-field ``re.search`` parser plus the
+  ``strptime`` loop used to normalise the date;
+* ``text``    - ``InvoiceFieldExtractor`` on the plain text;
+* ``layout``  - ``InvoiceFieldExtractor`` with the word boxes.
+
+Accuracy is the share of invoices whose vendor, amount (the grand total)
+and date (parsed) match the ground truth.
+
+Run from the service root::
+
+    python -m benchmarks.invoice_fields --invoices 2000 --max-items 120
+    python -m benchmarks.invoice_fields --dump /tmp/invoices.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.schemas import OCRText, OCRWord
+from app.services.invoice_fields import InvoiceFieldExtractor, parse_date
+
+_VENDORS = ("Agri Corp Pvt Ltd", "Kisan Tools", "Shakti Tractors", "Green Valley Implements", "Bharat Pumps & Motors")
+_ITEMS = ("Rotavator blade set", "Diesel pump 5HP", "Drip line 16mm", "Seed drill", "Sprayer 16L", "Harrow disc")
+_CURRENCY = ("Rs. ", "Rs.", "INR ", "₹", "")
+_TOTAL_LABELS = ("Grand Total", "Total", "Amount Payable", "TOTAL", "Net Payable")
+_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d/%m/%y")
+_CHAR_WIDTH, _LINE_HEIGHT = 9.0, 22.0
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def make_invoice(rng: random.Random, max_items: int) -> Tuple[str, Dict[str, object]]:
+    vendor = rng.choice(_VENDORS)
+    issued = datetime(2024, 1, 1) + timedelta(days=rng.randrange(700))
+    currency = rng.choice(_CURRENCY)
+    lines = [f"TAX INVOICE  No. {rng.randrange(1000, 99999)}", f"Vendor: {vendor}"]
+    lines.append(f"Date: {issued.strftime(rng.choice(_DATE_FORMATS))}")
+    # Tabular invoices put the quantity column between the label and the amount
+    table = rng.random() < 0.3
+    if table:
+        lines.append("  #  Item                     Qty  Amount")
+    subtotal = 0.0
+    units = 0
+    for index in range(rng.randint(1, max_items)):
+        quantity = rng.randint(1, 12)
+        price = round(rng.uniform(50, 25000), 2)
+        subtotal += quantity * price
+        units += quantity
+        item = rng.choice(_ITEMS)
+        if table:
+            lines.append(f"{index + 1:>3}  {item:<24} {quantity:>3}  {currency}{_money(quantity * price)}")
+        else:
+            lines.append(f"{index + 1:>3} {item}  Qty {quantity}  {currency}{_money(quantity * price)}")
+    tax = round(subtotal * 0.18, 2)
+    total = round(subtotal + tax, 2)
+    lines.append(f"Sub Total  {currency}{_money(subtotal)}")
+    lines.append(f"GST 18%  {currency}{_money(tax)}")
+    if table:
+        lines.append(f"{rng.choice(_TOTAL_LABELS)}  {units}  {currency}{_money(total)}")
+    else:
+        lines.append(f"{rng.choice(_TOTAL_LABELS)}: {currency}{_money(total)}")
+    if rng.random() < 0.3:
+        lines.append(f"Payment due {(issued + timedelta(days=30)).strftime('%d/%m/%Y')}")
+    truth = {"vendor": vendor, "amount": total, "date": issued.date().isoformat()}
+    return "\n".join(lines), truth
+
+
+def layout_words(text: str) -> List[OCRWord]:
+    words: List[OCRWord] = []
+    for row, line in enumerate(text.split("\n")):
+        top = row * _LINE_HEIGHT
+        for match in re.finditer(r"\S+", line):
+            left = match.start() * _CHAR_WIDTH
+            right = match.end() * _CHAR_WIDTH
+            words.append(OCRWord(text=match.group(), confidence=0.95, bbox=[left, top, right, top + _LINE_HEIGHT - 4]))
+    return words
+
+
+def legacy_extract(text: str) -> Dict[str, object]:
+    vendor = re.search(r"Vendor\s*:?\s*(.+)", text, re.IGNORECASE)
+    amount: Optional[float] = None
+    match = re.search(r"(INR|Rs\.?|₹)\s*([0-9,]+\.?[0-9]*)", text, re.IGNORECASE)
+    if match:
+        amount = float(match.group(2).replace(",", ""))
+    else:
+        match = re.search(r"Total\s*:?\s*([0-9,]+\.?[0-9]*)", text, re.IGNORECASE)
+        if match:
+            amount = float(match.group(1).replace(",", ""))
+    date = re.search(r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})", text)
+    parsed = None
+    if date:
+        for fmt in ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d"):
+            try:
+                parsed = datetime.strptime(date.group(1), fmt)
+                break
+            except ValueError:
+                continue
+    return {"vendor": vendor.group(1).strip() if vendor else None, "amount": amount, "date": parsed}
+
+
+def _score(results: List[Dict[str, object]], truths: List[Dict[str, object]]) -> Dict[str, float]:
+    hits = {"vendor": 0, "amount": 0, "date": 0}
+    for result, truth in zip(results, truths):
+        hits["vendor"] += result["vendor"] == truth["vendor"]
+        amount = result["amount"]
+        hits["amount"] += amount is not None and abs(float(amount) - float(truth["amount"])) < 0.005  # type: ignore[arg-type]
+        date = result["date"]
+        hits["date"] += isinstance(date, datetime) and date.date().isoformat() == truth["date"]
+    return {field: count / len(truths) for field, count in hits.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invoices", type=int, default=1000)
+    parser.add_argument("--max-items", type=int, default=60, help="line items per invoice, drawn from 1..N")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--dump", help="write the corpus (text, words, truth) as JSON lines and exit")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_invoice(rng, args.max_items) for _ in range(args.invoices)]
+    documents = [OCRText(text=text, confidence=0.95, words=layout_words(text), provider="synthetic") for text, _ in corpus]
+    truths = [truth for _, truth in corpus]
+    if args.dump:
+        with open(args.dump, "w", encoding="utf-8") as handle:
+            for document, truth in zip(documents, truths):
+                handle.write(json.dumps({"ocr": document.model_dump(), "truth": truth}, ensure_ascii=False) + "\n")
+        print(f"wrote {len(documents)} invoices to {args.dump}")
+        return
+
+    extractor = InvoiceFieldExtractor()
+
+    def modern(use_layout: bool) -> Callable[[OCRText], Dict[str, object]]:
+        def run(document: OCRText) -> Dict[str, object]:
+            fields = extractor.extract(document if use_layout else document.text)
+            return {"vendor": fields.vendor, "amount": fields.amount, "date": parse_date(fields.date)}
+
+        return run
+
+    paths: Dict[str, Callable[[OCRText], Dict[str, object]]] = {
+        "legacy": lambda document: legacy_extract(document.text),
+        "text": modern(False),
+        "layout": modern(True),
+    }
+    size_mb = sum(len(document.text.encode("utf-8")) for document in documents) / 1e6
+    print(f"{len(documents)} invoices, {size_mb:.1f} MB of text")
+    print(f"{'path':>8} {'docs/s':>9} {'MB/s':>7} {'vendor':>7} {'amount':>7} {'date':>7}")
+    for name, run in paths.items():
+        started = time.perf_counter()
+        results = [run(document) for document in documents]
+        elapsed = time.perf_counter() - started
+        accuracy = _score(results, truths)
+        print(
+            f"{name:>8} {len(documents) / elapsed:>9.0f} {size_mb / elapsed:>7.1f} "
+            f"{accuracy['vendor']:>7.1%} {accuracy['amount']:>7.1%} {accuracy['date']:>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: response size and serialisation cost of each ``view``.
+
+Scores one synthetic case, then gives it a realistic payload (a page of
+invoice text per document and ``--detections`` YOLO boxes per photo, which
+the fallback layers on a dev box would not produce) and compares the
+``summary``/``full``/``audit`` shapes: body size raw, gzip and (if the
+``brotli`` package is installed) br, plus the time to serialise through
+FastAPI's default ``jsonable_encoder`` + ``json.dumps`` path versus
+``model_dump_json``.
+
+Run from the service root::
+
+    python -m benchmarks.response_views --detections 25
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import cv2
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+_INVOICE_LINE = "Item {index:>3}  Rotavator blade set, hardened steel  Qty 2  Rs. 1,450.00\n"
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--detections", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ["DUPLICATE_STATE_PATH"] = str(Path(scratch) / "state.json")
+
+        from app import config
+        from app.schemas import EvidencePackage
+        from app.services import VidyaAIPipeline
+        from app.utils.compression import compress
+        from app.utils.lazy import optional_module
+
+        pipeline = VidyaAIPipeline(
+            weights=config.weight_config,
+            thresholds=config.threshold_config,
+            quality_cfg=config.quality_config,
+            detection_cfg=config.detection_config,
+            ocr_cfg=config.ocr_config,
+            duplicate_cfg=config.duplicate_config,
+            fraud_rules=config.fraud_rule_config,
+            execution_cfg=config.execution_config,
+        )
+        _, buffer = cv2.imencode(".jpg", np.full((720, 960, 3), 128, dtype=np.uint8))
+        encoded = base64.b64encode(buffer).decode("utf-8")
+        package = EvidencePackage.model_validate(
+            {
+                "case_id": "bench-views",
+                "asset_images": [{"id": f"img-{index}", "base64_data": encoded} for index in range(3)],
+                "doc_images": [{"id": f"doc-{index}", "base64_data": encoded} for index in range(2)],
+                "metadata": {"case_id": "bench-views", "applicant_id": "applicant-1", "declared_loan_amount": 100000},
+            }
+        )
+        snapshot = pipeline.configs.current
+        layers = pipeline._run_layers(package, None, snapshot)
+        for result in layers.detection:
+            result.detected_objects = [
+                {"label": "tractor", "confidence": 0.87, "bbox": [12.5, 40.25, 610.0, 455.75]}
+                for _ in range(args.detections)
+            ]
+        for result in layers.ocr:
+            result.raw_text = "".join(_INVOICE_LINE.format(index=index) for index in range(40))
+        features = pipeline._feature_vector(package, layers, snapshot)
+        fraud = pipeline.fraud.score(features)
+
+    brotli = optional_module("brotli").load() is not None
+    print(f"{'view':>8} {'bytes':>8} {'gzip':>8} {'br':>8} {'fastapi us':>11} {'pydantic us':>12}")
+    for view in ("summary", "full", "audit"):
+        response = pipeline._build_response(package, layers, features, fraud, snapshot, view)  # type: ignore[arg-type]
+        body = response.model_dump_json().encode("utf-8")
+        fastapi_us = _timed(lambda: json.dumps(jsonable_encoder(response)).encode("utf-8"), args.repeat)
+        pydantic_us = _timed(lambda: response.model_dump_json().encode("utf-8"), args.repeat)
+        br = str(len(compress(body, "br"))) if brotli else "-"
+        print(
+            f"{view:>8} {len(body):>8} {len(compress(body, 'gzip')):>8} {br:>8} "
+            f"{fastapi_us:>11.1f} {pydantic_us:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark: recording layer outputs and re-tiering the whole history under new weights.
+
+For each history size, reports:
+
+* ``record``  - per-case cost of ``LayerOutputStore.record`` including the
+  batched segment writes;
+* ``load``    - reopening the store from its segments;
+* ``loop``    - re-aggregating every case one by one in Python, as
+  ``RiskAggregator.aggregate`` does;
+* ``vector``  - the ``/config/weights/simulate`` path: snapshot,
+  ``score_many``, ``tier_many`` and the migration matrix.
+
+Run from the service root::
+
+    python -m benchmarks.weight_simulation --sizes 10000 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.config import ThresholdConfig, WeightConfig
+from app.services.aggregation import COMPONENTS, RISK_TIERS, RiskAggregator, tier_migration
+from app.services.feature_engineering import FEATURE_SCHEMA
+from app.utils.layer_store import LayerOutputStore
+
+CANDIDATE = WeightConfig(
+    image_quality_weight=0.1, asset_match_weight=0.2, ocr_match_weight=0.2, duplicate_weight=0.15, fraud_score_weight=0.35
+)
+
+
+def run(size: int, directory: Path) -> dict:
+    rng = np.random.default_rng(size)
+    aggregator = RiskAggregator(WeightConfig(), ThresholdConfig())
+    components = np.round(rng.gamma(2.0, 15.0, size=(size, len(COMPONENTS))).clip(0, 100), 2)
+    features = rng.random((size, len(FEATURE_SCHEMA)))
+    scores = aggregator.score_many(components)
+    tiers = aggregator.tier_many(scores)
+
+    store = LayerOutputStore(directory, COMPONENTS, FEATURE_SCHEMA)
+    started = time.perf_counter()
+    for row in range(size):
+        store.record(f"case-{row}", components[row], features[row], scores[row], tiers[row])
+    store.close()
+    record_us = (time.perf_counter() - started) / size * 1e6
+
+    started = time.perf_counter()
+    store = LayerOutputStore(directory, COMPONENTS, FEATURE_SCHEMA)
+    load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    history = store.snapshot()
+    moved = 0
+    for row, recorded in zip(history.components.tolist(), history.tiers.tolist()):
+        values = dict(zip(COMPONENTS, row))
+        weighted = (
+            CANDIDATE.image_quality_weight * values["image_quality"]
+            + CANDIDATE.asset_match_weight * values["asset_match"]
+            + CANDIDATE.ocr_match_weight * values["ocr"]
+            + CANDIDATE.duplicate_weight * values["duplicates"]
+            + CANDIDATE.fraud_score_weight * values["fraud"]
+        )
+        moved += RISK_TIERS.index(aggregator._risk_tier(round(weighted / CANDIDATE.total(), 2))) != recorded
+    loop_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    history = store.snapshot()
+    migration = tier_migration(history.tiers, aggregator.tier_many(aggregator.score_many(history.components, CANDIDATE)))
+    vector_s = time.perf_counter() - started
+    assert int(migration.sum() - np.trace(migration)) == moved
+
+    disk = sum(path.stat().st_size for path in directory.iterdir())
+    return {
+        "size": size,
+        "record_us": record_us,
+        "load_s": load_s,
+        "loop_s": loop_s,
+        "vector_s": vector_s,
+        "bytes_per_case": disk / size,
+        "moved": moved,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'cases':>8} {'record us':>10} {'load s':>8} {'loop s':>8} {'vector s':>9} {'B/case':>7} {'moved':>7}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            row = run(size, Path(directory))
+        print(
+            f"{row['size']:>8} {row['record_us']:>10.1f} {row['load_s']:>8.3f} {row['loop_s']:>8.3f}"
+            f" {row['vector_s']:>9.4f} {row['bytes_per_case']:>7.0f} {row['moved']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
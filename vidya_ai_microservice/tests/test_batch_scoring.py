@@ -0,0 +1,61 @@
+"""Tests for multi-case batch scoring."""
+
+from __future__ import annotations
+
+import base64
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import create_app
+from app.services import VidyaAIPipeline
+
+
+def _case(case_id: str, brightness: int) -> dict:
+    frame = np.full((480, 640, 3), brightness, dtype=np.uint8)
+    _, buffer = cv2.imencode(".jpg", frame)
+    return {
+        "case_id": case_id,
+        "asset_images": [{"id": f"{case_id}-img", "base64_data": base64.b64encode(buffer).decode("utf-8")}],
+        "metadata": {"case_id": case_id, "applicant_id": f"app-{case_id}", "declared_loan_amount": 50000},
+    }
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(settings, "duplicate_state_path", tmp_path / "state.json")
+    monkeypatch.setattr(settings, "model_registry_path", tmp_path / "models")
+    return TestClient(create_app())
+
+
+def test_batch_endpoint_streams_every_case_and_isolates_failures(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pipeline: VidyaAIPipeline = client.app.state.pipeline
+    build = pipeline.features.build_feature_vector
+
+    def flaky(package, **kwargs):
+        if package.case_id == "case-2":
+            raise RuntimeError("feature store unavailable")
+        return build(package=package, **kwargs)
+
+    monkeypatch.setattr(pipeline.features, "build_feature_vector", flaky)
+    cases = [_case(f"case-{index}", 40 + index * 30) for index in range(5)]
+    cases.insert(3, {"case_id": "broken"})
+
+    response = client.post("/cases/score:batch", json=cases)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = {item["index"]: item for item in map(json.loads, response.text.splitlines())}
+    assert sorted(items) == list(range(6))
+    assert items[3]["status"] == "error" and items[3]["case_id"] == "broken"
+    assert items[2]["status"] == "error" and "feature store" in items[2]["error"]
+    ok = [item for item in items.values() if item["status"] == "ok"]
+    assert {item["result"]["case_id"] for item in ok} == {"case-0", "case-1", "case-3", "case-4"}
+
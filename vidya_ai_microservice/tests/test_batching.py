@@ -0,0 +1,83 @@
+"""Tests for micro-batched model calls."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+import pytest
+
+from app.config import DetectionConfig
+from app.schemas import EvidenceImage
+from app.services.batching import MicroBatcher
+from app.services.detection_backends import Detection
+from app.services.object_detection import ObjectDetectionService
+from app.utils.evidence import EvidenceContext
+from app.utils.media_loader import MediaLoader
+
+
+def test_batcher_groups_concurrent_items_and_routes_results() -> None:
+    calls: List[List[int]] = []
+
+    def handler(items: List[int]) -> List[int]:
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(handler, max_batch_size=4, max_wait_ms=50)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(batcher, range(8)))
+    batcher.close()
+
+    assert results == [item * 10 for item in range(8)]
+    assert max(len(call) for call in calls) > 1
+    assert all(len(call) <= 4 for call in calls)
+    stats = batcher.stats()
+    assert stats["items"] == 8
+    assert sum(int(size) * count for size, count in stats["batch_size_histogram"].items()) == 8
+
+
+def test_batcher_fails_whole_batch_on_handler_error() -> None:
+    def handler(items: List[int]) -> List[int]:
+        raise ValueError("model crashed")
+
+    batcher = MicroBatcher(handler, max_batch_size=2, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        batcher(1)
+    batcher.close()
+
+
+class _FakeBackend:
+    """Labels each frame by its pixel value so routing mistakes are visible."""
+
+    name = "fake"
+
+    def __init__(self) -> None:
+        self.batch_sizes: List[int] = []
+
+    def predict(self, frames: List[np.ndarray]) -> List[List[Detection]]:
+        self.batch_sizes.append(len(frames))
+        return [
+            [Detection("tractor" if frame.mean() > 100 else "bicycle", 0.9, (0.0, 0.0, 8.0, 8.0))]
+            for frame in frames
+        ]
+
+
+def test_detection_service_batches_frames_across_cases() -> None:
+    service = ObjectDetectionService(MediaLoader(), DetectionConfig(batch_max_size=8, batch_max_wait_ms=50))
+    service.model = _FakeBackend()
+    service.batcher = MicroBatcher(service._predict_batch, max_batch_size=8, max_wait_ms=50)
+
+    class FrameContext(EvidenceContext):
+        def bgr(self, evidence):  # type: ignore[override]
+            value = 200 if evidence.id.startswith("bright") else 20
+            return np.full((8, 8, 3), value, dtype=np.uint8)
+
+    context = FrameContext(MediaLoader())
+    images = [EvidenceImage(id=f"{'bright' if i % 2 else 'dark'}-{i}") for i in range(6)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda image: service.analyze_image(image, "tractor", context), images))
+    service.batcher.close()
+
+    assert [result.asset_match for result in results] == [bool(i % 2) for i in range(6)]
+    assert max(service.model.batch_sizes) > 1
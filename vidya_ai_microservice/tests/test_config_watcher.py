@@ -0,0 +1,103 @@
+"""Tests for versioned config snapshots and weight-file hot reload."""
+
+from __future__ import annotations
+
+import base64
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import ConfigSnapshot, WeightConfig, settings
+from app.main import create_app
+from app.services.config_watcher import ConfigWatcher
+
+
+def _write(path: Path, raw: dict) -> None:
+    path.write_text(json.dumps(raw), encoding="utf-8")
+
+
+def test_reload_swaps_every_section_or_none(tmp_path: Path) -> None:
+    path = tmp_path / "weights.json"
+    _write(path, {"thresholds": {"auto_approve_threshold": 65}})
+    watcher = ConfigWatcher(path, ConfigSnapshot.from_raw({"thresholds": {"auto_approve_threshold": 65}}), poll_seconds=0)
+    first = watcher.current
+
+    assert watcher.refresh() is False
+    _write(path, {"thresholds": {"auto_approve_threshold": 40}, "fraud_rules": {"gps_penalty": 30}, "padding": 1})
+    assert watcher.refresh() is True
+    reloaded = watcher.current
+    assert (reloaded.version, reloaded.source) == (2, "file")
+    assert reloaded.thresholds.auto_approve_threshold == 40 and reloaded.fraud_rules.gps_penalty == 30
+    assert first.thresholds.auto_approve_threshold == 65 and reloaded.digest != first.digest
+
+    # One invalid section rejects the whole file and the live snapshot stays
+    _write(path, {"thresholds": {"auto_approve_threshold": 10}, "weights": {"fraud_score_weight": -1}})
+    assert watcher.refresh() is False
+    assert watcher.current is reloaded and "fraud_score_weight" in watcher.failed
+    path.write_text("{not json", encoding="utf-8")
+    assert watcher.refresh(force=True) is False and watcher.current is reloaded
+
+    _write(path, {"execution": {"batch_max_in_flight": 4}})
+    assert watcher.refresh() is True and watcher.failed is None
+    assert watcher.restart_required() == ["execution"]
+    assert watcher.update_weights(WeightConfig(fraud_score_weight=1)).label.startswith("4-")
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    _write(tmp_path / "weights.json", {})
+    monkeypatch.setattr(settings, "weight_file", tmp_path / "weights.json")
+    monkeypatch.setattr(settings, "config_reload_poll_seconds", 0)
+    monkeypatch.setattr(settings, "duplicate_state_path", tmp_path / "state.json")
+    monkeypatch.setattr(settings, "model_registry_path", tmp_path / "models")
+    monkeypatch.setattr(settings, "model_registry_poll_seconds", 0)
+    return TestClient(create_app())
+
+
+def _case(case_id: str) -> dict:
+    _, buffer = cv2.imencode(".jpg", np.full((480, 640, 3), 120, dtype=np.uint8))
+    return {
+        "case_id": case_id,
+        "asset_images": [{"id": "img-1", "base64_data": base64.b64encode(buffer).decode("utf-8")}],
+        "doc_images": [],
+        "metadata": {"case_id": case_id, "applicant_id": "app-1", "declared_loan_amount": 50000},
+    }
+
+
+def test_case_keeps_the_snapshot_it_started_with(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    pipeline = client.app.state.pipeline
+    baseline = client.post("/cases/score?view=summary", json=_case("case-1")).json()
+    build = pipeline.features.build_feature_vector
+
+    def build_then_patch(package, **kwargs):
+        # The weights change while this case is between layers
+        pipeline.update_weights(WeightConfig(fraud_score_weight=1, image_quality_weight=0, asset_match_weight=0))
+        return build(package=package, **kwargs)
+
+    monkeypatch.setattr(pipeline.features, "build_feature_vector", build_then_patch)
+    during = client.post("/cases/score?view=full", json=_case("case-2")).json()
+
+    components = np.array([list(during["full_explanation"]["aggregation_components"].values())])
+    startup = pipeline.configs.startup
+    assert baseline["config_version"].startswith("1-")
+    assert during["config_version"] == baseline["config_version"] == startup.label
+    assert during["final_risk_score"] == pipeline.aggregator.score_many(components, startup.weights)[0]
+    assert client.get("/admin/config").json()["config_version"].startswith("2-")
+
+
+def test_reload_endpoint_applies_new_thresholds(client: TestClient) -> None:
+    before = client.post("/cases/score?view=summary", json=_case("case-1")).json()
+    _write(settings.weight_file, {"thresholds": {"auto_approve_threshold": 0, "officer_review_threshold": 0}})
+
+    status = client.post("/admin/config/reload").json()
+    after = client.post("/cases/score?view=summary", json=_case("case-2")).json()
+
+    assert status["config_version"] == after["config_version"] != before["config_version"]
+    assert after["risk_tier"] == "video-verify"
+    settings.weight_file.write_text("[]", encoding="utf-8")
+    assert client.post("/admin/config/reload").status_code == 422
+    assert client.get("/admin/config").json()["config_version"] == status["config_version"]
@@ -0,0 +1,67 @@
+"""Tests for the exported-model detection backend."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.config import DetectionConfig
+from app.services.detection_backends import decode_yolov8, letterbox, load_backend, nms
+
+
+def test_letterbox_preserves_aspect_and_pads_to_square() -> None:
+    frame = np.full((360, 640, 3), 255, dtype=np.uint8)
+
+    padded, scale, (pad_x, pad_y) = letterbox(frame, 320)
+
+    assert padded.shape == (320, 320, 3)
+    assert scale == pytest.approx(0.5)
+    assert (pad_x, pad_y) == (0.0, 70.0)
+    assert padded[0, 0, 0] == 114 and padded[160, 160, 0] == 255
+
+
+def test_decode_applies_threshold_and_class_aware_nms() -> None:
+    # Columns: cx, cy, w, h, score(class 0), score(class 1)
+    anchors = np.array(
+        [
+            [50, 50, 20, 20, 0.90, 0.00],
+            [51, 51, 20, 20, 0.80, 0.00],  # overlaps the first, same class: suppressed
+            [51, 51, 20, 20, 0.00, 0.70],  # overlaps the first, other class: kept
+            [200, 200, 10, 10, 0.10, 0.00],  # below threshold
+        ],
+        dtype=np.float32,
+    )
+
+    boxes, scores, class_ids = decode_yolov8(anchors.T, confidence_threshold=0.45, iou_threshold=0.4)
+
+    assert class_ids.tolist() == [0, 1]
+    assert scores.tolist() == pytest.approx([0.9, 0.7])
+    assert boxes[0].tolist() == pytest.approx([40, 40, 60, 60])
+    assert nms(np.zeros((0, 4)), np.zeros(0), 0.5).size == 0
+
+
+def test_onnx_backend_matches_ultralytics() -> None:
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("ultralytics")
+    weights = os.environ.get("VIDYA_PARITY_MODEL")
+    if not weights or not Path(weights).with_suffix(".onnx").exists():
+        pytest.skip("set VIDYA_PARITY_MODEL to a .pt file with an .onnx export beside it")
+    import cv2
+
+    frame = cv2.imread(os.environ.get("VIDYA_PARITY_IMAGE", "")) if os.environ.get("VIDYA_PARITY_IMAGE") else None
+    if frame is None:
+        frame = np.random.default_rng(0).integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+    config = DetectionConfig(confidence_threshold=0.25)
+    reference = load_backend(Path(weights), config.model_copy(update={"backend": "ultralytics"}))
+    exported = load_backend(Path(weights).with_suffix(".onnx"), config)
+
+    expected = sorted(reference.predict([frame])[0], key=lambda d: -d.confidence)
+    actual = sorted(exported.predict([frame])[0], key=lambda d: -d.confidence)
+
+    assert [d.label for d in actual] == [d.label for d in expected]
+    for got, want in zip(actual, expected):
+        assert got.confidence == pytest.approx(want.confidence, abs=0.02)
+        assert np.allclose(got.bbox, want.bbox, atol=4.0)
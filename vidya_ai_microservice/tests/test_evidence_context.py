@@ -0,0 +1,96 @@
+"""Tests for the per-case evidence context."""
+
+from __future__ import annotations
+
+import base64
+from io import BytesIO
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.schemas import EvidenceDocument, EvidenceImage
+from app.utils.evidence import EvidenceContext
+from app.utils.media_loader import MediaLoader, MediaLoaderError
+
+
+class CountingLoader(MediaLoader):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    def load_image_bytes(self, evidence: EvidenceImage) -> bytes:
+        self.calls += 1
+        return super().load_image_bytes(evidence)
+
+
+def _image_base64() -> str:
+    frame = np.full((32, 48, 3), 90, dtype=np.uint8)
+    _, buffer = cv2.imencode(".png", frame)
+    return base64.b64encode(buffer).decode("utf-8")
+
+
+def test_context_loads_and_decodes_each_item_once() -> None:
+    loader = CountingLoader()
+    context = EvidenceContext(loader)
+    evidence = EvidenceImage(id="img-1", base64_data=_image_base64())
+
+    frame = context.bgr(evidence)
+    gray = context.gray(evidence)
+    image = context.pil(evidence)
+
+    assert loader.calls == 1
+    assert context.bgr(evidence) is frame
+    assert gray.shape == (32, 48)
+    assert image.size == (48, 32)
+
+
+def test_context_remembers_load_failures() -> None:
+    loader = CountingLoader()
+    context = EvidenceContext(loader)
+    evidence = EvidenceImage(id="missing", file_path="/nonexistent/image.jpg")
+
+    for _ in range(3):
+        with pytest.raises(MediaLoaderError):
+            context.gray(evidence)
+
+    assert loader.calls == 1
+
+
+def test_context_decodes_reduced_gray_without_colour_frame() -> None:
+    context = EvidenceContext(MediaLoader())
+    evidence = EvidenceImage(id="img-1", base64_data=_image_base64())
+
+    reduced = context.decoded_gray(evidence, scale=2)
+
+    assert reduced.shape == (16, 24)
+    assert context.dimensions(evidence) == (48, 32)
+    assert context.stats()["decoded"] == 0
+
+
+def test_context_separates_documents_from_images_with_the_same_id() -> None:
+    context = EvidenceContext(MediaLoader())
+    image = EvidenceImage(id="1", base64_data=_image_base64())
+    document = EvidenceDocument(id="1", base64_data=base64.b64encode(b"%PDF-1.4 not an image").decode("utf-8"))
+
+    assert context.bgr(image).shape == (32, 48, 3)
+    with pytest.raises(MediaLoaderError):
+        context.gray(document)
+
+    # A decode failure leaves the raw bytes (for OCR) and the other item intact
+    assert context.payload(document).startswith(b"%PDF")
+    assert context.pil(image).size == (48, 32)
+    assert context.stats()["decode_errors"] == 1
+
+
+def test_context_reports_dimensions_after_exif_rotation() -> None:
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = BytesIO()
+    Image.new("RGB", (48, 32), (90, 90, 90)).save(buffer, format="JPEG", exif=exif)
+    evidence = EvidenceImage(id="rotated", base64_data=base64.b64encode(buffer.getvalue()).decode("utf-8"))
+    context = EvidenceContext(MediaLoader())
+
+    assert context.decoded_gray(evidence, scale=2).shape == (24, 16)
+    assert context.dimensions(evidence) == (32, 48)
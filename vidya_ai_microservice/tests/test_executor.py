@@ -0,0 +1,43 @@
+"""Tests for concurrent stage execution."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from app.config import ExecutionConfig
+from app.services.executor import StageExecutor
+
+
+def test_stage_workers_bound_concurrency() -> None:
+    executor = StageExecutor(ExecutionConfig(stage_workers={"detection": 1, "ocr": 4}))
+    active = {"detection": 0, "ocr": 0}
+    peak = {"detection": 0, "ocr": 0}
+    lock = threading.Lock()
+
+    def work(stage: str) -> str:
+        with lock:
+            active[stage] += 1
+            peak[stage] = max(peak[stage], active[stage])
+        time.sleep(0.02)
+        with lock:
+            active[stage] -= 1
+        return stage
+
+    futures = executor.map("detection", lambda _: work("detection"), range(4))
+    futures += executor.map("ocr", lambda _: work("ocr"), range(4))
+    results = executor.gather(futures)
+    executor.shutdown()
+
+    assert results == ["detection"] * 4 + ["ocr"] * 4
+    assert peak["detection"] == 1
+    assert peak["ocr"] > 1
+
+
+def test_zero_workers_runs_inline() -> None:
+    executor = StageExecutor(ExecutionConfig(default_stage_workers=0))
+    caller = threading.get_ident()
+
+    future = executor.submit("quality", threading.get_ident)
+
+    assert future.result() == caller
@@ -0,0 +1,61 @@
+"""Tests for the fixed-schema feature rows and the batched feature matrix."""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+
+from app.config import fraud_rule_config
+from app.schemas import EvidencePackage, FraudFeatureVector, ImageQualityResult
+from app.services.feature_engineering import FEATURE_SCHEMA, FeatureEngineer, build_feature_matrix
+from app.utils.state import LocalStateStore
+
+
+def _quality(score: float) -> ImageQualityResult:
+    return ImageQualityResult(
+        image_id="img", blur_variance=120.0, brightness=0.5, contrast=0.4, resolution_ok=True, quality_score=score
+    )
+
+
+def test_feature_row_matches_features_and_leaves_uncomputed_as_nan(tmp_path: Path) -> None:
+    engineer = FeatureEngineer(LocalStateStore(tmp_path / "state.json"), fraud_rule_config)
+    package = EvidencePackage.model_validate(
+        {
+            "case_id": "case-1",
+            "asset_images": [],
+            "doc_images": [],
+            "metadata": {"case_id": "case-1", "applicant_id": "applicant-1", "declared_loan_amount": 100000},
+        }
+    )
+
+    vector = engineer.build_feature_vector(package, [_quality(0.9), _quality(0.3)], [], [], [])
+
+    row = vector._row
+    assert row.shape == (len(FEATURE_SCHEMA),) and row.dtype == np.float64
+    assert vector.features["avg_quality_score"] == 0.6
+    assert vector.features["low_quality_ratio"] == 0.5
+    # No detections: the match rate falls back, asset_declared is not computed
+    assert vector.features["asset_match_rate"] == 0.5
+    assert "asset_declared" not in vector.features
+    assert math.isnan(row[FEATURE_SCHEMA.index("asset_declared")])
+    assert {name: float(row[FEATURE_SCHEMA.index(name)]) for name in vector.features} == vector.features
+    assert vector.explanation_fields["quality_summary"] == 0.6
+    assert "_row" not in vector.model_dump()
+
+
+def test_build_feature_matrix_gathers_model_order() -> None:
+    engineered = FraudFeatureVector(case_id="a", features={}, explanation_fields={})
+    engineered._row = np.arange(len(FEATURE_SCHEMA), dtype=np.float64)
+    # Vectors built elsewhere have no row and are rebuilt from their features
+    plain = FraudFeatureVector(case_id="b", features={"duplicate_ratio": 0.25}, explanation_fields={})
+    order = ("total_cases", "unknown_feature", "duplicate_ratio")
+
+    matrix = build_feature_matrix([engineered, plain], order)
+
+    assert matrix.dtype == np.float32 and matrix.shape == (2, 3)
+    assert matrix[0].tolist()[0] == FEATURE_SCHEMA.index("total_cases")
+    assert math.isnan(matrix[0, 1]) and matrix[0, 2] == FEATURE_SCHEMA.index("duplicate_ratio")
+    assert math.isnan(matrix[1, 0]) and matrix[1, 2] == 0.25
+    assert build_feature_matrix([engineered]).tolist() == [list(map(float, range(len(FEATURE_SCHEMA))))]
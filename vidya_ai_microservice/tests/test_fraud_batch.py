@@ -0,0 +1,57 @@
+"""Tests for batched fraud scoring."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.config import fraud_rule_config
+from app.schemas import FraudFeatureVector
+from app.services.fraud_model import DEFAULT_FEATURE_ORDER, FraudScoringService
+
+
+def _vectors(count: int) -> list:
+    rng = np.random.default_rng(0)
+    return [
+        FraudFeatureVector(
+            case_id=f"case-{index}",
+            features={name: float(value) for name, value in zip(DEFAULT_FEATURE_ORDER, rng.random(len(DEFAULT_FEATURE_ORDER)) * 40)},
+            explanation_fields={},
+        )
+        for index in range(count)
+    ]
+
+
+def test_score_many_matches_single_scoring_without_model(tmp_path: Path) -> None:
+    service = FraudScoringService(model_dir=tmp_path, rules=fraud_rule_config)
+    vectors = _vectors(20)
+
+    assert service.score_many(vectors) == [service.score(vector) for vector in vectors]
+    assert service.score_many([]) == []
+
+
+def test_score_many_uses_model_feature_order_and_named_importances(tmp_path: Path) -> None:
+    xgb = pytest.importorskip("xgboost")
+    # Train on a reversed column order so positional mix-ups would change predictions
+    names = list(reversed(DEFAULT_FEATURE_ORDER))
+    rng = np.random.default_rng(1)
+    data = rng.random((200, len(names)))
+    labels = (data[:, names.index("duplicate_ratio")] > 0.5).astype(float)
+    booster = xgb.train({"objective": "binary:logistic", "max_depth": 2}, xgb.DMatrix(data, label=labels, feature_names=names), 5)
+    booster.save_model(str(tmp_path / "model-001.json"))
+
+    service = FraudScoringService(model_dir=tmp_path, rules=fraud_rule_config)
+    vectors = _vectors(50)
+    results = service.score_many(vectors)
+
+    expected = booster.predict(
+        xgb.DMatrix(np.array([[v.features[name] for name in names] for v in vectors]), feature_names=names)
+    )
+    assert service.feature_order == tuple(names)
+    for probability, result in zip(expected, results):
+        penalty = sum(result.rule_penalties.values())
+        assert result.fraud_score == pytest.approx(min(100.0, float(probability) * 100 + penalty), abs=0.01)
+    assert results[0].feature_importance["duplicate_ratio"] > 0
+    assert results[0].feature_importance["total_cases"] == booster.get_score().get("total_cases", 0.0)
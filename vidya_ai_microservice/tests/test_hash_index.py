@@ -0,0 +1,121 @@
+"""Tests for the perceptual hash index and cross-applicant duplicates."""
+
+from __future__ import annotations
+
+import base64
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.config import DuplicateConfig
+from app.schemas import EvidenceImage
+from app.services import hash_index
+from app.services.hash_index import PerceptualHashIndex, hamming_distances, nearest_hash
+from app.services.hashing import DuplicateDetector
+from app.utils.media_loader import MediaLoader
+from app.utils.state import LocalStateStore, SQLiteStateStore
+
+
+def _flip_bits(value: int, count: int, rng: np.random.Generator) -> int:
+    for bit in rng.choice(64, size=count, replace=False):
+        value ^= 1 << int(bit)
+    return value
+
+
+def test_index_matches_brute_force_radius_search() -> None:
+    rng = np.random.default_rng(7)
+    index = PerceptualHashIndex(radius=5, initial_capacity=16)
+    stored = [int(value) for value in rng.integers(0, 2**63, size=6000, dtype=np.int64)]
+    for position, value in enumerate(stored):
+        index.add(f"{value:016x}", f"app-{position % 50}", f"ev-{position}", f"case-{position}")
+
+    for probe in range(200):
+        target = stored[probe * 17]
+        query = _flip_bits(target, int(rng.integers(0, 8)), rng)
+        expected = min(bin(query ^ value).count("1") for value in stored)
+        match = index.nearest(f"{query:016x}")
+        if expected <= 5:
+            assert match is not None and match.distance == expected
+        else:
+            assert match is None
+
+
+def test_index_scopes_and_replacement() -> None:
+    index = PerceptualHashIndex(radius=5)
+    index.add("cf8df0633c390c4b", "app-1", "img-1", "case-1", org_id="org-a")
+
+    assert index.nearest("cf8df0633c390c4b", scope="org", scope_value="org-a") is not None
+    assert index.nearest("cf8df0633c390c4b", scope="org", scope_value="org-b") is None
+    assert index.nearest("cf8df0633c390c4b", exclude=("app-1", "img-1", "case-1")) is None
+
+    index.add("0000000000000000", "app-1", "img-1", "case-2")
+    assert index.nearest("cf8df0633c390c4b") is None
+    assert len(index) == 1
+
+
+@pytest.mark.parametrize("native", [True, False])
+def test_hamming_kernel_matches_python_popcount(native: bool, monkeypatch) -> None:
+    if not native:
+        monkeypatch.setattr(hash_index, "_bitwise_count", None)
+    rng = np.random.default_rng(3)
+    hashes = rng.integers(0, 2**63, size=500, dtype=np.int64).astype(np.uint64)
+    hashes[123] = np.uint64(0xFFFFFFFFFFFFFFFF)
+    query = 0xFFFFFFFFFFFFFFF0
+
+    distances = hamming_distances(query, hashes)
+
+    assert distances.tolist() == [bin(query ^ int(value)).count("1") for value in hashes]
+    assert nearest_hash(query, hashes) == (123, 4)
+    assert nearest_hash(query, hashes[:0]) == (-1, 64)
+
+
+def test_applicant_scope_uses_its_own_array() -> None:
+    index = PerceptualHashIndex(radius=5)
+    for position in range(100):
+        index.add(f"{position * 7919:016x}", f"app-{position % 3}", f"ev-{position}", f"case-{position}")
+
+    match = index.nearest(f"{99 * 7919 ^ 0b11:016x}", scope="applicant", scope_value="app-0")
+
+    assert match is not None
+    assert (match.case_id, match.distance) == ("case-99", 2)
+    other = index.nearest(f"{99 * 7919:016x}", scope="applicant", scope_value="app-1")
+    assert other is None or other.case_id != "case-99"
+
+
+def _image_base64() -> str:
+    image = Image.new("RGB", (64, 64))
+    image.paste((200, 30, 30), (0, 0, 32, 64))
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def test_detector_flags_reuse_across_applicants(tmp_path) -> None:
+    state = LocalStateStore(tmp_path / "duplicates.json")
+    detector = DuplicateDetector(MediaLoader(), state, DuplicateConfig(scope="global"))
+    photo = _image_base64()
+
+    detector.evaluate_images([EvidenceImage(id="a", base64_data=photo)], applicant_id="app-1", case_id="case-1")
+    result = detector.evaluate_images([EvidenceImage(id="b", base64_data=photo)], applicant_id="app-2", case_id="case-2")[0]
+
+    assert result.duplicate_found is True
+    assert result.reference_case_id == "case-1"
+
+    reloaded = DuplicateDetector(MediaLoader(), LocalStateStore(tmp_path / "duplicates.json"), DuplicateConfig(scope="applicant"))
+    isolated = reloaded.evaluate_images([EvidenceImage(id="c", base64_data=photo)], applicant_id="app-3", case_id="case-3")[0]
+    assert isolated.duplicate_found is False
+
+
+def test_detectors_see_hashes_other_workers_stored(tmp_path) -> None:
+    first = DuplicateDetector(MediaLoader(), SQLiteStateStore(tmp_path / "state.db"), DuplicateConfig(scope="global"))
+    second = DuplicateDetector(MediaLoader(), SQLiteStateStore(tmp_path / "state.db"), DuplicateConfig(scope="global"))
+    photo = _image_base64()
+
+    first.evaluate_images([EvidenceImage(id="a", base64_data=photo)], applicant_id="app-1", case_id="case-1")
+    result = second.evaluate_images([EvidenceImage(id="b", base64_data=photo)], applicant_id="app-2", case_id="case-2")[0]
+
+    assert result.duplicate_found is True and result.reference_case_id == "case-1"
+    # Rows the index already holds, including its own writes, are not inserted again
+    assert second.index.merge(second.state.hashes_since(0)[0]) == 0
@@ -0,0 +1,95 @@
+"""Tests for the single-pass invoice field extractor."""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime
+
+from app.schemas import OCRText, OCRWord
+from app.services.invoice_fields import InvoiceFieldExtractor, parse_date
+
+INVOICE = """TAX INVOICE  No. 20417
+Vendor: Agri Corp Pvt Ltd
+Date: 2025-01-05
+  1 Rotavator blade set  Qty 2  Rs. 2,900.00
+  2 Drip line 16mm  Qty 1  Rs. 550.00
+Sub Total  Rs. 3,450.00
+GST 18%  Rs. 621.00
+Grand Total: Rs. 4,071.00
+Payment due 05/02/2025"""
+
+
+def test_text_scan_reads_the_grand_total_not_the_first_amount() -> None:
+    fields = InvoiceFieldExtractor().extract(INVOICE)
+
+    assert fields.as_dict() == {"vendor": "Agri Corp Pvt Ltd", "amount": 4071.0, "date": "2025-01-05"}
+    selected = [candidate for candidate in fields.candidates if candidate.selected]
+    assert {candidate.field for candidate in selected} == {"vendor", "amount", "date"}
+    total = next(candidate for candidate in selected if candidate.field == "amount")
+    assert total.label == "grand total"
+    assert INVOICE[total.start : total.end] == "4,071.00"
+    # Line items and the sub-total are not candidates
+    assert 550.0 not in [candidate.value for candidate in fields.candidates]
+    assert 3450.0 not in [candidate.value for candidate in fields.candidates]
+
+
+def test_layout_picks_amount_on_the_total_row() -> None:
+    def word(text: str, x1: float, y1: float) -> OCRWord:
+        return OCRWord(text=text, confidence=0.9, bbox=[x1, y1, x1 + 60, y1 + 18])
+
+    # Column-major reading order: the text alone pairs "Total" with the wrong number
+    words = [word("Subtotal", 10, 10), word("Total", 10, 40), word("3,450.00", 300, 10), word("4,071.00", 300, 40)]
+    recognized = OCRText(text="Subtotal\nTotal\n3,450.00\n4,071.00", confidence=0.9, words=words, provider="test")
+
+    fields = InvoiceFieldExtractor().extract(recognized)
+
+    assert InvoiceFieldExtractor().extract(recognized.text).amount == 3450.0
+    assert fields.amount == 4071.0
+    chosen = next(candidate for candidate in fields.candidates if candidate.selected)
+    assert chosen.bbox == [300.0, 40.0, 360.0, 58.0]
+    assert recognized.text[chosen.start : chosen.end] == "4,071.00"
+
+
+def _row_words(text: str) -> list:
+    """Word boxes laid out line by line, 9 px per character and 22 px per line."""
+
+    words = []
+    for row, line in enumerate(text.split("\n")):
+        for match in re.finditer(r"\S+", line):
+            bbox = [match.start() * 9.0, row * 22.0, match.end() * 9.0, row * 22.0 + 18]
+            words.append(OCRWord(text=match.group(), confidence=0.9, bbox=bbox))
+    return words
+
+
+def test_quantity_column_does_not_become_the_total() -> None:
+    text = "Vendor: Kisan Tools\n  1 Seed drill   5  Rs 3,450.00\nTotal  5  Rs 4,071.00"
+    layout = OCRText(text=text, confidence=0.9, words=_row_words(text), provider="test")
+
+    for recognized in (text, layout):
+        fields = InvoiceFieldExtractor().extract(recognized)
+        assert fields.amount == 4071.0
+        chosen = next(c for c in fields.candidates if c.selected and c.field == "amount")
+        assert text[chosen.start : chosen.end] == "4,071.00"
+    # A decimal amount without a currency marker also beats the quantity
+    assert InvoiceFieldExtractor().extract("Total  5  550.00").amount == 550.0
+    # With nothing stronger on the row the bare number is still read
+    assert InvoiceFieldExtractor().extract("Total: 5\nPaid in cash").amount == 5.0
+
+
+def test_layout_search_stays_near_the_label() -> None:
+    def word(text: str, x1: float, y1: float) -> OCRWord:
+        return OCRWord(text=text, confidence=0.9, bbox=[x1, y1, x1 + 60, y1 + 18])
+
+    # The footer number sits closer to the label's left edge than the real total does
+    words = [word("Total", 10, 40), word("4,071.00", 900, 70), word("9,999.00", 10, 400)]
+    recognized = OCRText(text="Total\n4,071.00\n9,999.00", confidence=0.9, words=words, provider="test")
+
+    assert InvoiceFieldExtractor(label_rows=2).extract(recognized).amount == 4071.0
+    assert InvoiceFieldExtractor(label_rows=20).extract(recognized).amount == 9999.0
+
+
+def test_parse_date_formats() -> None:
+    assert parse_date("05/01/2025") == datetime(2025, 1, 5)
+    assert parse_date("05-01-25") == datetime(2025, 1, 5)
+    assert parse_date("2025-01-05") == datetime(2025, 1, 5)
+    assert parse_date("31/02/2025") is None
@@ -0,0 +1,152 @@
+"""Tests for the asynchronous scoring job queue."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from app.schemas import EvidencePackage, Metadata, ScoreJob
+from app.services.jobs import CallbackRejectedError, JobQueue, QueueFullError, check_callback_url
+from app.utils.job_store import InMemoryJobStore, SQLiteJobStore
+
+
+def _package(case_id: str) -> EvidencePackage:
+    return EvidencePackage(
+        case_id=case_id,
+        metadata=Metadata(case_id=case_id, applicant_id="applicant", declared_loan_amount=1000.0),
+    )
+
+
+def _wait_for(queue: JobQueue, job_id: str, timeout: float = 5.0) -> ScoreJob:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job.status in ("succeeded", "failed") and (
+            job.callback_url is None or job.callback_status is not None
+        ):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.fixture
+def callbacks() -> Iterator[tuple]:
+    received: List[dict] = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802 - http.server API
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args) -> None:
+            return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/hook", received
+    server.shutdown()
+
+
+def test_jobs_run_in_background_and_notify_callback(callbacks: tuple) -> None:
+    url, received = callbacks
+
+    def handler(package: EvidencePackage):
+        if package.case_id == "bad":
+            raise RuntimeError("scoring failed")
+        return None
+
+    queue = JobQueue(handler, InMemoryJobStore(), workers=2, callback_allowed_hosts=["127.0.0.1"])
+    queue.start()
+    good = queue.submit(_package("good"), callback_url=url)
+    bad = queue.submit(_package("bad"))
+
+    assert _wait_for(queue, good.job_id).callback_status == "delivered"
+    assert _wait_for(queue, bad.job_id).error == "scoring failed"
+    assert received[0]["job_id"] == good.job_id and received[0]["status"] == "succeeded"
+    queue.shutdown()
+
+
+def test_full_queue_rejects_immediately() -> None:
+    release = threading.Event()
+    queue = JobQueue(lambda package: release.wait(5), InMemoryJobStore(), workers=1, max_depth=2)
+    queue.start()
+    queue.submit(_package("one"))
+    queue.submit(_package("two"))
+
+    with pytest.raises(QueueFullError):
+        queue.submit(_package("three"))
+    release.set()
+    queue.shutdown()
+    assert queue.stats()["rejected"] == 1
+
+
+def test_sqlite_store_requeues_jobs_whose_lease_expired(tmp_path: Path) -> None:
+    now = [1000.0]
+    store = SQLiteJobStore(tmp_path / "jobs.db", lease_seconds=30, clock=lambda: now[0])
+    for case_id in ("first", "second"):
+        job = ScoreJob(job_id=case_id, case_id=case_id, status="queued", created_at=datetime.utcnow())
+        store.add(job, _package(case_id))
+    claimed, payload = store.claim()  # type: ignore[misc]
+    assert claimed.job_id == "first" and payload.case_id == "first"
+
+    now[0] += 31
+    reopened = SQLiteJobStore(tmp_path / "jobs.db", lease_seconds=30, clock=lambda: now[0])
+    assert reopened.requeue_expired() == 1
+    assert reopened.get("first").status == "queued"  # type: ignore[union-attr]
+    assert reopened.depth() == 2
+    assert reopened.claim()[0].job_id == "first"  # type: ignore[index]
+
+
+def test_shared_sqlite_store_keeps_live_workers_jobs(tmp_path: Path) -> None:
+    now = [1000.0]
+    first = SQLiteJobStore(tmp_path / "jobs.db", lease_seconds=30, clock=lambda: now[0])
+    second = SQLiteJobStore(tmp_path / "jobs.db", lease_seconds=30, clock=lambda: now[0])
+    for case_id in ("a", "b"):
+        job = ScoreJob(job_id=case_id, case_id=case_id, status="queued", created_at=datetime.utcnow())
+        first.add(job, _package(case_id))
+    assert first.claim()[0].job_id == "a"  # type: ignore[index]
+
+    # A second worker starting up leaves the running job alone
+    assert second.requeue_expired() == 0
+    assert second.claim()[0].job_id == "b"  # type: ignore[index]
+
+    # The first worker keeps renewing; the second dies and stops
+    now[0] += 20
+    assert first.renew_leases() == 1
+    now[0] += 20
+    assert first.requeue_expired() == 1
+    assert [first.get(job_id).status for job_id in ("a", "b")] == ["running", "queued"]  # type: ignore[union-attr]
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://127.0.0.1:8000/hook",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://10.0.0.5/hook",
+        "http://[::1]/hook",
+        "http://localhost/hook",
+        "file:///etc/passwd",
+    ],
+)
+def test_callbacks_to_internal_addresses_are_rejected(url: str) -> None:
+    with pytest.raises(CallbackRejectedError):
+        check_callback_url(url)
+    queue = JobQueue(lambda package: None, InMemoryJobStore())
+    with pytest.raises(CallbackRejectedError):
+        queue.submit(_package("case"), callback_url=url)
+    assert queue.store.depth() == 0
+
+
+def test_callback_allowlist_is_exact() -> None:
+    check_callback_url("https://hooks.example.com/done", ["hooks.example.com"])
+    with pytest.raises(CallbackRejectedError):
+        check_callback_url("https://evil.example.com/done", ["hooks.example.com"])
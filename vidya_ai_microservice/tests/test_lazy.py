@@ -0,0 +1,42 @@
+"""Tests for lazy optional imports and the startup path."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import create_app
+from app.utils.lazy import OptionalModule
+
+
+def test_optional_module_imports_once_and_reports_missing() -> None:
+    module = OptionalModule("json")
+    assert module.available() and not module.loaded
+    assert module.load() is module.load() is sys.modules["json"]
+    assert module.status()["loaded"] and module.import_seconds is not None
+
+    missing = OptionalModule("vidya_missing_backend")
+    assert not missing.available()
+    assert missing.load() is None
+    assert missing.status()["error"].startswith("ModuleNotFoundError")
+
+
+def test_health_never_imports_backends(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "duplicate_state_path", tmp_path / "state.json")
+    monkeypatch.setattr(settings, "model_registry_path", tmp_path / "models")
+    monkeypatch.setattr(settings, "model_registry_poll_seconds", 0)
+    client = TestClient(create_app())
+    before = set(sys.modules)
+
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert set(response.json()["dependencies"]) == {"opencv", "ultralytics", "google_cloud_vision", "xgboost", "tesseract"}
+    assert set(sys.modules) == before
+    startup = client.get("/stats").json()["startup"]
+    assert startup["warm_up"] == "disabled"
+    assert "xgboost" in startup["imports"]
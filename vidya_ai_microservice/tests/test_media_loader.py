@@ -0,0 +1,110 @@
+"""Tests for pooled and parallel media downloads."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+
+from app.schemas import EvidenceImage, EvidencePackage, Metadata
+from app.utils.media_cache import MediaCache
+from app.utils.media_loader import MediaLoader, MediaLoaderError
+
+BODIES = {"/small.jpg": b"x" * 1024, "/large.jpg": b"y" * 64 * 1024}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        body = BODIES.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        return
+
+
+@pytest.fixture
+def media_server() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_url_download_enforces_size_cap(media_server: str) -> None:
+    loader = MediaLoader(max_bytes=4096, retries=0)
+
+    assert loader.load_image_bytes(EvidenceImage(id="s", url=f"{media_server}/small.jpg")) == BODIES["/small.jpg"]
+    with pytest.raises(MediaLoaderError):
+        loader.load_image_bytes(EvidenceImage(id="l", url=f"{media_server}/large.jpg"))
+
+
+def test_prefetch_package_isolates_failures(media_server: str) -> None:
+    loader = MediaLoader(retries=0)
+    package = EvidencePackage(
+        case_id="case-fetch",
+        asset_images=[
+            EvidenceImage(id="ok", url=f"{media_server}/small.jpg"),
+            EvidenceImage(id="missing", url=f"{media_server}/missing.jpg"),
+            EvidenceImage(id="inline", base64_data="eA=="),
+        ],
+        metadata=Metadata(case_id="case-fetch", applicant_id="app-1", declared_loan_amount=1000.0),
+    )
+
+    fetched = asyncio.run(loader.prefetch_package_async(package))
+
+    assert fetched[f"{media_server}/small.jpg"] == BODIES["/small.jpg"]
+    assert isinstance(fetched[f"{media_server}/missing.jpg"], MediaLoaderError)
+    assert len(fetched) == 2
+
+
+def test_cached_urls_skip_the_network(media_server: str, tmp_path) -> None:
+    cache = MediaCache(tmp_path / "media-cache", max_bytes=1024 * 1024)
+    evidence = EvidenceImage(id="s", url=f"{media_server}/small.jpg")
+
+    first = MediaLoader(retries=0, cache=cache).load_image_bytes(evidence)
+    offline = MediaLoader(retries=0, cache=MediaCache(tmp_path / "media-cache"))
+    offline.session.close()
+    offline.session.get = None  # type: ignore[assignment]  # any network call would fail
+
+    assert offline.load_image_bytes(evidence) == first
+    assert offline.cache_stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = MediaCache(tmp_path / "lru", max_bytes=2500)
+    keys = [cache.key_for_url(f"https://media.example/{value}.jpg") for value in range(3)]
+    cache.put(keys[0], b"a" * 1000)
+    cache.put(keys[1], b"b" * 1000)
+    assert cache.get(keys[0]) is not None
+
+    cache.put(keys[2], b"c" * 1000)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == b"a" * 1000
+    assert cache.stats()["evictions"] == 1
+
+
+def test_concurrent_puts_of_one_key_do_not_collide(tmp_path) -> None:
+    cache = MediaCache(tmp_path / "threads")
+    payloads = [bytes([value]) * 4096 for value in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda payload: cache.put_url("https://media.example/a.jpg", "v1", payload), payloads * 4))
+
+    assert cache.get_url("https://media.example/a.jpg") in payloads
+    assert not list((tmp_path / "threads").rglob("*.tmp"))
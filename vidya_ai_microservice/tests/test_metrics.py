@@ -0,0 +1,110 @@
+"""Tests for per-stage latency instrumentation."""
+
+from __future__ import annotations
+
+import base64
+from pathlib import Path
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+import pytest
+
+from app import config
+from app.config import ExecutionConfig, settings
+from app.schemas import EvidencePackage, OCRText
+from app.services import VidyaAIPipeline
+from app.services.ocr_providers import NullOCRProvider, OCRProviderError
+from app.utils.metrics import StageMetrics
+
+
+class _RecordingMetrics(StageMetrics):
+    def __init__(self) -> None:
+        super().__init__()
+        self.observed: List[Tuple[str, str, str]] = []
+
+    def observe(self, stage: str, backend: str, outcome: str, seconds: float) -> None:
+        self.observed.append((stage, backend, outcome))
+        super().observe(stage, backend, outcome, seconds)
+
+
+def _package() -> EvidencePackage:
+    _, buffer = cv2.imencode(".jpg", np.full((480, 640, 3), 120, dtype=np.uint8))
+    encoded = base64.b64encode(buffer).decode("utf-8")
+    return EvidencePackage.model_validate(
+        {
+            "case_id": "case-metrics",
+            "asset_images": [{"id": "img-1", "base64_data": encoded}],
+            "doc_images": [{"id": "doc-1", "base64_data": encoded}],
+            "metadata": {"case_id": "case-metrics", "applicant_id": "app-1", "declared_loan_amount": 50000},
+        }
+    )
+
+
+@pytest.fixture
+def pipeline(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> VidyaAIPipeline:
+    monkeypatch.setattr(settings, "duplicate_state_path", tmp_path / "state.json")
+    monkeypatch.setattr(settings, "model_registry_path", tmp_path / "models")
+    return VidyaAIPipeline(
+        weights=config.weight_config,
+        thresholds=config.threshold_config,
+        quality_cfg=config.quality_config,
+        detection_cfg=config.detection_config,
+        ocr_cfg=config.ocr_config.model_copy(update={"provider": "none"}),
+        duplicate_cfg=config.duplicate_config,
+        fraud_rules=config.fraud_rule_config,
+        execution_cfg=ExecutionConfig(explain_stage_timings=True),
+        metrics=_RecordingMetrics(),
+    )
+
+
+def test_every_stage_is_timed_with_backend_labels(pipeline: VidyaAIPipeline) -> None:
+    response = pipeline.score_case(_package())
+
+    observed = set(pipeline.metrics.observed)  # type: ignore[attr-defined]
+    assert ("quality", "opencv", "ok") in observed
+    assert ("detection", "fallback", "ok") in observed
+    assert ("ocr", "regex-fallback", "ok") in observed
+    assert ("fraud", "rules", "ok") in observed
+    assert {"hashing", "state_write", "features"} <= {stage for stage, _, _ in observed}
+    timings = response.full_explanation["stage_timings"]
+    assert timings["quality"]["calls"] == 2 and timings["detection"]["calls"] == 1
+
+
+def test_histogram_exposition_carries_stage_labels(pipeline: VidyaAIPipeline) -> None:
+    pytest.importorskip("prometheus_client")
+    pipeline.score_case(_package())
+
+    body, content_type = pipeline.metrics.exposition()
+
+    assert content_type.startswith("text/plain")
+    counts = [
+        line
+        for line in body.decode().splitlines()
+        if line.startswith("vidya_stage_duration_seconds_count")
+        and 'stage="detection"' in line
+        and 'backend="fallback"' in line
+        and 'outcome="ok"' in line
+    ]
+    assert counts and counts[0].endswith(" 1.0")
+
+
+def test_layer_errors_are_recorded_as_error_outcomes(pipeline: VidyaAIPipeline, tmp_path: Path) -> None:
+    class _BrokenOCR(NullOCRProvider):
+        def recognize(self, payload: bytes) -> OCRText:
+            raise OCRProviderError("Vision unavailable")
+
+    pipeline.ocr.provider = _BrokenOCR()
+    package = _package()
+    # Every layer catches the load error and returns a failed result
+    package.asset_images[0] = package.asset_images[0].model_copy(
+        update={"base64_data": None, "file_path": str(tmp_path / "missing.jpg")}
+    )
+
+    pipeline.score_case(package)
+
+    observed = pipeline.metrics.observed  # type: ignore[attr-defined]
+    assert ("quality", "opencv", "error") in observed and ("quality", "opencv", "ok") in observed
+    assert ("detection", "default", "error") in observed
+    assert ("hashing", "imagehash", "error") in observed and ("hashing", "imagehash", "ok") in observed
+    assert ("ocr", "regex-fallback", "error") in observed
@@ -0,0 +1,97 @@
+"""Tests for fraud model hot-reload, pinning and rollback."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.config import fraud_rule_config
+from app.schemas import FraudFeatureVector
+from app.services.fraud_model import DEFAULT_FEATURE_ORDER, FraudScoringService, LoadedFraudModel
+from app.services.model_registry import ModelRegistry, ModelRegistryError
+
+
+class _ConstantBooster:
+    def __init__(self, probability: float) -> None:
+        self.probability = probability
+
+    def inplace_predict(self, matrix: np.ndarray) -> np.ndarray:
+        return np.full(len(matrix), self.probability)
+
+
+def _fake_loader(path: Path) -> LoadedFraudModel:
+    if path.read_text() == "corrupt":
+        raise ValueError("bad model file")
+    return LoadedFraudModel(
+        booster=_ConstantBooster(float(path.read_text())), version=path.stem, feature_order=DEFAULT_FEATURE_ORDER
+    )
+
+
+def _score(service: FraudScoringService) -> float:
+    return service.score(FraudFeatureVector(case_id="c", features={}, explanation_fields={})).fraud_score
+
+
+def test_registry_swaps_in_new_versions_and_skips_broken_ones(tmp_path: Path) -> None:
+    service = FraudScoringService(model_dir=tmp_path, rules=fraud_rule_config)
+    registry = ModelRegistry(service, poll_seconds=0, loader=_fake_loader)
+    (tmp_path / "model-001.json").write_text("0.2")
+
+    assert registry.refresh() is True
+    assert service.version == "model-001" and _score(service) == 20.0
+
+    (tmp_path / "model-002.json").write_text("corrupt")
+    assert registry.refresh() is False
+    assert service.version == "model-001"
+    assert "model-002" in registry.status()["failed"]
+
+    # The copy finishes: a changed file is tried again
+    (tmp_path / "model-002.json").write_text("0.45")
+    assert registry.refresh() is True
+    assert service.version == "model-002" and registry.status()["failed"] == {}
+
+
+def test_status_answers_while_a_model_loads(tmp_path: Path) -> None:
+    service = FraudScoringService(model_dir=tmp_path, rules=fraud_rule_config)
+    loading, release = threading.Event(), threading.Event()
+
+    def slow_loader(path: Path) -> LoadedFraudModel:
+        loading.set()
+        release.wait(5)
+        return _fake_loader(path)
+
+    registry = ModelRegistry(service, poll_seconds=0, loader=slow_loader)
+    (tmp_path / "model-001.json").write_text("0.2")
+    refresher = threading.Thread(target=registry.refresh)
+    refresher.start()
+    assert loading.wait(5)
+
+    status: list = []
+    reader = threading.Thread(target=lambda: status.append(registry.status()))
+    reader.start()
+    reader.join(1)
+    release.set()
+    refresher.join(5)
+
+    assert status and status[0]["active"] != "model-001"
+    assert service.version == "model-001"
+
+
+def test_pin_and_rollback(tmp_path: Path) -> None:
+    service = FraudScoringService(model_dir=tmp_path, rules=fraud_rule_config)
+    registry = ModelRegistry(service, poll_seconds=0, loader=_fake_loader)
+    (tmp_path / "model-001.json").write_text("0.1")
+    (tmp_path / "model-002.json").write_text("0.3")
+
+    registry.pin("model-001")
+    assert registry.refresh() is False and service.version == "model-001"
+
+    registry.unpin()
+    assert service.version == "model-002" and _score(service) == 30.0
+
+    status = registry.rollback()
+    assert status["active"] == status["pinned"] == "model-001"
+    with pytest.raises(ModelRegistryError):
+        registry.pin("model-999")
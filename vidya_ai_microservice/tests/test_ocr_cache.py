@@ -0,0 +1,97 @@
+"""Tests for the content-addressed OCR result cache."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from app.config import ocr_config
+from app.schemas import EvidenceDocument, OCRText
+from app.services.ocr_processing import DocumentOCRService
+from app.services.ocr_providers import GoogleVisionProvider
+from app.utils.evidence import EvidenceContext
+from app.utils.media_loader import MediaLoader
+from app.utils.ocr_cache import OCRCache
+
+
+class _FakeVision:
+    """Stands in for ``vision.ImageAnnotatorClient``; ``b"corrupt"`` gets a per-image error."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.calls = 0
+        self.batches: list = []
+
+    def batch_annotate_images(self, requests, timeout=None):
+        self.calls += 1
+        self.batches.append(len(requests))
+        return SimpleNamespace(responses=[self._response(request["image"]["content"]) for request in requests])
+
+    def _response(self, content: bytes):
+        if content == b"corrupt":
+            return SimpleNamespace(error=SimpleNamespace(message="Bad image data."), full_text_annotation=None)
+        symbols = [SimpleNamespace(text=char, confidence=0.9) for char in "Vendor"]
+        vertices = [SimpleNamespace(x=x, y=y) for x, y in ((10, 5), (60, 5), (60, 20), (10, 20))]
+        word = SimpleNamespace(symbols=symbols, confidence=0.9, bounding_box=SimpleNamespace(vertices=vertices))
+        page = SimpleNamespace(blocks=[SimpleNamespace(paragraphs=[SimpleNamespace(words=[word])])])
+        return SimpleNamespace(
+            error=SimpleNamespace(message=""),
+            full_text_annotation=SimpleNamespace(text=self.text, pages=[page]),
+        )
+
+
+def test_resubmitted_document_skips_the_provider_but_crosschecks_fresh(tmp_path: Path) -> None:
+    service = DocumentOCRService(MediaLoader(), ocr_config, cache=OCRCache(tmp_path / "ocr.db"))
+    vision = _FakeVision("Vendor: Agri Corp\nTotal: 100000")
+    service.provider = GoogleVisionProvider(vision, ocr_config)
+    document = EvidenceDocument(id="doc-1", base64_data="aW52b2ljZQ==")
+
+    first = service.process_document(document, "Agri Corp", 100000.0, None, EvidenceContext(service.loader))
+    second = service.process_document(document, "Other Vendor", 100000.0, None, EvidenceContext(service.loader))
+
+    assert vision.calls == 1
+    assert service.cache.stats()["hits"] == 1
+    assert first.crosscheck_results["vendor_match"] is True
+    assert second.crosscheck_results["vendor_match"] is False
+    cached = service.recognize(b"invoice")
+    assert cached.words[0].text == "Vendor" and cached.words[0].bbox == [10, 5, 60, 20]
+
+
+def test_client_library_documents_share_one_batch_call(tmp_path: Path) -> None:
+    config = ocr_config.model_copy(update={"vision_batch_wait_ms": 200})
+    service = DocumentOCRService(MediaLoader(), config)
+    vision = _FakeVision("Vendor: Agri Corp\nTotal: 100000")
+    service.provider = GoogleVisionProvider(vision, config)
+    documents = [
+        EvidenceDocument(id="inv-1", base64_data="aW52b2ljZQ=="),
+        EvidenceDocument(id="inv-2", base64_data="Y29ycnVwdA=="),
+        EvidenceDocument(id="inv-3", base64_data="cmVjZWlwdA=="),
+    ]
+
+    results = service.process_documents(documents, "Agri Corp", 100000.0, None, EvidenceContext(service.loader))
+
+    assert vision.batches == [3]
+    assert results[0].crosscheck_results["vendor_match"] is True
+    assert "ocr_failure" in results[1].penalties and "Bad image data" in results[1].crosscheck_results["error"]
+    assert results[2].crosscheck_results["vendor_match"] is True
+    assert service.batch_stats()["items"] == 3
+
+
+def test_entries_expire_and_evict_least_recently_used(tmp_path: Path) -> None:
+    now = [1000.0]
+    cache = OCRCache(tmp_path / "ocr.db", ttl_seconds=60, max_bytes=400, clock=lambda: now[0])
+    entry = OCRText(text="x" * 100, confidence=0.9, provider="google-vision/1")
+
+    cache.put("a", "google-vision/1", entry)
+    now[0] += 1
+    cache.put("b", "google-vision/1", entry)
+    now[0] += 1
+    assert cache.get("a", "google-vision/1") is not None
+    assert cache.get("a", "google-vision/2") is None
+    cache.put("c", "google-vision/1", entry)
+
+    assert cache.get("b", "google-vision/1") is None
+    assert cache.get("a", "google-vision/1") is not None
+    now[0] += 120
+    assert cache.get("c", "google-vision/1") is None
+    assert cache.purge_expired() == 2
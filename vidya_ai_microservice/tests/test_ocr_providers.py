@@ -0,0 +1,96 @@
+"""Tests for OCR providers and local page pre-processing."""
+
+from __future__ import annotations
+
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from app.config import OCRConfig
+from app.services import ocr_providers
+from app.services.ocr_providers import (
+    NullOCRProvider,
+    OCRProviderError,
+    TesseractProvider,
+    binarize,
+    deskew,
+    estimate_skew,
+    load_provider,
+    parse_tesseract_tsv,
+)
+
+
+def _page(angle: float) -> np.ndarray:
+    page = np.full((600, 800), 255, dtype=np.uint8)
+    for line in range(8):
+        cv2.putText(page, "Vendor: Agri Corp  Total: 100000", (40, 80 + line * 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+    rotation = cv2.getRotationMatrix2D((400, 300), angle, 1.0)
+    return cv2.warpAffine(page, rotation, (800, 600), borderValue=255)
+
+
+@pytest.mark.parametrize("angle", [-6.0, 4.0])
+def test_deskew_straightens_tilted_text(angle: float) -> None:
+    binary = binarize(_page(angle))
+
+    assert estimate_skew(binary) == pytest.approx(angle, abs=0.5)
+    assert estimate_skew(deskew(binary)) == pytest.approx(0.0, abs=0.5)
+
+
+def test_tesseract_tsv_becomes_lines_and_word_confidences() -> None:
+    tsv = "\n".join(
+        [
+            "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+            "4\t1\t1\t1\t1\t0\t10\t10\t200\t20\t-1\t",
+            "5\t1\t1\t1\t1\t1\t10\t10\t60\t20\t96.5\tVendor:",
+            "5\t1\t1\t1\t1\t2\t80\t10\t40\t20\t91\tAgri",
+            "5\t1\t1\t1\t2\t1\t10\t40\t50\t20\t88\tTotal:",
+            "5\t1\t1\t1\t2\t2\t70\t40\t70\t20\t-1\t ",
+        ]
+    )
+
+    parsed = parse_tesseract_tsv(tsv)
+
+    assert parsed.text == "Vendor: Agri\nTotal:"
+    assert [word.confidence for word in parsed.words] == [0.965, 0.91, 0.88]
+    assert parsed.words[1].bbox == [80.0, 10.0, 120.0, 30.0]
+
+
+def test_provider_selection_falls_back_without_engines() -> None:
+    assert isinstance(load_provider(OCRConfig(provider="none")), NullOCRProvider)
+    missing = OCRConfig(provider="tesseract", tesseract_cmd="vidya-missing-tesseract")
+    assert isinstance(load_provider(missing), NullOCRProvider)
+
+
+@pytest.mark.skipif(shutil.which("tesseract") is None, reason="tesseract binary not installed")
+def test_tesseract_reads_a_tilted_invoice() -> None:
+    provider = TesseractProvider(OCRConfig(local_ocr_workers=1))
+    try:
+        _, encoded = cv2.imencode(".png", _page(3.0))
+        recognized = provider.recognize(encoded.tobytes())
+    finally:
+        provider.close()
+
+    assert "Agri" in recognized.text and recognized.confidence > 0.5
+
+
+def _crash_worker(payload: bytes, *args) -> None:
+    if payload == b"crash":
+        os._exit(1)
+    cv2.cvtColor(np.frombuffer(payload, dtype=np.uint8), cv2.COLOR_BGR2GRAY)
+
+
+def test_tesseract_pool_recovers_from_dead_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(shutil, "which", lambda command: "/bin/true")
+    monkeypatch.setattr(ocr_providers, "_tesseract_job", _crash_worker)
+    provider = TesseractProvider(OCRConfig(local_ocr_workers=1))
+    try:
+        with pytest.raises(OCRProviderError, match="worker died"):
+            provider.recognize(b"crash")
+        # A fresh pool takes the next document; a cv2.error from the worker is wrapped
+        with pytest.raises(OCRProviderError, match="Tesseract failed"):
+            provider.recognize(b"not an image")
+    finally:
+        provider.close()
@@ -6,6 +6,7 @@ import base64
 
 import numpy as np
 import cv2
+import pytest
 
 from app.config import quality_config
 from app.schemas import EvidenceImage
@@ -44,3 +45,37 @@ def test_quality_flags_dark_low_contrast_image() -> None:
     assert "too_dark" in result.flags or "low_contrast" in result.flags
     assert result.officer_review_flag
     assert result.quality_score < 0.8
+
+
+def _encode(frame: np.ndarray, image_id: str) -> EvidenceImage:
+    success, buffer = cv2.imencode(".jpg", frame)
+    assert success
+    return EvidenceImage(id=image_id, base64_data=base64.b64encode(buffer).decode("utf-8"))
+
+
+def _text_frame(blur: float) -> np.ndarray:
+    frame = np.full((1200, 1600, 3), 235, dtype=np.uint8)
+    for line in range(24):
+        cv2.putText(frame, "INVOICE 4071.00 QTY 5", (40, 45 + line * 48), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (20, 20, 20), 2)
+    return cv2.GaussianBlur(frame, (0, 0), blur) if blur else frame
+
+
+def test_reduced_decode_keeps_the_full_resolution_decision() -> None:
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 256, size=(1200, 1600, 3), dtype=np.uint8)
+    images = [
+        _encode(noise, "sharp-noise"),
+        _encode(cv2.GaussianBlur(noise, (0, 0), 2), "blurred-noise"),
+        _encode(_text_frame(0), "sharp-text"),
+        _encode(_text_frame(4), "blurred-text"),
+    ]
+    gray = quality_config.model_copy(update={"decode_mode": "gray"})
+    full = ImageQualityAnalyzer(MediaLoader(), gray.model_copy(update={"decode_scale": 1}))
+    reduced = ImageQualityAnalyzer(MediaLoader(), gray.model_copy(update={"decode_scale": 2}))
+
+    for full_result, reduced_result in zip(full.analyze_batch(images), reduced.analyze_batch(images)):
+        assert reduced_result.resolution_ok is full_result.resolution_ok is True
+        assert reduced_result.flags == full_result.flags, full_result.image_id
+        assert ("blurry" in reduced_result.flags) is ("blurry" in full_result.flags)
+        assert reduced_result.quality_score == pytest.approx(full_result.quality_score, abs=0.01)
+        assert reduced_result.officer_review_flag is full_result.officer_review_flag
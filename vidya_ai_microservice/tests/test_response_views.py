@@ -0,0 +1,54 @@
+"""Tests for the ``view`` response shapes and compressed score responses."""
+
+from __future__ import annotations
+
+import base64
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import create_app
+from app.utils.compression import negotiate_encoding
+
+
+def _case() -> dict:
+    _, buffer = cv2.imencode(".jpg", np.full((480, 640, 3), 120, dtype=np.uint8))
+    encoded = base64.b64encode(buffer).decode("utf-8")
+    return {
+        "case_id": "case-view",
+        "asset_images": [{"id": "img-1", "base64_data": encoded}],
+        "doc_images": [{"id": "doc-1", "base64_data": encoded}],
+        "metadata": {"case_id": "case-view", "applicant_id": "app-1", "declared_loan_amount": 50000},
+    }
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(settings, "duplicate_state_path", tmp_path / "state.json")
+    monkeypatch.setattr(settings, "model_registry_path", tmp_path / "models")
+    monkeypatch.setattr(settings, "model_registry_poll_seconds", 0)
+    return TestClient(create_app())
+
+
+def test_views_shape_the_score_response(client: TestClient) -> None:
+    summary = client.post("/cases/score?view=summary", json=_case()).json()
+    full = client.post("/cases/score?view=full", json=_case()).json()
+    audit = client.post("/cases/score", json=_case()).json()
+
+    assert set(summary) == {"case_id", "final_risk_score", "risk_tier", "routing_decision", "config_version"}
+    assert full["scores"]["ocr"] and set(full["full_explanation"]) == {"aggregation_components"}
+    assert audit["full_explanation"]["ocr"] == audit["scores"]["ocr"]
+    assert summary["risk_tier"] == full["risk_tier"] == audit["risk_tier"]
+
+
+def test_score_response_is_compressed_when_accepted(client: TestClient) -> None:
+    response = client.post("/cases/score", json=_case(), headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json()["case_id"] == "case-view"
+    assert negotiate_encoding("gzip;q=0, identity") is None
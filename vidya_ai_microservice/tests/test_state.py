@@ -0,0 +1,98 @@
+"""Tests for the duplicate/device state backends."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.state import LocalStateStore, SQLiteStateStore, open_state_store
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    backend = open_state_store(request.param, tmp_path / "state.json", tmp_path / "state.db")
+    yield backend
+    backend.close()
+
+
+def test_backends_share_behaviour(store) -> None:
+    start = datetime(2025, 1, 1, 9, 0)
+    store.record_hash("app-1", "img-1", "cf8df0633c390c4b", "case-1")
+
+    counts = [store.record_device_usage("dev-1", start + timedelta(days=offset)) for offset in (0, 1, 9)]
+    ratios = [store.record_submission("app-1", start + timedelta(hours=hours)) for hours in (0, 1, 5)]
+
+    assert store.list_hashes("app-1") == {"img-1": {"hash": "cf8df0633c390c4b", "case_id": "case-1"}}
+    assert store.list_hashes("app-2") == {}
+    assert counts == [1, 2, 1]
+    assert ratios == [0.0, 1.0, 0.5]
+    assert store.record_device_usage(None, start) == 0
+
+
+def test_sqlite_migrates_json_state_once(tmp_path) -> None:
+    legacy = LocalStateStore(tmp_path / "legacy.json")
+    legacy.record_hash("app-1", "img-1", "abcd", "case-1")
+    legacy.record_submission("app-1", datetime(2025, 1, 1, 9, 0))
+
+    store = SQLiteStateStore(tmp_path / "state.db")
+    assert store.migrate_from_json(legacy.path) is True
+    assert store.migrate_from_json(legacy.path) is False
+
+    assert store.list_hashes("app-1") == {"img-1": {"hash": "abcd", "case_id": "case-1"}}
+    assert store.record_submission("app-1", datetime(2025, 1, 1, 10, 0)) == 1.0
+
+
+def test_workers_starting_together_migrate_once(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    loads = json.loads
+
+    def slow_loads(text: str):
+        # Widen the gap between checking the marker and taking the write lock
+        time.sleep(0.05)
+        return loads(text)
+
+    monkeypatch.setattr(json, "loads", slow_loads)
+    legacy = LocalStateStore(tmp_path / "legacy.json")
+    legacy.record_hash("app-1", "img-1", "abcd", "case-1")
+    stores = [SQLiteStateStore(tmp_path / "state.db") for _ in range(4)]
+    barrier = threading.Barrier(len(stores))
+    outcomes: list = []
+
+    def start(store: SQLiteStateStore) -> None:
+        barrier.wait()
+        try:
+            outcomes.append(store.migrate_from_json(legacy.path))
+        except Exception as exc:  # pragma: no cover - the failure this test guards against
+            outcomes.append(exc)
+
+    threads = [threading.Thread(target=start, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == [False, False, False, True]
+
+
+def test_old_event_lists_are_folded_into_counters(tmp_path) -> None:
+    legacy = tmp_path / "legacy.json"
+    legacy.write_text(
+        json.dumps(
+            {
+                "applicants": {"app-1": {"timestamps": ["2025-01-01T09:00:00", "2025-01-01T10:00:00"]}},
+                "devices": {"dev-1": {"events": ["2024-12-20T09:00:00", "2025-01-01T08:00:00"]}},
+            }
+        ),
+        encoding="utf-8",
+    )
+    store = LocalStateStore(legacy)
+
+    assert store.record_device_usage("dev-1", datetime(2025, 1, 1, 9, 0)) == 2
+    assert store.record_submission("app-1", datetime(2025, 1, 1, 16, 0)) == 0.5
+    saved = json.loads(legacy.read_text(encoding="utf-8"))
+    assert "timestamps" not in saved["applicants"]["app-1"]
+    assert saved["applicants"]["app-1"]["velocity"]["intervals"] == 2
+    assert len(saved["devices"]["dev-1"]["buckets"]) == 2
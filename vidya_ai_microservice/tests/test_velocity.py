@@ -0,0 +1,65 @@
+"""Tests for the sliding-window and submission-velocity counters."""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+from datetime import datetime
+
+from app.utils.state import SQLiteStateStore
+from app.utils.velocity import SlidingWindowCounter, SubmissionVelocity
+
+DAY = 86400
+
+
+def test_window_counter_expires_buckets_and_stays_bounded() -> None:
+    counter = SlidingWindowCounter(7 * DAY, bucket_seconds=3600)
+
+    counts = [counter.add(day * DAY) for day in range(30)]
+
+    assert counts[:8] == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert counts[-1] == 8 and len(counter.buckets()) == 8
+    # A late event inside the window is counted; one older than the window is dropped
+    assert counter.add(25 * DAY + 60) == 9
+    assert counter.add(3 * DAY) == 9
+
+
+def test_velocity_matches_full_history_ratio_for_shuffled_submissions() -> None:
+    rng = random.Random(3)
+    epochs = [rng.randrange(0, 30 * DAY) for _ in range(25)]
+    velocity = SubmissionVelocity(retain=64)
+
+    for epoch in rng.sample(epochs, len(epochs)):
+        ratio = velocity.add(epoch)
+
+    ordered = sorted(epochs)
+    gaps = [later - earlier for earlier, later in zip(ordered, ordered[1:])]
+    assert ratio == sum(gap < 7200 for gap in gaps) / len(gaps)
+    bounded = SubmissionVelocity.from_history(range(0, 1000 * 3600, 3600), 7200)
+    assert bounded.ratio == 1.0 and len(bounded.recent()) == bounded.retain
+
+
+def test_sqlite_folds_old_event_tables(tmp_path) -> None:
+    path = tmp_path / "state.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE device_events (device_id TEXT NOT NULL, ts TEXT NOT NULL)")
+        connection.execute(
+            "CREATE TABLE case_timestamps (seq INTEGER PRIMARY KEY AUTOINCREMENT, applicant_id TEXT, ts TEXT)"
+        )
+        connection.executemany(
+            "INSERT INTO device_events VALUES (?, ?)",
+            [("dev-1", "2025-01-01T08:00:00"), ("dev-1", "2025-01-02T08:00:00")],
+        )
+        connection.executemany(
+            "INSERT INTO case_timestamps (applicant_id, ts) VALUES (?, ?)",
+            [("app-1", "2025-01-01T09:00:00"), ("app-1", "2025-01-01T09:30:00")],
+        )
+    connection.close()
+
+    store = SQLiteStateStore(path)
+
+    assert store.record_device_usage("dev-1", datetime(2025, 1, 3, 8, 0)) == 3
+    assert store.record_submission("app-1", datetime(2025, 1, 1, 20, 0)) == 0.5
+    tables = {name for (name,) in store._connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not tables & {"device_events", "case_timestamps"}
+    store.close()
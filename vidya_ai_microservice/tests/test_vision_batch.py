@@ -0,0 +1,112 @@
+"""Tests for batched Vision REST calls against a local fake Vision server."""
+
+from __future__ import annotations
+
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, List
+
+import pytest
+
+from app.config import OCRConfig
+from app.schemas import EvidenceDocument
+from app.services.ocr_processing import DocumentOCRService
+from app.utils.evidence import EvidenceContext
+from app.utils.media_loader import MediaLoader
+from app.utils.rate_limit import TokenBucket
+
+
+class _FakeVision(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    batches: List[int] = []
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.batches.append(len(request["requests"]))
+        responses = []
+        for item in request["requests"]:
+            content = base64.b64decode(item["image"]["content"]).decode("utf-8")
+            if content == "corrupt":
+                responses.append({"error": {"code": 3, "message": "Bad image data."}})
+                continue
+            word = {
+                "confidence": 0.95,
+                "boundingBox": {"vertices": [{"y": 4}, {"x": 50, "y": 4}, {"x": 50, "y": 20}, {"y": 20}]},
+                "symbols": [{"text": char, "confidence": 0.95} for char in "Vendor"],
+            }
+            responses.append(
+                {
+                    "fullTextAnnotation": {
+                        "text": f"Vendor: {content}\nTotal: 100000",
+                        "pages": [{"blocks": [{"paragraphs": [{"words": [word]}]}]}],
+                    }
+                }
+            )
+        body = json.dumps({"responses": responses}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        return
+
+
+@pytest.fixture
+def vision_server() -> Iterator[str]:
+    _FakeVision.batches = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeVision)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/images:annotate"
+    server.shutdown()
+
+
+def _document(doc_id: str, content: str) -> EvidenceDocument:
+    return EvidenceDocument(id=doc_id, base64_data=base64.b64encode(content.encode("utf-8")).decode("ascii"))
+
+
+def test_case_documents_share_one_call_and_fail_independently(vision_server: str) -> None:
+    config = OCRConfig(vision_endpoint=vision_server, vision_batch_wait_ms=200)
+    service = DocumentOCRService(MediaLoader(), config, api_key="test-key")
+    documents = [_document("inv-1", "Agri Corp"), _document("inv-2", "corrupt"), _document("inv-3", "Agri Corp")]
+
+    results = service.process_documents(documents, "Agri Corp", 100000.0, None, EvidenceContext(service.loader))
+
+    assert _FakeVision.batches == [3]
+    assert [result.doc_id for result in results] == ["inv-1", "inv-2", "inv-3"]
+    assert results[0].crosscheck_results["vendor_match"] is True
+    assert results[0].ocr_confidence == 0.95
+    assert "ocr_failure" in results[1].penalties and "Bad image data" in results[1].crosscheck_results["error"]
+    assert service.recognize(b"Agri Corp").words[0].bbox == [0.0, 4.0, 50.0, 20.0]
+
+
+def test_batches_are_split_by_encoded_size(vision_server: str) -> None:
+    config = OCRConfig(vision_endpoint=vision_server, vision_batch_wait_ms=200, vision_batch_max_bytes=30)
+    service = DocumentOCRService(MediaLoader(), config, api_key="test-key")
+    # 12 base64 bytes each, except the 56-byte scan that exceeds the cap by itself
+    contents = {"a": "Agri Corp", "b": "Agri Corp", "c": "x" * 40, "d": "Agri Corp"}
+    documents = [_document(doc_id, content) for doc_id, content in contents.items()]
+
+    results = service.process_documents(documents, "Agri Corp", 100000.0, None, EvidenceContext(service.loader))
+
+    assert _FakeVision.batches == [2, 1, 1]
+    assert [result.crosscheck_results["vendor_match"] for result in results] == [True, True, False, True]
+
+
+def test_token_bucket_paces_to_the_quota() -> None:
+    now = [0.0]
+    sleeps: List[float] = []
+
+    def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2.0, burst=4, clock=lambda: now[0], sleep=sleep)
+
+    assert bucket.acquire(4) == 0.0
+    assert bucket.acquire(3) == pytest.approx(1.5)
+    assert sum(sleeps) == pytest.approx(1.5)
@@ -0,0 +1,122 @@
+"""Tests for the recorded layer outputs and the weight what-if simulation."""
+
+from __future__ import annotations
+
+import base64
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import WeightConfig, settings
+from app.main import create_app
+from app.services.aggregation import COMPONENTS, RISK_TIERS, RiskAggregator, tier_migration
+from app.utils.layer_store import LayerOutputStore
+
+
+def test_layer_store_keeps_newest_row_across_segments(tmp_path: Path) -> None:
+    store = LayerOutputStore(tmp_path, COMPONENTS, ("a", "b"), flush_rows=2)
+    store.record("case-1", np.full(5, 10.0), np.array([1.0, 2.0]), 10.0, 0, scored_at=1.0)
+    store.record("case-2", np.full(5, 90.0), np.array([3.0, 4.0]), 90.0, 2, scored_at=2.0)
+    store.flush()
+    store.record("case-1", np.full(5, 70.0), np.array([5.0, 6.0]), 70.0, 1, scored_at=3.0)
+    store.close()
+
+    # A newer feature schema reads the columns it shares with older segments
+    reopened = LayerOutputStore(tmp_path, COMPONENTS, ("b", "c"), compact_segments=1)
+    history = reopened.snapshot()
+
+    assert history.case_ids == ("case-1", "case-2")
+    assert history.scores.tolist() == [70.0, 90.0] and history.tiers.tolist() == [1, 2]
+    assert history.features[:, 0].tolist() == [6.0, 4.0] and np.isnan(history.features[:, 1]).all()
+    assert reopened.stats()["segments"] == 1
+
+
+def test_layer_store_compacts_while_running(tmp_path: Path) -> None:
+    store = LayerOutputStore(tmp_path, COMPONENTS, ("a",), flush_rows=1, compact_segments=2)
+    for index in range(5):
+        store.record(f"case-{index}", np.full(5, float(index)), np.array([1.0]), float(index), 0)
+        store.flush()
+
+    assert store.stats()["segments"] == len(list(tmp_path.glob("segment-*.npz"))) <= 2
+    store.close()
+    assert LayerOutputStore(tmp_path, COMPONENTS, ("a",)).snapshot().scores.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_layer_store_workers_share_a_directory(tmp_path: Path) -> None:
+    first = LayerOutputStore(tmp_path, COMPONENTS, ("a",), flush_rows=1, compact_segments=1)
+    second = LayerOutputStore(tmp_path, COMPONENTS, ("a",), flush_rows=1, compact_segments=1)
+    first.record("case-1", np.full(5, 10.0), np.array([1.0]), 10.0, 0, scored_at=1.0)
+    second.record("case-2", np.full(5, 20.0), np.array([2.0]), 20.0, 0, scored_at=2.0)
+    second.record("case-1", np.full(5, 30.0), np.array([3.0]), 30.0, 1, scored_at=3.0)
+    first.flush()
+    second.flush()
+
+    # Compacting one worker's files leaves the other's in place
+    first.compact()
+    assert first.snapshot().scores.tolist() == [30.0, 20.0]
+    second.close()
+    first.compact()
+    assert first.stats()["segments"] == len(list(tmp_path.glob("segment-*.npz"))) == 1
+    first.close()
+    assert LayerOutputStore(tmp_path, COMPONENTS, ("a",)).snapshot().scores.tolist() == [30.0, 20.0]
+
+
+def test_score_many_matches_aggregate(aggregator: RiskAggregator, low_risk_case: Dict[str, List],
+                                      medium_risk_case: Dict[str, List], high_risk_case: Dict[str, List]) -> None:
+    results = [
+        aggregator.aggregate(
+            case["quality"], case["detection"], case["ocr"], case["duplicates"], case["fraud_score"]
+        )
+        for case in (low_risk_case, medium_risk_case, high_risk_case)
+    ]
+    components = np.array([[result["components"][name] for name in COMPONENTS] for result in results])
+
+    scores = aggregator.score_many(components)
+    tiers = aggregator.tier_many(scores)
+
+    assert scores.tolist() == [result["final_risk_score"] for result in results]
+    assert [RISK_TIERS[code] for code in tiers] == [result["risk_tier"] for result in results]
+    fraud_only = WeightConfig(
+        image_quality_weight=0, asset_match_weight=0, ocr_match_weight=0, duplicate_weight=0, fraud_score_weight=1
+    )
+    assert aggregator.score_many(components, fraud_only).tolist() == components[:, -1].tolist()
+    assert tier_migration(tiers, np.full(3, 2)).tolist() == [[0, 0, 1], [0, 0, 1], [0, 0, 1]]
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TestClient:
+    monkeypatch.setattr(settings, "duplicate_state_path", tmp_path / "state.json")
+    monkeypatch.setattr(settings, "model_registry_path", tmp_path / "models")
+    monkeypatch.setattr(settings, "model_registry_poll_seconds", 0)
+    monkeypatch.setattr(settings, "layer_store_dir", tmp_path / "layers")
+    return TestClient(create_app())
+
+
+def test_simulate_endpoint_reports_tier_migration(client: TestClient) -> None:
+    _, buffer = cv2.imencode(".jpg", np.full((480, 640, 3), 120, dtype=np.uint8))
+    image = {"id": "img-1", "base64_data": base64.b64encode(buffer).decode("utf-8")}
+    for case_id in ("case-a", "case-b"):
+        case = {
+            "case_id": case_id,
+            "asset_images": [image],
+            "doc_images": [],
+            "metadata": {"case_id": case_id, "applicant_id": "app-1", "declared_loan_amount": 50000},
+        }
+        recorded_tier = client.post("/cases/score?view=summary", json=case).json()["risk_tier"]
+    weights = client.get("/config/weights").json()
+
+    unchanged = client.post("/config/weights/simulate", json={"weights": weights}).json()
+    strict = client.post(
+        "/config/weights/simulate", json={"weights": weights, "thresholds": {"auto_approve_threshold": 0,
+                                                                           "officer_review_threshold": 0}}
+    ).json()
+
+    assert unchanged["cases"] == 2 and unchanged["changed"] == 0
+    assert unchanged["recorded_counts"][recorded_tier] == 2 and unchanged["mean_score_delta"] == 0.0
+    assert strict["simulated_counts"]["video-verify"] == 2
+    assert strict["changed"] == len(strict["moved"]) == 2 - unchanged["recorded_counts"]["video-verify"]
+    assert client.get("/config/weights").json() == weights